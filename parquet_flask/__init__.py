@@ -19,6 +19,8 @@ import logging
 def get_app():
     from flask import Flask
     from .v1 import blueprint
+    from .io_logic.parquet_stats_catalog import ParquetStatsCatalog
+    ParquetStatsCatalog().start()
     app = Flask(__name__)
     app.register_blueprint(blueprint)
     # api.init_app(app)
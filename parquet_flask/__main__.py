@@ -48,8 +48,9 @@ def flask_me():
 
     from gevent.pywsgi import WSGIServer
     from parquet_flask import get_app
+    from parquet_flask.utils.client_socket_wsgi_handler import ClientSocketWsgiHandler
     # get_app().run(host='0.0.0.0', port=9788, threaded=True)
-    http_server = WSGIServer(('', 9801), get_app())
+    http_server = WSGIServer(('', 9801), get_app(), handler_class=ClientSocketWsgiHandler)
     http_server.serve_forever()
     return
 
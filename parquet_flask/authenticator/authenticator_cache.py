@@ -0,0 +1,109 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+from time import monotonic
+from typing import Union
+
+from parquet_flask.authenticator.authenticator_abstract import AuthenticatorAbstract
+from parquet_flask.authenticator.authenticator_factory import AuthenticatorFactory
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.singleton import Singleton
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AuthenticatorCache(metaclass=Singleton):
+    """
+    authenticators with their fetched credentials, keyed by authentication type and credential name.
+    credentials are fetched again when they are older than `authentication_cache_ttl` seconds (0 fetches them on every call).
+    a failed authentication forces a refresh so that a rotated secret is picked up before the TTL.
+    the forced refresh is skipped when the credentials are younger than MIN_REFRESH_INTERVAL seconds
+    so that requests with wrong tokens cannot turn into a secret fetch each.
+
+    a refresh replaces the cached authenticator with a new instance. in-flight requests keep using the old one.
+    """
+    DEFAULT_TTL = 300
+    MIN_REFRESH_INTERVAL = 10
+
+    def __init__(self):
+        self.__ttl = int(Config(False).get_value(Config.authentication_cache_ttl, AuthenticatorCache.DEFAULT_TTL))
+        self.__entries = {}
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__fetches = 0
+        self.__forced_refreshes = 0
+
+    def __fetch(self, auth_type: str, cred_name: str, min_age: float) -> AuthenticatorAbstract:
+        cache_key = (auth_type, cred_name)
+        with self.__lock:
+            entry = self.__entries.get(cache_key, None)
+            if entry is not None and monotonic() - entry['fetched_at'] < min_age:
+                return entry['authenticator']  # refreshed by another request while waiting for the lock
+            authenticator: AuthenticatorAbstract = AuthenticatorFactory().get_instance(auth_type)
+            authenticator.get_auth_credentials(cred_name)
+            self.__fetches += 1
+            LOGGER.info(f'fetched authentication credentials: {cred_name}. type: {auth_type}. total fetches: {self.__fetches}')
+            self.__entries[cache_key] = {
+                'authenticator': authenticator,
+                'fetched_at': monotonic(),
+            }
+            return authenticator
+
+    def get_authenticator(self, auth_type: str, cred_name: str) -> AuthenticatorAbstract:
+        """
+        :param auth_type: one of AuthenticatorFactory types
+        :param cred_name: secret name or file path of the credentials
+        :return: AuthenticatorAbstract whose credentials are loaded
+        """
+        entry = self.__entries.get((auth_type, cred_name), None)
+        if entry is not None and monotonic() - entry['fetched_at'] < self.__ttl:
+            with self.__lock:
+                self.__hits += 1
+            return entry['authenticator']
+        return self.__fetch(auth_type, cred_name, self.__ttl)
+
+    def authenticate(self, auth_type: str, cred_name: str, input_auth_cred: dict) -> Union[str, None]:
+        """
+        :param auth_type: one of AuthenticatorFactory types
+        :param cred_name: secret name or file path of the credentials
+        :param input_auth_cred: request headers
+        :return: None if authenticated. error message otherwise
+        """
+        auth_result = self.get_authenticator(auth_type, cred_name).authenticate(input_auth_cred)
+        if auth_result is None:
+            return None
+        entry = self.__entries.get((auth_type, cred_name), None)
+        if entry is not None and monotonic() - entry['fetched_at'] < AuthenticatorCache.MIN_REFRESH_INTERVAL:
+            return auth_result
+        with self.__lock:
+            self.__forced_refreshes += 1
+        return self.__fetch(auth_type, cred_name, AuthenticatorCache.MIN_REFRESH_INTERVAL).authenticate(input_auth_cred)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries = {}
+        return
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'fetches': self.__fetches,
+                'forced_refreshes': self.__forced_refreshes,
+                'entries': len(self.__entries),
+                'ttl': self.__ttl,
+            }
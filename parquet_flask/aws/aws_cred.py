@@ -12,7 +12,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 import logging
+import os
+import threading
+from hashlib import sha256
 
 import boto3
 
@@ -22,7 +26,19 @@ LOGGER = logging.getLogger(__name__)
 
 
 class AwsCred:
+    """
+    boto3 sessions and clients are cached per process, keyed on the session settings and the AWS_* env variables
+    which the default credential chain reads. changing either of them (e.g. rotated keys) creates new ones.
+    temporary credentials from the default chain (assumed role, instance profile, SSO) are RefreshableCredentials.
+    botocore refreshes them before they expire, so the cached session and its clients keep working.
+
+    clients are thread-safe and shared. resources are not thread-safe, so they are cached per thread.
+    """
     __DEFAULT_REGION = 'us-west-2'
+    __CHAIN_ENV_KEYS = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN', 'AWS_PROFILE', 'AWS_ROLE_ARN', 'AWS_WEB_IDENTITY_TOKEN_FILE']
+    __cached_sessions = {}
+    __cached_services = {}
+    __cache_lock = threading.Lock()
 
     def __init__(self):
         self.__region = Config(False).get_value(Config.aws_region, AwsCred.__DEFAULT_REGION)
@@ -68,11 +84,43 @@ class AwsCred:
         self.__boto3_session = val
         return
 
+    def __get_cache_key(self):
+        chain_env = {k: os.environ.get(k, None) for k in AwsCred.__CHAIN_ENV_KEYS}
+        return sha256(json.dumps([self.boto3_session, chain_env], sort_keys=True).encode()).hexdigest()
+
     def get_session(self):
-        return boto3.Session(**self.boto3_session)
+        session_key = self.__get_cache_key()
+        boto3_session = AwsCred.__cached_sessions.get(session_key, None)
+        if boto3_session is not None:
+            return boto3_session
+        with AwsCred.__cache_lock:
+            if session_key not in AwsCred.__cached_sessions:
+                LOGGER.debug(f'creating boto3 session for region: {self.region}')
+                AwsCred.__cached_sessions[session_key] = boto3.Session(**self.boto3_session)
+            return AwsCred.__cached_sessions[session_key]
+
+    def __get_service(self, service_type: str, service_name: str, thread_id=None):
+        service_key = (self.__get_cache_key(), service_type, service_name, thread_id)
+        aws_service = AwsCred.__cached_services.get(service_key, None)
+        if aws_service is not None:
+            return aws_service
+        boto3_session = self.get_session()
+        with AwsCred.__cache_lock:  # creating clients from the same session is not thread-safe
+            if service_key not in AwsCred.__cached_services:
+                LOGGER.debug(f'creating boto3 {service_type}: {service_name}')
+                create_service = boto3_session.client if service_type == 'client' else boto3_session.resource
+                AwsCred.__cached_services[service_key] = create_service(service_name)
+            return AwsCred.__cached_services[service_key]
 
     def get_resource(self, service_name: str):
-        return boto3.Session(**self.boto3_session).resource(service_name)
+        return self.__get_service('resource', service_name, threading.get_ident())
 
     def get_client(self, service_name: str):
-        return boto3.Session(**self.boto3_session).client(service_name)
+        return self.__get_service('client', service_name)
+
+    @staticmethod
+    def clear_cache():
+        with AwsCred.__cache_lock:
+            AwsCred.__cached_sessions = {}
+            AwsCred.__cached_services = {}
+        return
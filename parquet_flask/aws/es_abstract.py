@@ -57,6 +57,10 @@ class ESAbstract(ABC):
     def query_pages(self, dsl, querying_index=None):
         return
 
+    @abstractmethod
+    def count(self, dsl, querying_index=None):
+        return
+
     @abstractmethod
     def query_by_id(self, doc_id, index=None):
         return
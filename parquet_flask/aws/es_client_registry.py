@@ -0,0 +1,91 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import threading
+from hashlib import sha256
+
+from parquet_flask.aws.aws_cred import AwsCred
+from parquet_flask.aws.es_factory import ESFactory
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.singleton import Singleton
+
+LOGGER = logging.getLogger(__name__)
+
+
+class EsClientRegistry(metaclass=Singleton):
+    """
+    process-wide Elasticsearch clients keyed by auth type, host, port, and configured credentials.
+    a client keeps a pool of keep-alive connections (`es_pool_maxsize`) so that requests from concurrent greenlets reuse
+    open TLS connections instead of handshaking for each API call.
+
+    AWS clients sign with botocore credentials which refresh themselves before they expire (assumed role, instance profile, ...).
+    """
+    DEFAULT_POOL_MAXSIZE = 32
+    AWS_SERVICE = 'es'
+
+    def __init__(self):
+        self.__pool_maxsize = int(Config(False).get_value(Config.es_pool_maxsize, EsClientRegistry.DEFAULT_POOL_MAXSIZE))
+        self.__clients = {}
+        self.__lock = threading.Lock()
+
+    def __get_credential_key(self, auth_type: str):
+        if auth_type != ESFactory.AWS:
+            return None
+        return sha256(json.dumps(AwsCred().boto3_session, sort_keys=True).encode()).hexdigest()
+
+    def __create_aws_client(self, host: str, port: int):
+        from elasticsearch import Elasticsearch
+        from requests_aws4auth import AWS4Auth
+        from parquet_flask.aws.pooled_requests_http_connection import PooledRequestsHttpConnection
+        aws_cred = AwsCred()
+        aws_auth = AWS4Auth(refreshable_credentials=aws_cred.get_session().get_credentials(), region=aws_cred.region, service=self.AWS_SERVICE)
+        return Elasticsearch(
+            hosts=[{'host': host, 'port': port}],
+            http_auth=aws_auth,
+            use_ssl=True,
+            verify_certs=True,
+            connection_class=PooledRequestsHttpConnection,
+            pool_maxsize=self.__pool_maxsize,
+        )
+
+    def __create_client(self, auth_type: str, host: str, port: int):
+        if auth_type == ESFactory.AWS:
+            return self.__create_aws_client(host, port)
+        from elasticsearch import Elasticsearch
+        return Elasticsearch(hosts=[{'host': host, 'port': port}], maxsize=self.__pool_maxsize)
+
+    def get_client(self, auth_type: str, host: str, port: int):
+        """
+        :param auth_type: ESFactory.AWS or ESFactory.NO_AUTH
+        :param host: host name without scheme
+        :param port:
+        :return: elasticsearch.Elasticsearch which is shared by every caller with the same key
+        """
+        client_key = (auth_type, host, int(port), self.__get_credential_key(auth_type))
+        es_client = self.__clients.get(client_key, None)
+        if es_client is not None:
+            return es_client
+        with self.__lock:
+            if client_key not in self.__clients:
+                LOGGER.debug(f'creating ES client for {auth_type}: {host}:{port}')
+                self.__clients[client_key] = self.__create_client(auth_type, host, int(port))
+            return self.__clients[client_key]
+
+    def clear(self):
+        with self.__lock:
+            self.__clients = {}
+        return
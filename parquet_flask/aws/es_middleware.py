@@ -15,8 +15,9 @@
 
 import logging
 
-from elasticsearch import Elasticsearch
 from parquet_flask.aws.es_abstract import ESAbstract, DEFAULT_TYPE
+from parquet_flask.aws.es_client_registry import EsClientRegistry
+from parquet_flask.aws.es_factory import ESFactory
 
 LOGGER = logging.getLogger(__name__)
 
@@ -27,8 +28,11 @@ class ESMiddleware(ESAbstract):
         if any([k is None for k in [index, base_url]]):
             raise ValueError(f'index or base_url is None')
         self.__index = index
+        self._engine = self._get_engine(base_url, port)
+
+    def _get_engine(self, base_url, port):
         base_url = base_url.replace('https://', '')  # hide https
-        self._engine = Elasticsearch(hosts=[{'host': base_url, 'port': port}])
+        return EsClientRegistry().get_client(ESFactory.NO_AUTH, base_url, port)
 
     def __validate_index(self, index):
         if index is not None:
@@ -157,12 +161,22 @@ class ESMiddleware(ESAbstract):
         index = self.__validate_index(querying_index)
         return self._engine.search(body=dsl, index=index)
 
+    def count(self, dsl, querying_index=None) -> int:
+        """
+        exact count. unlike `hits.total` from `query`, it is not capped at 10,000
+        :param dsl: dict with `query`
+        :param querying_index:
+        :return: int
+        """
+        index = self.__validate_index(querying_index)
+        return int(self._engine.count(body=dsl, index=index)['count'])
+
     def query_pages(self, dsl, querying_index=None) -> dict:
         """
 
         :param dsl:
         :param querying_index:
-        :return: dict | {"total": 0, "items": []}
+        :return: dict | {"total": 0, "items": [], "pages": number of search requests}
         """
         if 'sort' not in dsl:
             raise ValueError('missing `sort` in DSL. Make sure sorting is unique')
@@ -177,15 +191,18 @@ class ESMiddleware(ESAbstract):
         first_batch = self._engine.search(**params)
         current_size = len(first_batch['hits']['hits'])
         total_size = current_size
+        page_count = 1
         while current_size > 0:
             dsl['search_after'] = first_batch['hits']['hits'][-1]['sort']
             paged_result = self._engine.search(**params)
+            page_count += 1
             current_size = len(paged_result['hits']['hits'])
             total_size += current_size
             first_batch['hits']['hits'].extend(paged_result['hits']['hits'])
         return {
             'total': len(first_batch['hits']['hits']),
             'items': first_batch['hits']['hits'],
+            'pages': page_count,
         }
 
     def query_by_id(self, doc_id, index=None):
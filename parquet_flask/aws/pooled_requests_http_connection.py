@@ -0,0 +1,28 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from elasticsearch import RequestsHttpConnection
+from requests.adapters import HTTPAdapter
+
+
+class PooledRequestsHttpConnection(RequestsHttpConnection):
+    """
+    RequestsHttpConnection keeps at most 10 connections (requests default). more concurrent requests open and close extra ones.
+    """
+    def __init__(self, *args, pool_maxsize=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        http_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', http_adapter)
+        self.session.mount('https://', http_adapter)
@@ -15,6 +15,7 @@
 
 import os
 import json
+from time import time
 
 from parquet_flask.parquet_stat_extractor.local_statistics_retriever import LocalStatisticsRetriever
 from parquet_flask.utils.file_utils import FileUtils
@@ -23,6 +24,7 @@ from parquet_flask.aws.aws_s3 import AwsS3
 from parquet_flask.aws.es_abstract import ESAbstract
 
 from parquet_flask.aws.es_factory import ESFactory
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
 from parquet_flask.cdms_lambda_func.cdms_lambda_constants import CdmsLambdaConstants
 from parquet_flask.cdms_lambda_func.index_to_es.parquet_stat_extractor import ParquetStatExtractor
 from parquet_flask.cdms_lambda_func.index_to_es.s3_stat_extractor import S3StatExtractor
@@ -35,6 +37,7 @@ LOGGER = LambdaLoggerGenerator.get_logger(__name__, log_level=LambdaLoggerGenera
 class ParquetFileEsIndexer:
     def __init__(self):
         self.__s3_url = None
+        self.__file_size = None  # from the S3 event, or the downloaded file. used to estimate the cost of queries
         self.__es_url = os.environ.get(CdmsLambdaConstants.es_url, None)
         self.__es_index = os.environ.get(CdmsLambdaConstants.es_index, None)
         self.__es_port = int(os.environ.get(CdmsLambdaConstants.es_port, '443'))
@@ -45,6 +48,8 @@ class ParquetFileEsIndexer:
     def extract_stats_locally(self):
         LOGGER.debug('downloading parquet file locally to extract stats')
         local_parquet_file_path = AwsS3().set_s3_url(self.__s3_url).download('/tmp')
+        if self.__file_size is None:
+            self.__file_size = os.path.getsize(local_parquet_file_path)
         stats_json = LocalStatisticsRetriever(local_parquet_file_path, os.environ.get(CdmsLambdaConstants.insitu_schema_file, '/etc/in_situ_schema.json')).start()
         LOGGER.debug(f'locally extracted stats: {stats_json}')
         FileUtils.del_file(local_parquet_file_path)
@@ -64,7 +69,7 @@ class ParquetFileEsIndexer:
         LOGGER.debug(f's3_stat: {s3_stat.to_json()}')
         parquet_stat = self.extract_stats_locally()
         LOGGER.debug(f'parquet_stat: {parquet_stat}')
-        self.__es.index_one({'s3_url': self.__s3_url, **s3_stat.to_json(), **parquet_stat}, s3_stat.s3_url)
+        self.__es.index_one({'s3_url': self.__s3_url, **s3_stat.to_json(), **parquet_stat, CDMSConstants.file_size_key: self.__file_size, CDMSConstants.indexed_at_key: time()}, s3_stat.s3_url)
         return
 
     def remove_file(self):
@@ -88,6 +93,7 @@ class ParquetFileEsIndexer:
         ignoring_phrases = ['spark-staging', '_temporary']
         for i in range(s3_records.size()):
             self.__s3_url = s3_records.get_s3_url(i)
+            self.__file_size = s3_records.get_object_size(i)
             if any([k in self.__s3_url for k in ignoring_phrases]):
                 LOGGER.debug(f'skipping temp file: {self.__s3_url}')
                 continue
@@ -185,3 +185,14 @@ class S3ToSqs(S3EventValidatorAbstract):
         if index >= len(self.__s3_record):
             raise ValueError(f'index: {index} is larger than s3_record array size: {len(self.__s3_record)}')
         return self.__s3_record[index]['eventName']
+
+    def get_object_size(self, index: int):
+        """
+        :param index:
+        :return: int | object size in bytes from the S3 event. None if the event does not have it (e.g. ObjectRemoved)
+        """
+        if self.__s3_record is None:
+            self.__is_valid()
+        if index >= len(self.__s3_record):
+            raise ValueError(f'index: {index} is larger than s3_record array size: {len(self.__s3_record)}')
+        return self.__s3_record[index]['s3']['object'].get('size', None)
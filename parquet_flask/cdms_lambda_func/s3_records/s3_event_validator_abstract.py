@@ -32,3 +32,7 @@ class S3EventValidatorAbstract(ABC):
     @abstractmethod
     def get_event_name(self, index: int):
         return
+
+    @abstractmethod
+    def get_object_size(self, index: int):
+        return
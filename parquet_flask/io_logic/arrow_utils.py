@@ -0,0 +1,65 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pyarrow as pa
+from pyarrow import fs
+
+from parquet_flask.aws.aws_cred import AwsCred
+
+
+class ArrowUtils:
+    S3_SCHEMES = ['s3a://', 's3://']
+    LOCAL_SCHEME = 'file://'
+
+    @staticmethod
+    def is_s3_path(file_path: str):
+        return any([file_path.startswith(k) for k in ArrowUtils.S3_SCHEMES])
+
+    @staticmethod
+    def get_file_system(file_path: str):
+        """
+        pyarrow file system for a spark style path. s3a:// and s3:// use S3 with the configured AWS credentials.
+        :param file_path:
+        :return: pyarrow.fs.FileSystem
+        """
+        if not ArrowUtils.is_s3_path(file_path):
+            return fs.LocalFileSystem()
+        aws_session = AwsCred().boto3_session
+        return fs.S3FileSystem(region=aws_session['region_name'],
+                               access_key=aws_session.get('aws_access_key_id', None),
+                               secret_key=aws_session.get('aws_secret_access_key', None),
+                               session_token=aws_session.get('aws_session_token', None))
+
+    @staticmethod
+    def strip_scheme(file_path: str):
+        for each in ArrowUtils.S3_SCHEMES + [ArrowUtils.LOCAL_SCHEME]:
+            if file_path.startswith(each):
+                return file_path[len(each):]
+        return file_path
+
+    @staticmethod
+    def to_dict_list(table: pa.Table):
+        """
+        same as `[k.asDict() for k in spark_df.collect()]`. map columns (platform) become dict instead of a list of tuples.
+        :param table:
+        :return: list
+        """
+        map_columns = [k.name for k in table.schema if pa.types.is_map(k.type)]
+        result = table.to_pylist()
+        for each_row in result:
+            for each_col in map_columns:
+                if each_row[each_col] is not None:
+                    each_row[each_col] = dict(each_row[each_col])
+        return result
@@ -32,10 +32,13 @@ class CDMSConstants:
     geo_spatial_interval_col = 'geo_spatial_interval'
 
     s3_url_key = 's3_url'
+    total_key = 'total'
     uuid_key = 'uuid'
     ingested_date_key = 'ingested_date'
     checksum_key = 'checksum'
     file_size_key = 'file_size'
+    observation_counts_key = 'observation_counts'
+    indexed_at_key = 'indexed_at'
     records_count_key = 'records_count'
     job_start_key = 'job_start_time'
     job_end_key = 'job_end_time'
@@ -50,6 +53,7 @@ class CDMSConstants:
 
     min_depth = 'min_depth'
     max_depth = 'max_depth'
+    has_missing_depth = 'has_missing_depth'
 
     max_datetime = 'max_datetime'
     min_datetime = 'min_datetime'
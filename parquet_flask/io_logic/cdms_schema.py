@@ -148,6 +148,17 @@ class CdmsSchema:
             StructField('month', IntegerType(), True),
             StructField('job_id', StringType(), True),
         ]
+        self.__partition_columns = [
+            StructField('time_obj', TimestampType(), True),
+
+            StructField('provider', StringType(), True),
+            StructField('project', StringType(), True),
+            StructField('platform_code', StringType(), True),
+            StructField('geo_spatial_interval', StringType(), True),
+            StructField('year', IntegerType(), True),
+            StructField('month', IntegerType(), True),
+            StructField('job_id', StringType(), True),
+        ]
         self.__non_observation_columns = [
             'time_obj',
             'time',
@@ -196,6 +207,39 @@ class CdmsSchema:
         dynamic_columns = [StructField(k, self.__get_spark_type(self.__get_json_datatype(k, v)), True) for k, v in self.__get_obs_defs(in_situ_schema).items()]
         return StructType(dynamic_columns + self.__default_columns)
 
+    def get_partitioned_schema_from_json(self, in_situ_schema: dict):
+        """
+        schema to read parquet directories with partition discovery (`basePath`).
+        partition values are taken from the paths as-is. platform_code can be alpha-numeric. e.g. 3B
+        :param in_situ_schema:
+        :return:
+        """
+        dynamic_columns = [StructField(k, self.__get_spark_type(self.__get_json_datatype(k, v)), True) for k, v in self.__get_obs_defs(in_situ_schema).items()]
+        return StructType(dynamic_columns + self.__partition_columns)
+
+    def get_arrow_schema_from_json(self, in_situ_schema: dict):
+        """
+        pyarrow equivalent of `get_partitioned_schema_from_json`.
+        spark writes `time_obj` as INT96 which is read as timestamp[ns] by pyarrow.
+        :param in_situ_schema:
+        :return: pyarrow.Schema
+        """
+        import pyarrow as pa
+        json_to_arrow_data_types = {
+            'number': pa.float64(),
+            'long': pa.int64(),
+            'string': pa.string(),
+            'platform': pa.map_(pa.string(), pa.string()),
+        }
+        spark_to_arrow_data_types = {
+            'timestamp': pa.timestamp('ns'),
+            'string': pa.string(),
+            'integer': pa.int32(),
+        }
+        dynamic_columns = [pa.field(k, json_to_arrow_data_types[self.__get_json_datatype(k, v)], True) for k, v in self.__get_obs_defs(in_situ_schema).items()]
+        partition_columns = [pa.field(k.name, spark_to_arrow_data_types[k.dataType.typeName()], True) for k in self.__partition_columns]
+        return pa.schema(dynamic_columns + partition_columns)
+
     def get_pandas_schema_from_json(self, in_situ_schema: dict):
         dynamic_columns = {k: self.__get_pandas_type(self.__get_json_datatype(k, v)) for k, v in self.__get_obs_defs(in_situ_schema).items()}
         return dynamic_columns
@@ -0,0 +1,167 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.time_utils import TimeUtils
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CountPlanner:
+    """
+    splits the parquet files from ES into
+    - contained: every row of the file matches the query. its `total` from parquet_stats is used as it is.
+    - partial: some rows of the file may match the query. they need to be scanned.
+
+    a file is contained only if its min / max bounds are inside the query window for time, bbox, and depth,
+    and at least one of the queried variables is non-null in all of its rows (observation_counts == total).
+    """
+    EXACT = 'EXACT'
+    ESTIMATE = 'ESTIMATE'
+
+    def __init__(self, props: QueryProps):
+        self.__props = props
+        self.__contained_total = 0
+        self.__partial_parquet_names = []
+        self.__is_plannable = True
+
+    @property
+    def contained_total(self):
+        return self.__contained_total
+
+    @property
+    def partial_parquet_names(self):
+        return self.__partial_parquet_names
+
+    @property
+    def is_plannable(self):
+        """
+        False if some files from ES are missing s3_url or total. the count needs to be done by scanning everything.
+        :return:
+        """
+        return self.__is_plannable
+
+    def __is_time_contained(self, file_stats: dict):
+        if self.__props.min_datetime is not None:
+            if file_stats[CDMSConstants.min_datetime] < TimeUtils.get_datetime_obj(self.__props.min_datetime).timestamp():
+                return False
+        if self.__props.max_datetime is not None:
+            if file_stats[CDMSConstants.max_datetime] > TimeUtils.get_datetime_obj(self.__props.max_datetime).timestamp():
+                return False
+        return True
+
+    def __is_bbox_contained(self, file_stats: dict):
+        if self.__props.min_lat_lon is not None:
+            if file_stats[CDMSConstants.min_lat] < self.__props.min_lat_lon[0] or file_stats[CDMSConstants.min_lon] < self.__props.min_lat_lon[1]:
+                return False
+        if self.__props.max_lat_lon is not None:
+            if file_stats[CDMSConstants.max_lat] > self.__props.max_lat_lon[0] or file_stats[CDMSConstants.max_lon] > self.__props.max_lat_lon[1]:
+                return False
+        return True
+
+    def __is_depth_contained(self, file_stats: dict):
+        """
+        min_depth in parquet_stats excludes the missing depth value. max_depth is never affected by it as it is a large negative number.
+        the missing depth rows match only if `include_subsurface` (same as ParquetQueryConditionManagementV4.__check_depth).
+        when they are not included, the file is contained only if parquet_stats says it has no missing depth rows.
+        :param file_stats:
+        :return:
+        """
+        if self.__props.min_depth is None and self.__props.max_depth is None:
+            return True
+        include_subsurface = None
+        if self.__props.min_depth is not None:
+            if file_stats[CDMSConstants.min_depth] is None or file_stats[CDMSConstants.min_depth] < self.__props.min_depth:
+                return False
+            include_subsurface = True if self.__props.min_depth <= 0 else False
+        if self.__props.max_depth is not None:
+            if file_stats[CDMSConstants.max_depth] is None or file_stats[CDMSConstants.max_depth] > self.__props.max_depth:
+                return False
+            if include_subsurface is None or include_subsurface is True:
+                include_subsurface = True if self.__props.max_depth >= 0 else False
+        return include_subsurface is True or file_stats.get(CDMSConstants.has_missing_depth, True) is False
+
+    def __is_variables_contained(self, file_stats: dict):
+        if len(self.__props.variable) < 1:
+            return True
+        observation_counts = file_stats.get(CDMSConstants.observation_counts_key, {})
+        return any([observation_counts.get(k, -1) == file_stats[CDMSConstants.total_key] for k in self.__props.variable])
+
+    def is_contained(self, file_stats: dict) -> bool:
+        try:
+            return self.__is_time_contained(file_stats) and \
+                   self.__is_bbox_contained(file_stats) and \
+                   self.__is_depth_contained(file_stats) and \
+                   self.__is_variables_contained(file_stats)
+        except KeyError as key_error:
+            LOGGER.debug(f'missing stats in {file_stats}. treating it as partial. {str(key_error)}')
+            return False
+
+    def plan(self, parquet_names: [PartitionedParquetPath]):
+        self.__contained_total = 0
+        self.__partial_parquet_names = []
+        self.__is_plannable = True
+        distinct_s3_urls = set([])
+        for each in parquet_names:
+            each: PartitionedParquetPath = each
+            if each.s3_url is None or each.total is None:
+                LOGGER.debug(f'missing s3_url or total in ES result. cannot plan the count: {each.file_stats}')
+                self.__is_plannable = False
+                return self
+            if each.s3_url in distinct_s3_urls:
+                continue
+            distinct_s3_urls.add(each.s3_url)
+            if self.is_contained(each.file_stats):
+                self.__contained_total += each.total
+            else:
+                self.__partial_parquet_names.append(each)
+        LOGGER.debug(f'contained total: {self.__contained_total}. partial files: {len(self.__partial_parquet_names)} out of {len(distinct_s3_urls)}')
+        return self
+
+    @staticmethod
+    def __get_overlap_ratio(file_min, file_max, query_min, query_max):
+        if file_min is None or file_max is None:
+            return 1.0
+        overlap_min = file_min if query_min is None else max(file_min, query_min)
+        overlap_max = file_max if query_max is None else min(file_max, query_max)
+        if overlap_max < overlap_min:
+            return 0.0
+        if file_max <= file_min:
+            return 1.0
+        return (overlap_max - overlap_min) / (file_max - file_min)
+
+    def estimate_partial_total(self) -> int:
+        """
+        assumes the rows of each partial file are spread evenly inside its min / max bounds.
+        depth and variables are not taken into account.
+        :return:
+        """
+        query_min_time = None if self.__props.min_datetime is None else TimeUtils.get_datetime_obj(self.__props.min_datetime).timestamp()
+        query_max_time = None if self.__props.max_datetime is None else TimeUtils.get_datetime_obj(self.__props.max_datetime).timestamp()
+        query_min_lat_lon = [None, None] if self.__props.min_lat_lon is None else self.__props.min_lat_lon
+        query_max_lat_lon = [None, None] if self.__props.max_lat_lon is None else self.__props.max_lat_lon
+        estimated_total = 0.0
+        for each in self.__partial_parquet_names:
+            each: PartitionedParquetPath = each
+            file_stats = each.file_stats
+            ratio = self.__get_overlap_ratio(file_stats.get(CDMSConstants.min_datetime), file_stats.get(CDMSConstants.max_datetime), query_min_time, query_max_time)
+            ratio *= self.__get_overlap_ratio(file_stats.get(CDMSConstants.min_lat), file_stats.get(CDMSConstants.max_lat), query_min_lat_lon[0], query_max_lat_lon[0])
+            ratio *= self.__get_overlap_ratio(file_stats.get(CDMSConstants.min_lon), file_stats.get(CDMSConstants.max_lon), query_min_lat_lon[1], query_max_lat_lon[1])
+            estimated_total += each.total * ratio
+        return int(round(estimated_total))
@@ -0,0 +1,125 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+import threading
+
+from parquet_flask.io_logic.cdms_schema import CdmsSchema
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.file_utils import FileUtils
+from parquet_flask.utils.general_utils import GeneralUtils
+from parquet_flask.utils.singleton import Singleton
+
+LOGGER = logging.getLogger(__name__)
+
+
+class InSituSchemaRegistry(metaclass=Singleton):
+    """
+    in_situ_schema json files are parsed once per process and parsed again only when their mtime changes.
+    structs / schemas derived from them are memoized per loaded version.
+    the returned objects are shared. callers must not modify them.
+
+    every method takes an optional schema path. `in_situ_schema` from Config is used when it is None.
+    """
+    SPARK_STRUCT = 'SPARK_STRUCT'
+    PARTITIONED_SPARK_STRUCT = 'PARTITIONED_SPARK_STRUCT'
+    ARROW_SCHEMA = 'ARROW_SCHEMA'
+    OBSERVATION_NAMES = 'OBSERVATION_NAMES'
+    OBSERVATION_PROPERTIES = 'OBSERVATION_PROPERTIES'
+    VALIDATOR = 'VALIDATOR'
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__loaded_schemas = {}
+
+    def __get_loaded_schema(self, schema_path: str = None) -> dict:
+        schema_path = Config().get_value(Config.in_situ_schema) if schema_path is None else schema_path
+        schema_mtime = os.stat(schema_path).st_mtime_ns
+        loaded_schema = self.__loaded_schemas.get(schema_path, None)
+        if loaded_schema is not None and loaded_schema['mtime'] == schema_mtime:
+            return loaded_schema
+        with self.__lock:
+            loaded_schema = self.__loaded_schemas.get(schema_path, None)
+            if loaded_schema is not None and loaded_schema['mtime'] == schema_mtime:
+                return loaded_schema
+            LOGGER.debug(f'loading in_situ_schema: {schema_path}. mtime: {schema_mtime}')
+            loaded_schema = {
+                'mtime': schema_mtime,
+                'schema': FileUtils.read_json(schema_path),
+                'derived': {},
+            }
+            self.__loaded_schemas[schema_path] = loaded_schema
+        return loaded_schema
+
+    def __get_derived(self, derived_key: str, schema_path: str = None):
+        loaded_schema = self.__get_loaded_schema(schema_path)
+        derived_val = loaded_schema['derived'].get(derived_key, None)
+        if derived_val is not None:
+            return derived_val
+        if loaded_schema['schema'] is None:
+            raise ValueError(f'in_situ_schema is not a valid json: {schema_path}')
+        with self.__lock:
+            if derived_key not in loaded_schema['derived']:
+                loaded_schema['derived'][derived_key] = self.__derive(derived_key, loaded_schema['schema'])
+            return loaded_schema['derived'][derived_key]
+
+    def __derive(self, derived_key: str, in_situ_schema: dict):
+        if derived_key == InSituSchemaRegistry.SPARK_STRUCT:
+            return CdmsSchema().get_schema_from_json(in_situ_schema)
+        if derived_key == InSituSchemaRegistry.PARTITIONED_SPARK_STRUCT:
+            return CdmsSchema().get_partitioned_schema_from_json(in_situ_schema)
+        if derived_key == InSituSchemaRegistry.ARROW_SCHEMA:
+            return CdmsSchema().get_arrow_schema_from_json(in_situ_schema)
+        if derived_key == InSituSchemaRegistry.OBSERVATION_NAMES:
+            return CdmsSchema().get_observation_names(in_situ_schema)
+        if derived_key == InSituSchemaRegistry.OBSERVATION_PROPERTIES:
+            return {k: v for k, v in in_situ_schema['definitions']['observation']['properties'].items()}
+        if derived_key == InSituSchemaRegistry.VALIDATOR:
+            return GeneralUtils.get_json_validator(in_situ_schema)
+        raise ValueError(f'unknown derived key: {derived_key}')
+
+    def get_schema(self, schema_path: str = None) -> dict:
+        """
+        :param schema_path:
+        :return: dict | parsed json. None if it is not a valid json
+        """
+        return self.__get_loaded_schema(schema_path)['schema']
+
+    def get_spark_struct(self, schema_path: str = None):
+        return self.__get_derived(InSituSchemaRegistry.SPARK_STRUCT, schema_path)
+
+    def get_partitioned_spark_struct(self, schema_path: str = None):
+        return self.__get_derived(InSituSchemaRegistry.PARTITIONED_SPARK_STRUCT, schema_path)
+
+    def get_arrow_schema(self, schema_path: str = None):
+        return self.__get_derived(InSituSchemaRegistry.ARROW_SCHEMA, schema_path)
+
+    def get_observation_names(self, schema_path: str = None):
+        return self.__get_derived(InSituSchemaRegistry.OBSERVATION_NAMES, schema_path)
+
+    def get_observation_properties(self, schema_path: str = None):
+        """
+        :param schema_path:
+        :return: dict | definitions.observation.properties of the schema
+        """
+        return self.__get_derived(InSituSchemaRegistry.OBSERVATION_PROPERTIES, schema_path)
+
+    def get_validator(self, schema_path: str = None):
+        """
+        :param schema_path:
+        :return: compiled fastjsonschema validator of the whole schema
+        """
+        return self.__get_derived(InSituSchemaRegistry.VALIDATOR, schema_path)
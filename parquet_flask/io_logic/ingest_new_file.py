@@ -24,6 +24,7 @@ from pyspark.sql.dataframe import DataFrame
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
 from parquet_flask.io_logic.cdms_schema import CdmsSchema
 from parquet_flask.io_logic.retrieve_spark_session import RetrieveSparkSession
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
 from parquet_flask.io_logic.sanitize_record import SanitizeRecord
 from parquet_flask.utils.config import Config
 from parquet_flask.utils.file_utils import FileUtils
@@ -150,14 +151,14 @@ class IngestNewJsonFile:
                 each_record['wind_from_direction'] = float(each_record['wind_from_direction'])
             if 'wind_to_direction' in each_record:
                 each_record['wind_to_direction'] = float(each_record['wind_from_direction'])
-        df_writer = self.create_df(
-            self.__sss.retrieve_spark_session(
-                self.__app_name,
-                self.__master_spark),
-            input_json[CDMSConstants.observations_key],
-            job_id,
-            input_json[CDMSConstants.provider_col],
-            input_json[CDMSConstants.project_col])
-        df_writer.mode(self.__mode).parquet(self.__parquet_name, compression='GZIP')  # snappy GZIP
+        spark_session = self.__sss.retrieve_spark_session(self.__app_name, self.__master_spark)
+        with SparkJobScope(spark_session, SparkJobScope.INGEST_POOL, f'ingest job: {job_id}'):
+            df_writer = self.create_df(
+                spark_session,
+                input_json[CDMSConstants.observations_key],
+                job_id,
+                input_json[CDMSConstants.provider_col],
+                input_json[CDMSConstants.project_col])
+            df_writer.mode(self.__mode).parquet(self.__parquet_name, compression='GZIP')  # snappy GZIP
         LOGGER.debug(f'finished writing parquet')
         return len(input_json[CDMSConstants.observations_key])
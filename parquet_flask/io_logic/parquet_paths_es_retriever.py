@@ -20,7 +20,9 @@ from parquet_flask.aws.es_factory import ESFactory
 
 from parquet_flask.aws.es_abstract import ESAbstract
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.parquet_stats_catalog import ParquetStatsCatalog
 from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_timer import QueryTimer
 from parquet_flask.io_logic.query_v2 import QueryProps
 from parquet_flask.utils.time_utils import TimeUtils
 
@@ -28,9 +30,11 @@ LOGGER = logging.getLogger(__name__)
 
 
 class ParquetPathsEsRetriever:
-    def __init__(self, base_path: str, props=QueryProps()):
+    def __init__(self, base_path: str, props=QueryProps(), missing_depth_value=CDMSConstants.missing_depth_value, query_timer: QueryTimer = None):
         self.__base_path = base_path
         self.__props = props
+        self.__missing_depth_value = missing_depth_value
+        self.__query_timer = QueryTimer() if query_timer is None else query_timer
         self.__es: ESAbstract = None
 
     def load_es_obj(self, es: ESAbstract):
@@ -41,45 +45,121 @@ class ParquetPathsEsRetriever:
         self.__es: ESAbstract = ESFactory().get_instance('AWS', index=es_index, base_url=es_url, port=es_port)
         return self
 
+    def __is_missing_depth_matched(self):
+        """
+        same include_subsurface rule as ParquetQueryConditionManagementV4.__check_depth.
+        the missing depth value also matches if it is inside the depth range itself. (e.g. only max_depth < 0)
+        :return: bool
+        """
+        include_subsurface = None
+        if self.__props.min_depth is not None:
+            include_subsurface = True if self.__props.min_depth <= 0 else False
+        if self.__props.max_depth is not None:
+            if include_subsurface is None or include_subsurface is True:
+                include_subsurface = True if self.__props.max_depth >= 0 else False
+        if include_subsurface is True:
+            return True
+        return (self.__props.min_depth is None or self.__props.min_depth <= self.__missing_depth_value) and \
+               (self.__props.max_depth is None or self.__props.max_depth >= self.__missing_depth_value)
+
+    def __get_depth_term(self):
+        """
+        `min_depth` in parquet_stats excludes the missing depth value. so a file matches if
+        - its depth range overlaps the query, or
+        - it has missing depth rows and they match the query.
+        files without `has_missing_depth` (stats from before it was added) are kept whenever the missing depth rows can match.
+        :return: dict | ES bool query or None if there is no depth range
+        """
+        if self.__props.min_depth is None and self.__props.max_depth is None:
+            return None
+        depth_range_terms = []
+        if self.__props.min_depth is not None:
+            depth_range_terms.append({'range': {CDMSConstants.max_depth: {'gte': self.__props.min_depth}}})
+        if self.__props.max_depth is not None:
+            depth_range_terms.append({'range': {CDMSConstants.min_depth: {'lte': self.__props.max_depth}}})
+        depth_terms = [{'bool': {'must': depth_range_terms}}]
+        if self.__is_missing_depth_matched():
+            depth_terms.append({'term': {CDMSConstants.has_missing_depth: True}})
+            depth_terms.append({'bool': {'must_not': [{'exists': {'field': CDMSConstants.has_missing_depth}}]}})
+        return {
+            'bool': {
+                'should': depth_terms,
+                'minimum_should_match': 1,
+            }
+        }
+
+    def __get_variables_term(self):
+        """
+        drops the files where every requested variable has no observation. (same as the row level `IS NOT NULL` filters OR'ed together)
+        files without `observation_counts.<variable>` (stats from an older schema) are kept as their counts are unknown.
+        :return: dict | ES bool query or None if there is no variable
+        """
+        if len(self.__props.variable) < 1:
+            return None
+        variables_terms = []
+        for each in self.__props.variable:
+            count_field = f'{CDMSConstants.observation_counts_key}.{each}'
+            variables_terms.append({'range': {count_field: {'gt': 0}}})
+            variables_terms.append({'bool': {'must_not': [{'exists': {'field': count_field}}]}})
+        return {
+            'bool': {
+                'should': variables_terms,
+                'minimum_should_match': 1,
+            }
+        }
+
     def __step_1(self, es_results: [PartitionedParquetPath]):
-        base_map = defaultdict(list)
+        """
+        collapses the partition paths of the files into their parent when every existing child partition is selected,
+        so that spark lists one directory instead of many tiny ones. (conditions are still applied to each row)
+        - year: every month under platform_code / geo_spatial_interval / year
+        - geo_spatial_interval: every year under it is collapsed
+        - platform_code: every geo_spatial_interval under it is collapsed
+        existing partitions are known from ParquetStatsCatalog. without it, a year is collapsed only if all 12 months are selected.
+        only `generate_path` is changed. the file level details of each result stay the same.
+        :param es_results:
+        :return: list of PartitionedParquetPath in the same order
+        """
+        selected_months = defaultdict(set)
+        for each in es_results:
+            each: PartitionedParquetPath = each
+            if any([k is None for k in [each.provider, each.project, each.platform, each.lat_lon, each.year, each.month]]):
+                continue
+            selected_months[(each.provider, each.project, each.platform, str(each.lat_lon), str(each.year))].add(str(each.month))
+        collapsed_paths = set([])
+        platform_keys = set([k[:3] for k in selected_months.keys()])
+        for platform_key in platform_keys:
+            child_partitions = ParquetStatsCatalog().get_child_partitions(*platform_key)
+            if child_partitions is None:
+                collapsed_paths.update([k for k, v in selected_months.items() if k[:3] == platform_key and len(v) >= 12])
+                continue
+            collapsed_paths.update([k for k, v in selected_months.items() if k[:3] == platform_key and v.issuperset(child_partitions[k[3:]])])
+            for each_interval in child_partitions[()]:
+                if all([(*platform_key, each_interval, k) in collapsed_paths for k in child_partitions[(each_interval,)]]):
+                    collapsed_paths.add((*platform_key, each_interval))
+            if all([(*platform_key, k) in collapsed_paths for k in child_partitions[()]]):
+                collapsed_paths.add(platform_key)
+        if len(collapsed_paths) < 1:
+            return es_results
+        result = []
         for each in es_results:
             each: PartitionedParquetPath = each
-            base_key = f'{each.provider}_{each.project}_{each.platform}_{each.lat_lon}'
-            base_map[base_key].append(each)
-        raise NotImplementedError(f'this will be an enhancement to reduce lots of tiny paths')
+            path_key = (each.provider, each.project, each.platform, str(each.lat_lon), str(each.year))
+            if path_key[:3] in collapsed_paths:
+                each = each.duplicate().set_lat_lon(None).set_year(None).set_month(None)
+            elif path_key[:4] in collapsed_paths:
+                each = each.duplicate().set_year(None).set_month(None)
+            elif path_key in collapsed_paths:
+                each = each.duplicate().set_month(None)
+            result.append(each)
+        LOGGER.debug(f'collapsed partition paths: {len(collapsed_paths)}')
+        return result
 
-    def start(self):
+    def get_es_dsl(self) -> dict:
         """
-{
-  "_index": "parquet_stats_v1",
-  "_type": "_doc",
-  "_id": "part-00000-9cfcbe81-3ca9-4084-9b8c-db451bd8c076.c000.gz.parquet",
-  "_score": 1,
-  "_source": {
-    "s3_url": "s3://cdms-dev-in-situ-parquet/CDMS_insitu.geo2.parquet/provider=Florida State University, COAPS/project=SAMOS/platform_code=30/geo_spatial_interval=-25_150/year=2017/month=6/job_id=6f33d0e5-65ca-4281-b4df-2d703adee683/part-00000-9cfcbe81-3ca9-4084-9b8c-db451bd8c076.c000.gz.parquet",
-    "bucket": "cdms-dev-in-situ-parquet",
-    "name": "part-00000-9cfcbe81-3ca9-4084-9b8c-db451bd8c076.c000.gz.parquet",
-    "provider": "Florida State University, COAPS",
-    "project": "SAMOS",
-    "platform_code": "30",
-    "geo_spatial_interval": "-25_150",
-    "year": "2017",
-    "month": "6",
-    "total": 8532,
-    "min_datetime": 1497312000,
-    "max_datetime": 1497398340,
-    "min_depth": -31.5,
-    "max_depth": 5.9,
-    "min_lat": -23.8257,
-    "max_lat": -23.6201,
-    "min_lon": 154.4868,
-    "max_lon": 154.6771
-  }
-}        :return:
+        ES query of the parquet_stats documents of the files which can have matching rows
+        :return: dict
         """
-        if self.__es is None:
-            raise ValueError(f'ES Object is not loaded')
         es_terms = []
         if self.__props.provider is not None:
             es_terms.append({'term': {CDMSConstants.provider_col: self.__props.provider}})
@@ -106,8 +186,14 @@ class ParquetPathsEsRetriever:
         if self.__props.max_lat_lon is not None:
             es_terms.append({'range': {'min_lat': {'lte': self.__props.max_lat_lon[0]}}})
             es_terms.append({'range': {'min_lon': {'lte': self.__props.max_lat_lon[1]}}})
+        depth_term = self.__get_depth_term()
+        if depth_term is not None:
+            es_terms.append(depth_term)
+        variables_term = self.__get_variables_term()
+        if variables_term is not None:
+            es_terms.append(variables_term)
 
-        es_dsl = {
+        return {
             'query': {
                 'bool': {
                     'must': es_terms
@@ -121,9 +207,55 @@ class ParquetPathsEsRetriever:
                 {'s3_url': {'order': 'asc'}},
             ]
         }
+
+    def start(self):
+        """
+{
+  "_index": "parquet_stats_v1",
+  "_type": "_doc",
+  "_id": "part-00000-9cfcbe81-3ca9-4084-9b8c-db451bd8c076.c000.gz.parquet",
+  "_score": 1,
+  "_source": {
+    "s3_url": "s3://cdms-dev-in-situ-parquet/CDMS_insitu.geo2.parquet/provider=Florida State University, COAPS/project=SAMOS/platform_code=30/geo_spatial_interval=-25_150/year=2017/month=6/job_id=6f33d0e5-65ca-4281-b4df-2d703adee683/part-00000-9cfcbe81-3ca9-4084-9b8c-db451bd8c076.c000.gz.parquet",
+    "bucket": "cdms-dev-in-situ-parquet",
+    "name": "part-00000-9cfcbe81-3ca9-4084-9b8c-db451bd8c076.c000.gz.parquet",
+    "provider": "Florida State University, COAPS",
+    "project": "SAMOS",
+    "platform_code": "30",
+    "geo_spatial_interval": "-25_150",
+    "year": "2017",
+    "month": "6",
+    "total": 8532,
+    "min_datetime": 1497312000,
+    "max_datetime": 1497398340,
+    "min_depth": -31.5,
+    "max_depth": 5.9,
+    "has_missing_depth": false,
+    "min_lat": -23.8257,
+    "max_lat": -23.6201,
+    "min_lon": 154.4868,
+    "max_lon": 154.6771
+  }
+}        :return:
+        """
+        parquet_stats_catalog = ParquetStatsCatalog()
+        if parquet_stats_catalog.is_ready:
+            with self.__query_timer.stage(QueryTimer.CATALOG_SEARCH):
+                result = parquet_stats_catalog.search(self.__props, self.__is_missing_depth_matched())
+            LOGGER.debug(f'found {len(result)} files in parquet_stats catalog')
+            self.__query_timer.set_counter(QueryTimer.ES_DOCUMENTS, len(result))
+            with self.__query_timer.stage(QueryTimer.PATH_COLLAPSE):
+                return self.__step_1([PartitionedParquetPath(self.__base_path).load_from_es(k) for k in result])
+        if self.__es is None:
+            raise ValueError(f'ES Object is not loaded')
+        es_dsl = self.get_es_dsl()
         import json
         LOGGER.warning(f'es_dsl: {json.dumps(es_dsl)}')
         #         self.__sorting_columns = [CDMSConstants.time_col, CDMSConstants.platform_code_col, CDMSConstants.depth_col, CDMSConstants.lat_col, CDMSConstants.lon_col]
-        result = self.__es.query_pages(es_dsl)
-        result = [PartitionedParquetPath(self.__base_path).load_from_es(k['_source']) for k in result['items']]
-        return result
+        with self.__query_timer.stage(QueryTimer.ES_QUERY):
+            result = self.__es.query_pages(es_dsl)
+        self.__query_timer.set_counter(QueryTimer.ES_PAGES, result.get('pages', None))
+        self.__query_timer.set_counter(QueryTimer.ES_DOCUMENTS, len(result['items']))
+        with self.__query_timer.stage(QueryTimer.PATH_COLLAPSE):
+            result = [PartitionedParquetPath(self.__base_path).load_from_es(k['_source']) for k in result['items']]
+            return self.__step_1(result)
@@ -18,20 +18,25 @@ import logging
 from parquet_flask.io_logic.parquet_paths_es_retriever import ParquetPathsEsRetriever
 from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.query_predicate import QueryPredicate
+from parquet_flask.io_logic.query_timer import QueryTimer
 from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.time_utils import TimeUtils
 
 LOGGER = logging.getLogger(__name__)
 
 
 class ParquetQueryConditionManagementV4:
-    def __init__(self, parquet_name: str, missing_depth_value, es_config: dict, props=QueryProps()):
+    def __init__(self, parquet_name: str, missing_depth_value, es_config: dict, props=QueryProps(), query_timer: QueryTimer = None):
         self.__conditions = []
         self.__parquet_name = parquet_name if not parquet_name.endswith('/') else parquet_name[:-1]
-        self.__columns = [CDMSConstants.time_col, CDMSConstants.depth_col, CDMSConstants.lat_col, CDMSConstants.lon_col]
+        self.__columns = [CDMSConstants.time_col, CDMSConstants.platform_code_col, CDMSConstants.depth_col, CDMSConstants.lat_col, CDMSConstants.lon_col]
         self.__query_props = props
         self.__missing_depth_value = missing_depth_value
         self.__parquet_names: [PartitionedParquetPath] = []
         self.__es_config = es_config
+        self.__es_dsl = None
+        self.__query_timer = QueryTimer() if query_timer is None else query_timer
 
     def stringify_parquet_names(self):
         return [k.generate_path() for k in self.__parquet_names]
@@ -51,6 +56,9 @@ class ParquetQueryConditionManagementV4:
 
     @property
     def conditions(self):
+        """
+        :return: list of QueryPredicate which are combined with AND
+        """
         return self.__conditions
 
     @conditions.setter
@@ -62,6 +70,29 @@ class ParquetQueryConditionManagementV4:
         self.__conditions = val
         return
 
+    @property
+    def predicate(self):
+        """
+        :return: QueryPredicate | all conditions combined with AND. None if there is no condition
+        """
+        if len(self.__conditions) < 1:
+            return None
+        return QueryPredicate.all_of(self.__conditions)
+
+    @property
+    def query_timer(self):
+        """
+        :return: QueryTimer | stages of this query. query engines add theirs to it
+        """
+        return self.__query_timer
+
+    @property
+    def es_dsl(self):
+        """
+        :return: dict | ES query of the parquet_stats documents from `manage_query_props`. it is not sent when ParquetStatsCatalog is ready
+        """
+        return self.__es_dsl
+
     @property
     def parquet_name(self):
         return self.__parquet_name
@@ -115,24 +146,23 @@ class ParquetQueryConditionManagementV4:
     def __check_time_range(self):
         if self.__query_props.min_datetime is None and self.__query_props.max_datetime is None:
             return None
-        min_time = max_time = None
         if self.__query_props.min_datetime is not None:
-            LOGGER.debug(f'setting datetime min condition as sql: {self.__query_props.min_datetime}')
-            self.__conditions.append(f"{CDMSConstants.time_obj_col} >= '{self.__query_props.min_datetime}'")
+            LOGGER.debug(f'setting datetime min condition: {self.__query_props.min_datetime}')
+            self.__conditions.append(QueryPredicate.compare(CDMSConstants.time_obj_col, '>=', TimeUtils.get_datetime_obj(self.__query_props.min_datetime)))
         if self.__query_props.max_datetime is not None:
-            LOGGER.debug(f'setting datetime max condition as sql: {self.__query_props.max_datetime}')
-            self.__conditions.append(f"{CDMSConstants.time_obj_col} <= '{self.__query_props.max_datetime}'")
+            LOGGER.debug(f'setting datetime max condition: {self.__query_props.max_datetime}')
+            self.__conditions.append(QueryPredicate.compare(CDMSConstants.time_obj_col, '<=', TimeUtils.get_datetime_obj(self.__query_props.max_datetime)))
         return
 
     def __check_bbox(self):
         if self.__query_props.min_lat_lon is not None:
-            LOGGER.debug(f'setting Lat-Lon min condition as sql: {self.__query_props.min_lat_lon}')
-            self.__conditions.append(f"{CDMSConstants.lat_col} >= {self.__query_props.min_lat_lon[0]}")
-            self.__conditions.append(f"{CDMSConstants.lon_col} >= {self.__query_props.min_lat_lon[1]}")
+            LOGGER.debug(f'setting Lat-Lon min condition: {self.__query_props.min_lat_lon}')
+            self.__conditions.append(QueryPredicate.compare(CDMSConstants.lat_col, '>=', float(self.__query_props.min_lat_lon[0])))
+            self.__conditions.append(QueryPredicate.compare(CDMSConstants.lon_col, '>=', float(self.__query_props.min_lat_lon[1])))
         if self.__query_props.max_lat_lon is not None:
-            LOGGER.debug(f'setting Lat-Lon max condition as sql: {self.__query_props.max_lat_lon}')
-            self.__conditions.append(f"{CDMSConstants.lat_col} <= {self.__query_props.max_lat_lon[0]}")
-            self.__conditions.append(f"{CDMSConstants.lon_col} <= {self.__query_props.max_lat_lon[1]}")
+            LOGGER.debug(f'setting Lat-Lon max condition: {self.__query_props.max_lat_lon}')
+            self.__conditions.append(QueryPredicate.compare(CDMSConstants.lat_col, '<=', float(self.__query_props.max_lat_lon[0])))
+            self.__conditions.append(QueryPredicate.compare(CDMSConstants.lon_col, '<=', float(self.__query_props.max_lat_lon[1])))
         return
 
     def __check_depth(self):
@@ -142,16 +172,16 @@ class ParquetQueryConditionManagementV4:
         include_subsurface = None
         if self.__query_props.min_depth is not None:
             LOGGER.debug(f'setting depth min condition: {self.__query_props.min_depth}')
-            depth_conditions.append(f"{CDMSConstants.depth_col} >= {self.__query_props.min_depth}")
+            depth_conditions.append(QueryPredicate.compare(CDMSConstants.depth_col, '>=', float(self.__query_props.min_depth)))
             include_subsurface = True if self.__query_props.min_depth <= 0 else False
         if self.__query_props.max_depth is not None:
             LOGGER.debug(f'setting depth max condition: {self.__query_props.max_depth}')
-            depth_conditions.append(f"{CDMSConstants.depth_col} <= {self.__query_props.max_depth}")
+            depth_conditions.append(QueryPredicate.compare(CDMSConstants.depth_col, '<=', float(self.__query_props.max_depth)))
             if include_subsurface is None or include_subsurface is True:
                 include_subsurface = True if self.__query_props.max_depth >= 0 else False
-        append_conditions = f"({' AND '.join(depth_conditions) })"
+        append_conditions = QueryPredicate.all_of(depth_conditions)
         if include_subsurface is True:
-            append_conditions = f"( {append_conditions} OR {CDMSConstants.depth_col} == {self.__missing_depth_value} )"
+            append_conditions = QueryPredicate.any_of([append_conditions, QueryPredicate.compare(CDMSConstants.depth_col, '=', float(self.__missing_depth_value))])
         self.__conditions.append(append_conditions)
         return
 
@@ -161,8 +191,39 @@ class ParquetQueryConditionManagementV4:
         variables_filter = []
         for each in self.__query_props.variable:
             LOGGER.debug(f'setting not null variable: {each}')
-            variables_filter.append(f"{each} IS NOT NULL")
-        self.__conditions.append(f"({' OR '.join(variables_filter)})")
+            variables_filter.append(QueryPredicate.is_not_null(each))
+        self.__conditions.append(QueryPredicate.any_of(variables_filter))
+        return
+
+    def __check_marker(self):
+        """
+        keyset (seek) pagination.
+        rows are sorted by (time, platform_code, depth, latitude, longitude).
+        the next page is every row whose sort key is lexicographically greater than the sort key of the last row of the previous page.
+
+        (time > t) OR (time = t AND ((platform_code > p) OR (platform_code = p AND (...))))
+        :return:
+        """
+        if not self.__query_props.has_marker():
+            return
+        if self.__query_props.min_datetime is None or self.__query_props.marker_depth is None or self.__query_props.marker_lat_lon is None:
+            raise ValueError(f'incomplete page marker. time, platform, depth, latitude, and longitude are required')
+        marker_key = [
+            (CDMSConstants.time_col, self.__query_props.min_datetime),
+            (CDMSConstants.platform_code_col, self.__query_props.marker_platform_code),
+            (CDMSConstants.depth_col, float(self.__query_props.marker_depth)),
+            (CDMSConstants.lat_col, float(self.__query_props.marker_lat_lon[0])),
+            (CDMSConstants.lon_col, float(self.__query_props.marker_lat_lon[1])),
+        ]
+        LOGGER.debug(f'setting keyset marker condition: {marker_key}')
+        col_name, marker_val = marker_key[-1]
+        keyset_condition = QueryPredicate.compare(col_name, '>', marker_val)
+        for col_name, marker_val in reversed(marker_key[:-1]):
+            keyset_condition = QueryPredicate.any_of([
+                QueryPredicate.compare(col_name, '>', marker_val),
+                QueryPredicate.all_of([QueryPredicate.compare(col_name, '=', marker_val), keyset_condition]),
+            ])
+        self.__conditions.append(keyset_condition)
         return
 
     def __check_columns(self):
@@ -183,7 +244,9 @@ class ParquetQueryConditionManagementV4:
         self.__check_time_range()
         self.__check_depth()
         self.__add_variables_filter()
+        self.__check_marker()
         self.__check_columns()
-        es_retriever = ParquetPathsEsRetriever(self.__parquet_name, self.__query_props).load_es_from_config(self.__es_config['es_url'], self.__es_config['es_index'], self.__es_config.get('es_port', 443))
+        es_retriever = ParquetPathsEsRetriever(self.__parquet_name, self.__query_props, self.__missing_depth_value, self.__query_timer).load_es_from_config(self.__es_config['es_url'], self.__es_config['es_index'], self.__es_config.get('es_port', 443))
+        self.__es_dsl = es_retriever.get_es_dsl()
         self.__parquet_names = es_retriever.start()
         return
@@ -0,0 +1,337 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import math
+import threading
+from collections import defaultdict
+from time import sleep, time
+
+from parquet_flask.aws.es_abstract import ESAbstract
+from parquet_flask.aws.es_factory import ESFactory
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.query_result_cache import QueryResultCache
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.interval_index import IntervalIndex
+from parquet_flask.utils.packed_r_tree import PackedRTree
+from parquet_flask.utils.singleton import Singleton
+from parquet_flask.utils.time_utils import TimeUtils
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CatalogPartition:
+    """
+    parquet_stats documents of a single provider / project / platform_code.
+    documents missing a time or bbox bound cannot be indexed. they are checked one by one.
+    """
+    def __init__(self, docs: list):
+        self.__docs = docs
+        time_intervals = []
+        boxes = []
+        self.__unindexed_time = []
+        self.__unindexed_bbox = []
+        for i, each in enumerate(docs):
+            if each.get(CDMSConstants.min_datetime) is None or each.get(CDMSConstants.max_datetime) is None:
+                self.__unindexed_time.append(i)
+            else:
+                time_intervals.append((each[CDMSConstants.min_datetime], each[CDMSConstants.max_datetime], i))
+            if any([each.get(k) is None for k in [CDMSConstants.min_lat, CDMSConstants.min_lon, CDMSConstants.max_lat, CDMSConstants.max_lon]]):
+                self.__unindexed_bbox.append(i)
+            else:
+                boxes.append((each[CDMSConstants.min_lat], each[CDMSConstants.min_lon], each[CDMSConstants.max_lat], each[CDMSConstants.max_lon], i))
+        self.__time_index = IntervalIndex(time_intervals)
+        self.__bbox_index = PackedRTree(boxes)
+        self.__child_partitions = defaultdict(set)
+        for each in docs:
+            geo_spatial_interval, year, month = [str(each.get(k)) for k in [CDMSConstants.geo_spatial_interval_col, CDMSConstants.year_col, CDMSConstants.month_col]]
+            self.__child_partitions[()].add(geo_spatial_interval)
+            self.__child_partitions[(geo_spatial_interval,)].add(year)
+            self.__child_partitions[(geo_spatial_interval, year)].add(month)
+
+    @property
+    def docs(self):
+        return self.__docs
+
+    @property
+    def child_partitions(self):
+        """
+        existing partition values under this platform.
+        () => geo_spatial_intervals, (geo_spatial_interval,) => years, (geo_spatial_interval, year) => months
+        :return: dict
+        """
+        return self.__child_partitions
+
+    def get_candidates(self, min_time=None, max_time=None, min_lat_lon=None, max_lat_lon=None) -> list:
+        """
+        superset of the documents overlapping the time range and the bbox
+        :return: list of parquet_stats documents
+        """
+        candidates = None
+        if min_time is not None or max_time is not None:
+            candidates = set(self.__time_index.query(min_time, max_time) + self.__unindexed_time)
+        if min_lat_lon is not None or max_lat_lon is not None:
+            min_lat_lon = [-math.inf, -math.inf] if min_lat_lon is None else min_lat_lon
+            max_lat_lon = [math.inf, math.inf] if max_lat_lon is None else max_lat_lon
+            bbox_candidates = set(self.__bbox_index.query(min_lat_lon[0], min_lat_lon[1], max_lat_lon[0], max_lat_lon[1]) + self.__unindexed_bbox)
+            candidates = bbox_candidates if candidates is None else candidates.intersection(bbox_candidates)
+        if candidates is None:
+            return self.__docs
+        return [self.__docs[k] for k in candidates]
+
+
+class ParquetStatsCatalog(metaclass=Singleton):
+    """
+    in-process copy of the parquet_stats index so that ParquetPathsEsRetriever does not page through ES for every query.
+
+    - a snapshot of every document is loaded at startup in a background thread. ES is used until it is ready.
+    - every `parquet_stats_catalog_refresh` seconds, documents with `indexed_at` since the last poll are upserted.
+    - if the document count in ES is different from the catalog afterwards (deleted files or documents without `indexed_at`), a new snapshot is loaded.
+    - QueryResultCache is invalidated for the new / changed documents, and cleared when a new snapshot is loaded.
+      when the catalog is disabled, new documents are still polled for it as that is when queries through ES see the new files.
+
+    documents are grouped by provider / project / platform_code. each group has an interval index on time and an R-tree on lat / lon.
+    candidates from the indexes are checked against the same conditions as the ES query.
+    """
+    DEFAULT_REFRESH_INTERVAL = 60
+    POLL_OVERLAP = 30  # seconds. covers the delay between `indexed_at` and the document being searchable
+    SORTING_KEYS = [CDMSConstants.min_datetime, CDMSConstants.platform_code_col, CDMSConstants.min_lat, CDMSConstants.min_lon, CDMSConstants.s3_url_key]
+
+    def __init__(self):
+        config = Config()
+        self.__is_enabled = config.get_value(Config.parquet_stats_catalog, 'FALSE').strip().upper() == 'TRUE'
+        self.__refresh_interval = int(config.get_value(Config.parquet_stats_catalog_refresh, ParquetStatsCatalog.DEFAULT_REFRESH_INTERVAL))
+        self.__es_config = {
+            'es_url': config.get_value(Config.es_url),
+            'es_index': CDMSConstants.es_index_parquet_stats,
+            'es_port': int(config.get_value(Config.es_port, '443')),
+        }
+        self.__es: ESAbstract = None
+        self.__docs = {}
+        self.__partitions = {}
+        self.__lock = threading.Lock()
+        self.__refresh_thread = None
+        self.__is_ready = False
+        self.__last_poll = 0
+        self.__watched_docs = {}  # s3_url: indexed_at of the previous poll when the catalog is disabled
+
+    @property
+    def is_enabled(self):
+        return self.__is_enabled
+
+    @property
+    def is_ready(self):
+        return self.__is_ready
+
+    def load_es_obj(self, es: ESAbstract):
+        self.__es = es
+        return self
+
+    def __get_es(self) -> ESAbstract:
+        if self.__es is None:
+            self.__es = ESFactory().get_instance('AWS', index=self.__es_config['es_index'], base_url=self.__es_config['es_url'], port=self.__es_config['es_port'])
+        return self.__es
+
+    @staticmethod
+    def __get_partition_key(doc: dict):
+        return doc.get(CDMSConstants.provider_col), doc.get(CDMSConstants.project_col), doc.get(CDMSConstants.platform_code_col)
+
+    def __rebuild_partitions(self, partition_keys: set):
+        grouped_docs = {k: [] for k in partition_keys}
+        for each in self.__docs.values():
+            partition_key = self.__get_partition_key(each)
+            if partition_key in grouped_docs:
+                grouped_docs[partition_key].append(each)
+        partitions = dict(self.__partitions)
+        for partition_key, docs in grouped_docs.items():
+            if len(docs) < 1:
+                partitions.pop(partition_key, None)
+            else:
+                partitions[partition_key] = CatalogPartition(docs)
+        self.__partitions = partitions  # swapped at once. running searches keep the previous one
+        return
+
+    def load_docs(self, docs: list):
+        """
+        replaces the whole catalog
+        :param docs: list of parquet_stats documents (_source)
+        :return:
+        """
+        with self.__lock:
+            self.__docs = {k[CDMSConstants.s3_url_key]: k for k in docs}
+            self.__partitions = {}
+            self.__rebuild_partitions(set([self.__get_partition_key(k) for k in self.__docs.values()]))
+            self.__is_ready = True
+        QueryResultCache().clear()
+        LOGGER.debug(f'loaded {len(self.__docs)} parquet_stats documents in {len(self.__partitions)} partitions')
+        return
+
+    def upsert_docs(self, docs: list):
+        changed_docs = []
+        with self.__lock:
+            partition_keys = set([])
+            for each in docs:
+                old_doc = self.__docs.get(each[CDMSConstants.s3_url_key], None)
+                if old_doc is not None:
+                    partition_keys.add(self.__get_partition_key(old_doc))
+                if old_doc != each:
+                    changed_docs.append(each)
+                self.__docs[each[CDMSConstants.s3_url_key]] = each
+                partition_keys.add(self.__get_partition_key(each))
+            self.__rebuild_partitions(partition_keys)
+        if len(changed_docs) > 0:  # after the swap. queries re-caching from now on see the new files
+            QueryResultCache().invalidate_by_stats_docs(changed_docs)
+        LOGGER.debug(f'upserted {len(docs)} parquet_stats documents. changed: {len(changed_docs)}')
+        return
+
+    def __query_all_pages(self, query: dict):
+        es_result = self.__get_es().query_pages({
+            'query': query,
+            'sort': [{CDMSConstants.s3_url_key: {'order': 'asc'}}],
+        })
+        return [k['_source'] for k in es_result['items']]
+
+    def __query_updated_docs(self):
+        return self.__query_all_pages({'range': {CDMSConstants.indexed_at_key: {'gte': self.__last_poll - ParquetStatsCatalog.POLL_OVERLAP}}})
+
+    def watch_updates(self):
+        """
+        refresh when the catalog is disabled. documents are polled only to invalidate QueryResultCache.
+        documents which were already seen in the previous poll (POLL_OVERLAP) are skipped.
+        :return: None
+        """
+        poll_time = time()
+        if self.__last_poll > 0:
+            updated_docs = self.__query_updated_docs()
+            new_docs = [k for k in updated_docs if k[CDMSConstants.s3_url_key] not in self.__watched_docs or self.__watched_docs[k[CDMSConstants.s3_url_key]] != k.get(CDMSConstants.indexed_at_key)]
+            self.__watched_docs = {k[CDMSConstants.s3_url_key]: k.get(CDMSConstants.indexed_at_key) for k in updated_docs}
+            if len(new_docs) > 0:
+                QueryResultCache().invalidate_by_stats_docs(new_docs)
+        self.__last_poll = poll_time  # nothing is cached before the first poll
+        return
+
+    def refresh(self):
+        poll_time = time()
+        if not self.__is_ready:
+            self.load_docs(self.__query_all_pages({'match_all': {}}))
+            self.__last_poll = poll_time
+            return
+        updated_docs = self.__query_updated_docs()
+        if len(updated_docs) > 0:
+            self.upsert_docs(updated_docs)
+        es_count = self.__get_es().count({'query': {'match_all': {}}})
+        if es_count != len(self.__docs):
+            LOGGER.debug(f'document count is different. ES: {es_count}. catalog: {len(self.__docs)}. reloading')
+            self.load_docs(self.__query_all_pages({'match_all': {}}))
+        self.__last_poll = poll_time
+        return
+
+    def __refresh_forever(self):
+        while True:
+            try:
+                self.refresh() if self.__is_enabled else self.watch_updates()
+            except Exception as e:
+                LOGGER.exception(f'failed to refresh parquet_stats catalog. cause: {str(e)}')
+            sleep(self.__refresh_interval)
+
+    def start(self):
+        """
+        starts the background refresh if the catalog or QueryResultCache is enabled. it does nothing if it is already started.
+        :return:
+        """
+        if not self.__is_enabled and not QueryResultCache().is_enabled:
+            return self
+        with self.__lock:
+            if self.__refresh_thread is not None:
+                return self
+            self.__refresh_thread = threading.Thread(target=self.__refresh_forever, name='parquet_stats_catalog', daemon=True)
+        self.__refresh_thread.start()
+        return self
+
+    def get_child_partitions(self, provider: str, project: str, platform_code: str):
+        """
+        :return: dict | CatalogPartition.child_partitions. None if the catalog is not ready or the platform is not in it
+        """
+        if not self.__is_ready:
+            return None
+        partition = self.__partitions.get((provider, project, platform_code), None)
+        return None if partition is None else partition.child_partitions
+
+    @staticmethod
+    def __is_gte(doc: dict, key: str, val):
+        return doc.get(key) is not None and doc[key] >= val
+
+    @staticmethod
+    def __is_lte(doc: dict, key: str, val):
+        return doc.get(key) is not None and doc[key] <= val
+
+    def __is_depth_matched(self, doc: dict, props: QueryProps, is_missing_depth_matched: bool):
+        if props.min_depth is None and props.max_depth is None:
+            return True
+        if (props.min_depth is None or self.__is_gte(doc, CDMSConstants.max_depth, props.min_depth)) and \
+                (props.max_depth is None or self.__is_lte(doc, CDMSConstants.min_depth, props.max_depth)):
+            return True
+        return is_missing_depth_matched and doc.get(CDMSConstants.has_missing_depth, True) is True
+
+    def __is_variables_matched(self, doc: dict, props: QueryProps):
+        if len(props.variable) < 1:
+            return True
+        observation_counts = doc.get(CDMSConstants.observation_counts_key, {})
+        return any([k not in observation_counts or observation_counts[k] > 0 for k in props.variable])
+
+    def __is_matched(self, doc: dict, props: QueryProps, min_time, max_time, is_missing_depth_matched: bool):
+        """
+        same conditions as the ES query in ParquetPathsEsRetriever.start
+        """
+        if min_time is not None and not self.__is_gte(doc, CDMSConstants.max_datetime, min_time):
+            return False
+        if max_time is not None and not self.__is_lte(doc, CDMSConstants.min_datetime, max_time):
+            return False
+        if props.min_lat_lon is not None:
+            if not self.__is_gte(doc, CDMSConstants.max_lat, props.min_lat_lon[0]) or not self.__is_gte(doc, CDMSConstants.max_lon, props.min_lat_lon[1]):
+                return False
+        if props.max_lat_lon is not None:
+            if not self.__is_lte(doc, CDMSConstants.min_lat, props.max_lat_lon[0]) or not self.__is_lte(doc, CDMSConstants.min_lon, props.max_lat_lon[1]):
+                return False
+        return self.__is_depth_matched(doc, props, is_missing_depth_matched) and self.__is_variables_matched(doc, props)
+
+    def __is_partition_matched(self, partition_key: tuple, props: QueryProps):
+        provider, project, platform_code = partition_key
+        if props.provider is not None and provider != props.provider:
+            return False
+        if props.project is not None and project != props.project:
+            return False
+        if props.platform_code is not None:
+            platform_codes = props.platform_code if isinstance(props.platform_code, list) else [props.platform_code]
+            return platform_code in platform_codes
+        return True
+
+    def search(self, props: QueryProps, is_missing_depth_matched: bool) -> list:
+        """
+        :param props:
+        :param is_missing_depth_matched: if files with missing depth rows match the depth range of the query
+        :return: list of parquet_stats documents in the same order as the ES query
+        """
+        min_time = None if props.min_datetime is None else TimeUtils.get_datetime_obj(props.min_datetime).timestamp()
+        max_time = None if props.max_datetime is None else TimeUtils.get_datetime_obj(props.max_datetime).timestamp()
+        result = []
+        for partition_key, partition in self.__partitions.items():
+            if not self.__is_partition_matched(partition_key, props):
+                continue
+            for each in partition.get_candidates(min_time, max_time, props.min_lat_lon, props.max_lat_lon):
+                if self.__is_matched(each, props, min_time, max_time, is_missing_depth_matched):
+                    result.append(each)
+        return sorted(result, key=lambda doc: [(1,) if doc.get(k) is None else (0, doc[k]) for k in self.SORTING_KEYS])  # ES puts missing values last
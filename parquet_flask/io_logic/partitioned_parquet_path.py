@@ -27,6 +27,7 @@ class PartitionedParquetPath:
         self.__year = None
         self.__month = None
         self.__lat_lon = None
+        self.__file_stats = {}
 
     def set_lat_lon(self, val):
         self.lat_lon = val
@@ -65,6 +66,7 @@ class PartitionedParquetPath:
             self.set_month(es_result[CDMSConstants.month_col])
         if CDMSConstants.geo_spatial_interval_col in es_result:
             self.set_lat_lon(es_result[CDMSConstants.geo_spatial_interval_col])
+        self.file_stats = es_result
         return self
 
     def duplicate(self):
@@ -80,6 +82,39 @@ class PartitionedParquetPath:
             column_set[CDMSConstants.platform_code_col] = self.platform
         return column_set
 
+    @property
+    def file_stats(self) -> dict:
+        """
+        parquet_stats document of a single parquet file from ES. empty if it is not loaded from ES
+        :return:
+        """
+        return self.__file_stats
+
+    @file_stats.setter
+    def file_stats(self, val):
+        """
+        :param val:
+        :return: None
+        """
+        self.__file_stats = val
+        return
+
+    @property
+    def s3_url(self):
+        return self.file_stats.get(CDMSConstants.s3_url_key, None)
+
+    @property
+    def total(self):
+        return self.file_stats.get(CDMSConstants.total_key, None)
+
+    @property
+    def file_size(self):
+        """
+        bytes of the parquet file. None for documents which were indexed before it was added
+        :return:
+        """
+        return self.file_stats.get(CDMSConstants.file_size_key, None)
+
     @property
     def lat_lon(self):
         return self.__lat_lon
@@ -170,6 +205,19 @@ class PartitionedParquetPath:
     def __str__(self) -> str:
         return self.generate_path()
 
+    def generate_file_path(self):
+        """
+        full path of the parquet file from ES, re-based on `base_name` so that it has the same scheme as the partition paths.
+        s3://bucket/CDMS_insitu.geo2.parquet/provider=.../part-00000.parquet => s3a://bucket/CDMS_insitu.geo2.parquet/provider=.../part-00000.parquet
+        :return: str
+        """
+        if self.s3_url is None:
+            raise ValueError(f'missing s3_url in file_stats. {self.file_stats}')
+        partition_index = self.s3_url.find(f'/{CDMSConstants.provider_col}=')
+        if partition_index < 0:
+            raise ValueError(f'missing {CDMSConstants.provider_col} partition in s3_url: {self.s3_url}')
+        return f'{self.__base_name}{self.s3_url[partition_index:]}'
+
     def generate_path(self):
         parquet_path = self.__base_name
         if self.provider is None:
@@ -0,0 +1,163 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import math
+import threading
+from contextlib import contextmanager
+from time import monotonic
+
+from parquet_flask.io_logic.query_deadline import QueryDeadline
+from parquet_flask.io_logic.query_rejected_error import QueryRejectedError
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.singleton import Singleton
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryAdmissionController(metaclass=Singleton):
+    """
+    admits a query only if its estimated cost (QueryCostEstimator) fits.
+    - limits of a single query (`query_max_files`, `query_max_rows`, `query_max_bytes`). over them, it is rejected with 400.
+    - budgets of estimated rows which are being read at the same time, per client (`admission_client_rows`)
+      and for everyone (`admission_global_rows`). over them, it waits for up to `admission_queue_seconds` (or the deadline
+      of the request) for other queries to finish. then it is rejected with 429.
+    a query is always admitted when nothing else is running for the budget. so a single large query within the limits is not starved.
+    a query without an estimated row count is counted as 0 rows.
+    every limit / budget is turned off with 0.
+    """
+    DEFAULT_MAX_FILES = 20000
+    DEFAULT_MAX_ROWS = 1000000000
+    DEFAULT_MAX_BYTES = 0
+    DEFAULT_GLOBAL_ROWS = 2000000000
+    DEFAULT_CLIENT_ROWS = 500000000
+    DEFAULT_QUEUE_SECONDS = 30
+    ANONYMOUS_CLIENT = 'anonymous'
+
+    def __init__(self):
+        config = Config()
+        self.__limits = {
+            'files': int(config.get_value(Config.query_max_files, QueryAdmissionController.DEFAULT_MAX_FILES)),
+            'rows': int(config.get_value(Config.query_max_rows, QueryAdmissionController.DEFAULT_MAX_ROWS)),
+            'bytes': int(config.get_value(Config.query_max_bytes, QueryAdmissionController.DEFAULT_MAX_BYTES)),
+        }
+        self.__global_rows = int(config.get_value(Config.admission_global_rows, QueryAdmissionController.DEFAULT_GLOBAL_ROWS))
+        self.__client_rows = int(config.get_value(Config.admission_client_rows, QueryAdmissionController.DEFAULT_CLIENT_ROWS))
+        self.__queue_seconds = float(config.get_value(Config.admission_queue_seconds, QueryAdmissionController.DEFAULT_QUEUE_SECONDS))
+        self.__condition = threading.Condition()
+        self.__running_rows = 0
+        self.__running_queries = 0
+        self.__running_by_client = {}  # client_id: [query count, rows]
+        self.__admitted = 0
+        self.__queued = 0
+        self.__rejected_by_limits = 0
+        self.__rejected_by_budgets = 0
+
+    @property
+    def limits(self):
+        return {k: (v if v > 0 else None) for k, v in self.__limits.items()}
+
+    def get_over_limits(self, query_cost: dict) -> list:
+        """
+        :param query_cost: result of QueryCostEstimator.estimate
+        :return: list of str | keys of query_cost which are over the limits of a single query
+        """
+        return [k for k, v in self.__limits.items() if v > 0 and query_cost.get(k, None) is not None and query_cost[k] > v]
+
+    def __fits(self, client_id: str, rows: int) -> bool:
+        if self.__running_queries > 0 and 0 < self.__global_rows < self.__running_rows + rows:
+            return False
+        client_queries, client_rows = self.__running_by_client.get(client_id, [0, 0])
+        if client_queries > 0 and 0 < self.__client_rows < client_rows + rows:
+            return False
+        return True
+
+    def __get_wait_seconds(self):
+        query_deadline = QueryDeadline.get_current()
+        if query_deadline is None:
+            return self.__queue_seconds
+        return min(self.__queue_seconds, query_deadline.get_remaining_seconds())
+
+    def __acquire(self, client_id: str, query_cost: dict, get_suggestions):
+        rows = query_cost.get('rows', None) or 0
+        with self.__condition:
+            if not self.__fits(client_id, rows):
+                self.__queued += 1
+                LOGGER.info(f'queueing query of client: {client_id}. cost: {query_cost}. running rows: {self.__running_rows}')
+                wait_until = monotonic() + self.__get_wait_seconds()
+                while not self.__fits(client_id, rows):
+                    remaining_seconds = wait_until - monotonic()
+                    if remaining_seconds <= 0:
+                        self.__rejected_by_budgets += 1
+                        raise QueryRejectedError('too many rows are being queried. retry later or narrow the query', 429,
+                                                 query_cost, get_suggestions(query_cost, self.limits), max(int(math.ceil(self.__queue_seconds)), 1))
+                    self.__condition.wait(remaining_seconds)
+            self.__running_rows += rows
+            self.__running_queries += 1
+            client_running = self.__running_by_client.setdefault(client_id, [0, 0])
+            client_running[0] += 1
+            client_running[1] += rows
+            self.__admitted += 1
+        return rows
+
+    def __release(self, client_id: str, rows: int):
+        with self.__condition:
+            self.__running_rows -= rows
+            self.__running_queries -= 1
+            client_running = self.__running_by_client[client_id]
+            client_running[0] -= 1
+            client_running[1] -= rows
+            if client_running[0] < 1:
+                self.__running_by_client.pop(client_id)
+            self.__condition.notify_all()
+        return
+
+    @contextmanager
+    def admit(self, client_id: str, query_cost: dict, get_suggestions):
+        """
+        blocks while the query is queued. it must not be called in a gevent greenlet (see BlockingExecutor).
+
+            with QueryAdmissionController().admit(client_id, query_cost, estimator.get_suggestions):
+                query_engine.search(condition_manager)
+
+        :param client_id: None for anonymous clients
+        :param query_cost: result of QueryCostEstimator.estimate
+        :param get_suggestions: QueryCostEstimator.get_suggestions
+        :return: None
+        """
+        client_id = QueryAdmissionController.ANONYMOUS_CLIENT if client_id is None else client_id
+        over_limits = self.get_over_limits(query_cost)
+        if len(over_limits) > 0:
+            with self.__condition:
+                self.__rejected_by_limits += 1
+            raise QueryRejectedError(f'query is too broad. estimated {over_limits} are over the limits: {self.limits}', 400,
+                                     query_cost, get_suggestions(query_cost, self.limits))
+        rows = self.__acquire(client_id, query_cost, get_suggestions)
+        try:
+            yield
+        finally:
+            self.__release(client_id, rows)
+
+    def get_stats(self) -> dict:
+        with self.__condition:
+            return {
+                'running_queries': self.__running_queries,
+                'running_rows': self.__running_rows,
+                'running_clients': len(self.__running_by_client),
+                'admitted': self.__admitted,
+                'queued': self.__queued,
+                'rejected_by_limits': self.__rejected_by_limits,
+                'rejected_by_budgets': self.__rejected_by_budgets,
+            }
@@ -0,0 +1,95 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.time_utils import TimeUtils
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryCostEstimator:
+    """
+    cost of a query before spark runs, from the parquet_stats documents of the files selected by ParquetPathsEsRetriever.
+    - files: distinct parquet files
+    - rows: sum of `total` of the files. it is what spark reads and sorts, not the number of matching rows
+    - bytes: sum of `file_size`. files without it are counted with the average bytes per row of the others
+    - partition_paths: distinct paths spark lists
+    rows and bytes are None when some files have no parquet_stats (not loaded from ES). the query is then not limited by them.
+    """
+    def __init__(self, props: QueryProps):
+        self.__props = props
+
+    def estimate(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        files = {}
+        is_complete = True
+        for each in condition_manager.parquet_names:
+            each: PartitionedParquetPath = each
+            if each.s3_url is None or each.total is None:
+                is_complete = False
+                continue
+            files[each.s3_url] = each
+        total_rows = sum([k.total for k in files.values()])
+        sized_files = [k for k in files.values() if k.file_size is not None]
+        total_bytes = None
+        if len(sized_files) > 0:
+            sized_rows = sum([k.total for k in sized_files])
+            total_bytes = sum([k.file_size for k in sized_files])
+            bytes_per_row = total_bytes / sized_rows if sized_rows > 0 else 0
+            total_bytes += int(bytes_per_row * (total_rows - sized_rows))
+        query_cost = {
+            'files': len(files),
+            'rows': total_rows if is_complete else None,
+            'bytes': total_bytes if is_complete else None,
+            'partition_paths': len(set(condition_manager.stringify_parquet_names())),
+        }
+        LOGGER.debug(f'estimated query cost: {query_cost}')
+        return query_cost
+
+    def __get_days(self):
+        if self.__props.min_datetime is None or self.__props.max_datetime is None:
+            return None
+        time_range = TimeUtils.get_datetime_obj(self.__props.max_datetime) - TimeUtils.get_datetime_obj(self.__props.min_datetime)
+        return max(time_range.total_seconds() / 86400, 0)
+
+    def get_suggestions(self, query_cost: dict, limits: dict) -> list:
+        """
+        :param query_cost: result of `estimate`
+        :param limits: the same keys as query_cost. None if not limited
+        :return: list of str | narrower parameters which would reduce the cost
+        """
+        over_ratio = max([query_cost[k] / v for k, v in limits.items() if v is not None and query_cost.get(k, None) is not None and v > 0] + [1.0])
+        suggestions = []
+        days = self.__get_days()
+        if days is None:
+            suggestions.append('set both startTime and endTime')
+        elif days > 1:
+            suggestions.append(f'narrow startTime / endTime from {days:.1f} days to about {max(days / over_ratio, 1):.1f} days')
+        if self.__props.platform_code is None or len(self.__props.platform_code) < 1:
+            suggestions.append('filter by platform')
+        elif isinstance(self.__props.platform_code, list) and len(self.__props.platform_code) > 1:
+            suggestions.append(f'query fewer platforms than {len(self.__props.platform_code)} at a time')
+        if self.__props.min_lat_lon is None or self.__props.max_lat_lon is None:
+            suggestions.append('set bbox')
+        else:
+            area = abs(self.__props.max_lat_lon[0] - self.__props.min_lat_lon[0]) * abs(self.__props.max_lat_lon[1] - self.__props.min_lat_lon[1])
+            if area > 100:
+                suggestions.append(f'shrink bbox from {area:.0f} to about {max(area / over_ratio, 1):.0f} square degrees')
+        if self.__props.provider is None or self.__props.project is None:
+            suggestions.append('set provider and project')
+        return suggestions
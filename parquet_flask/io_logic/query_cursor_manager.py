@@ -0,0 +1,152 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import re
+import threading
+from time import time
+from uuid import uuid4
+
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyspark import StorageLevel
+from pyspark.sql.dataframe import DataFrame
+from pyspark.sql.session import SparkSession
+
+from parquet_flask.io_logic.arrow_utils import ArrowUtils
+from parquet_flask.io_logic.spark_row_index import SparkRowIndex
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.singleton import Singleton
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryCursorManager(metaclass=Singleton):
+    """
+    materializes a sorted + filtered query result under `query_cursor_path` with a row index column.
+    later pages read a slice of it by the row index instead of re-running the query.
+
+    cursor ID = <uuid>_<expiry unix timestamp>. it is also the directory name.
+    so any process can read a cursor or garbage collect an expired one without a shared registry.
+    """
+    INDEX_COL = '_cursor_index'
+    DEFAULT_TTL = 1800
+    GC_INTERVAL = 60
+    CURSOR_ID_PATTERN = re.compile(r'^[0-9a-f]{32}_([0-9]+)$')
+
+    def __init__(self):
+        config = Config()
+        base_path = config.get_value(Config.query_cursor_path, '')
+        self.__base_path = base_path if not base_path.endswith('/') else base_path[:-1]
+        self.__ttl = int(config.get_value(Config.query_cursor_ttl, QueryCursorManager.DEFAULT_TTL))
+        self.__last_gc = 0
+        self.__gc_lock = threading.Lock()
+
+    @property
+    def is_enabled(self):
+        return self.__base_path != '' and self.__ttl > 0
+
+    def get_expiry(self, cursor_id: str):
+        """
+        :param cursor_id:
+        :return: int | expiry unix timestamp. None if it is not a valid cursor ID
+        """
+        if cursor_id is None:
+            return None
+        matched = self.CURSOR_ID_PATTERN.match(cursor_id)
+        if matched is None:
+            return None
+        return int(matched.group(1))
+
+    def is_expired(self, cursor_id: str):
+        expiry = self.get_expiry(cursor_id)
+        return expiry is None or expiry < time()
+
+    def get_cursor_path(self, cursor_id: str):
+        return f'{self.__base_path}/{cursor_id}'
+
+    def create(self, query_result: DataFrame, spark: SparkSession):
+        """
+        row index is the position in the sort order of the query. it is assigned per partition without moving rows.
+        each partition is written in that order so that row group statistics of the index column can skip the other row groups.
+        :param query_result: filtered + sorted + projected data frame
+        :param spark:
+        :return: str | cursor ID
+        """
+        self.gc(spark)
+        cursor_id = f'{uuid4().hex}_{int(time()) + self.__ttl}'
+        numbered_result = SparkRowIndex.number_rows(query_result).persist(StorageLevel.MEMORY_AND_DISK)  # the counts and the write must see the same partitions
+        try:
+            SparkRowIndex.get_indexed_result(numbered_result, self.INDEX_COL).write.mode('overwrite').parquet(self.get_cursor_path(cursor_id))
+        finally:
+            numbered_result.unpersist()
+        LOGGER.debug(f'created cursor: {cursor_id}')
+        return cursor_id
+
+    def read_page(self, cursor_id: str, start_at: int, size: int):
+        """
+        :param cursor_id:
+        :param start_at:
+        :param size:
+        :return: list of dict. None if the cursor does not exist or it is expired
+        """
+        page_result = self.read_table(cursor_id, start_at, size)
+        return None if page_result is None else ArrowUtils.to_dict_list(page_result)
+
+    def read_table(self, cursor_id: str, start_at: int, size: int):
+        """
+        reads rows [start_at, start_at + size) of a materialized result with pyarrow. no spark session is needed.
+        :param cursor_id:
+        :param start_at:
+        :param size:
+        :return: pyarrow.Table. None if the cursor does not exist or it is expired
+        """
+        if not self.is_enabled or self.is_expired(cursor_id):
+            LOGGER.debug(f'cursor is disabled, invalid, or expired: {cursor_id}')
+            return None
+        cursor_path = self.get_cursor_path(cursor_id)
+        try:
+            dataset = ds.dataset(ArrowUtils.strip_scheme(cursor_path), format='parquet', filesystem=ArrowUtils.get_file_system(cursor_path))
+            page_result = dataset.to_table(filter=(pc.field(self.INDEX_COL) >= start_at) & (pc.field(self.INDEX_COL) < start_at + size))
+        except (FileNotFoundError, OSError) as read_error:
+            LOGGER.debug(f'cannot read cursor: {cursor_id}. {str(read_error)}')
+            return None
+        return page_result.sort_by(self.INDEX_COL).drop_columns([self.INDEX_COL])
+
+    def gc(self, spark: SparkSession, force=False):
+        """
+        deletes the expired cursors under `query_cursor_path`. it runs at most once in GC_INTERVAL seconds unless forced.
+        hadoop file system from the spark session is used so that local paths and s3a:// work the same.
+        :param spark:
+        :param force:
+        :return: int | number of deleted cursors
+        """
+        with self.__gc_lock:
+            if not force and time() - self.__last_gc < self.GC_INTERVAL:
+                return 0
+            self.__last_gc = time()
+        hadoop_path = spark._jvm.org.apache.hadoop.fs.Path(self.__base_path)
+        hadoop_fs = hadoop_path.getFileSystem(spark._jsc.hadoopConfiguration())
+        if not hadoop_fs.exists(hadoop_path):
+            return 0
+        deleted_count = 0
+        for each in hadoop_fs.listStatus(hadoop_path):
+            cursor_id = each.getPath().getName()
+            if self.get_expiry(cursor_id) is None or not self.is_expired(cursor_id):
+                continue
+            LOGGER.debug(f'deleting expired cursor: {cursor_id}')
+            hadoop_fs.delete(each.getPath(), True)
+            deleted_count += 1
+        return deleted_count
@@ -0,0 +1,187 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+from time import monotonic
+
+import gevent
+
+from parquet_flask.utils.blocking_executor import BlockingExecutor
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryDeadline:
+    """
+    deadline of a single request.
+    the spark job groups which are started under it (see SparkJobScope) are cancelled with `cancelJobGroup`
+    when the deadline passes or the client disconnects. so abandoned queries stop using executors.
+    the call is then aborted with TimeoutError.
+
+    the deadline is visible to SparkJobScope as a thread-local value while `run` executes the function.
+    """
+    DISCONNECT_CHECK_INTERVAL = 1.0
+    __current = threading.local()
+
+    def __init__(self, seconds: float, is_disconnected=None):
+        """
+        :param seconds: seconds from now
+        :param is_disconnected: optional callable which returns True when the client has gone
+        """
+        self.__seconds = seconds
+        self.__expires_at = monotonic() + seconds
+        self.__is_disconnected = is_disconnected
+        self.__lock = threading.Lock()
+        self.__job_groups = []
+        self.__cancel_reason = None
+
+    @property
+    def seconds(self):
+        return self.__seconds
+
+    @property
+    def cancel_reason(self):
+        return self.__cancel_reason
+
+    @property
+    def is_cancelled(self):
+        return self.__cancel_reason is not None
+
+    def get_remaining_seconds(self) -> float:
+        return max(self.__expires_at - monotonic(), 0.0)
+
+    @staticmethod
+    def get_current():
+        """
+        :return: QueryDeadline | the deadline of the function which is running in this thread. None if there is none
+        """
+        return getattr(QueryDeadline.__current, 'deadline', None)
+
+    def add_job_group(self, spark_context, job_group: str):
+        """
+        job groups are kept until the request ends as streamed results keep running jobs after their scope is closed.
+        a job group which is added after the cancellation is cancelled right away.
+        :param spark_context:
+        :param job_group:
+        :return: None
+        """
+        with self.__lock:
+            self.__job_groups.append((spark_context, job_group))
+            if not self.is_cancelled:
+                return
+        spark_context.cancelJobGroup(job_group)
+        return
+
+    def cancel(self, reason: str):
+        with self.__lock:
+            if self.is_cancelled:
+                return
+            self.__cancel_reason = reason
+            job_groups = list(self.__job_groups)
+        LOGGER.warning(f'cancelling {len(job_groups)} spark job group(s). reason: {reason}')
+        for spark_context, job_group in job_groups:
+            try:
+                spark_context.cancelJobGroup(job_group)
+            except Exception as e:
+                LOGGER.warning(f'unable to cancel job group: {job_group}. cause: {str(e)}')
+        return
+
+    def __run_in_thread(self, func, *args, **kwargs):
+        previous_deadline = self.get_current()
+        QueryDeadline.__current.deadline = self
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if self.is_cancelled:  # spark raises its own error for the cancelled jobs
+                raise TimeoutError(self.__cancel_reason) from e
+            raise
+        finally:
+            QueryDeadline.__current.deadline = previous_deadline
+
+    def __run_with_timer(self, func, *args, **kwargs):
+        deadline_timer = threading.Timer(self.get_remaining_seconds(), self.cancel, args=[f'deadline of {self.__seconds} seconds exceeded'])
+        deadline_timer.daemon = True
+        deadline_timer.start()
+        try:
+            result = self.__run_in_thread(func, *args, **kwargs)
+        finally:
+            deadline_timer.cancel()
+        if self.is_cancelled:
+            raise TimeoutError(self.__cancel_reason)
+        return result
+
+    def __check_before_wait(self):
+        if self.is_cancelled:
+            raise TimeoutError(self.__cancel_reason)
+        if self.get_remaining_seconds() <= 0:
+            self.cancel(f'deadline of {self.__seconds} seconds exceeded')
+            raise TimeoutError(self.__cancel_reason)
+        if self.__is_disconnected is not None and self.__is_disconnected():
+            self.cancel('client disconnected')
+            raise TimeoutError(self.__cancel_reason)
+        return
+
+    def run(self, func, *args, **kwargs):
+        """
+        in a gevent greenlet, func runs in BlockingExecutor. the greenlet stops waiting as soon as the deadline passes
+        or the client disconnects even if func is not in a spark job at that moment.
+        elsewhere, func runs in this thread and a timer cancels the job groups at the deadline.
+        :param func: blocking callable
+        :return: result of func
+        """
+        self.__check_before_wait()
+        if not BlockingExecutor.is_in_greenlet():
+            return self.__run_with_timer(func, *args, **kwargs)
+        async_result = BlockingExecutor().spawn(self.__run_in_thread, func, *args, **kwargs)
+        while True:
+            try:
+                return async_result.get(timeout=min(self.get_remaining_seconds(), self.DISCONNECT_CHECK_INTERVAL))
+            except gevent.Timeout:
+                self.__check_before_wait()
+
+    def iterate(self, items):
+        """
+        pulls every item of a blocking iterable with `run`. closing the generator early (client disconnected while streaming)
+        cancels the job groups.
+        the iterable is closed when it stops in any way, so that its context (e.g. the admission of QueryV4.stream)
+        is released right away instead of when it is garbage collected.
+        :param items: iterable
+        :return: generator of the same items
+        """
+        iterator = iter(items)
+        end_marker = object()
+        try:
+            while True:
+                each_item = self.run(next, iterator, end_marker)
+                if each_item is end_marker:
+                    return
+                yield each_item
+        except GeneratorExit:
+            self.cancel('client disconnected')
+            raise
+        finally:
+            self.__close(iterator)
+
+    @staticmethod
+    def __close(iterator):
+        close_func = getattr(iterator, 'close', None)
+        if close_func is None:
+            return
+        try:
+            BlockingExecutor().run(close_func)  # its cleanup may call spark (e.g. unpersist)
+        except ValueError as e:  # still running in a thread after the deadline. it stops once its job group is cancelled
+            LOGGER.warning(f'cannot close the iterator. cause: {str(e)}')
+        return
@@ -0,0 +1,119 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from abc import ABC, abstractmethod
+
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.count_planner import CountPlanner
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.config import Config
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryEngineAbstract(ABC):
+    SORTING_COLUMNS = [CDMSConstants.time_col, CDMSConstants.platform_code_col, CDMSConstants.depth_col, CDMSConstants.lat_col, CDMSConstants.lon_col]
+    REMOVING_COLUMNS = [CDMSConstants.time_obj_col, CDMSConstants.year_col, CDMSConstants.month_col, CDMSConstants.geo_spatial_interval_col]
+    PARTITION_COLUMNS = [CDMSConstants.provider_col, CDMSConstants.project_col, CDMSConstants.platform_code_col,
+                         CDMSConstants.geo_spatial_interval_col, CDMSConstants.year_col, CDMSConstants.month_col, CDMSConstants.job_id_col]
+
+    def __init__(self, props: QueryProps, parquet_name: str):
+        self._props = props
+        self._parquet_name = parquet_name
+        self._count_mode = Config().get_value(Config.count_mode, CountPlanner.EXACT).upper()
+
+    def _get_reading_columns(self, condition_manager: ParquetQueryConditionManagementV4, all_columns: list) -> list:
+        """
+        minimal set of columns to read from parquet: output columns (requested columns, variables, and quality flags),
+        sorting columns, and the columns in the conditions.
+        when no column is requested, the output is every column except REMOVING_COLUMNS.
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :param all_columns: column names of the schema
+        :return: list of column names in the order of `all_columns`
+        """
+        if len(condition_manager.columns) > 0:
+            output_columns = condition_manager.columns
+        else:
+            output_columns = [k for k in all_columns if k not in self.REMOVING_COLUMNS]
+        predicate = condition_manager.predicate
+        reading_columns = set(output_columns + self.SORTING_COLUMNS + ([] if predicate is None else predicate.get_column_names()))
+        return [k for k in all_columns if k in reading_columns]
+
+    def _get_total_count(self, condition_manager: ParquetQueryConditionManagementV4, count_all, count_files):
+        """
+        files which are fully inside the query are counted with their `total` from parquet_stats.
+        only the partially overlapping files are scanned. in ESTIMATE mode, they are estimated instead.
+
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :param count_all: function without arguments. counts all rows matching the conditions
+        :param count_files: function with a list of PartitionedParquetPath. counts the rows in those files matching the conditions
+        :return: tuple | (total, is_exact). total is -1 if it is not counted
+        """
+        if self._props.has_marker():
+            LOGGER.debug(f'not counting total since this is an Nth page')
+            return -1, False
+        count_planner = CountPlanner(self._props).plan(condition_manager.parquet_names)
+        if not count_planner.is_plannable:
+            LOGGER.debug(f'counting total')
+            return int(count_all()), True
+        if len(count_planner.partial_parquet_names) < 1:
+            return count_planner.contained_total, True
+        if self._count_mode == CountPlanner.ESTIMATE:
+            return count_planner.contained_total + count_planner.estimate_partial_total(), False
+        LOGGER.debug(f'counting total for partial files: {len(count_planner.partial_parquet_names)}')
+        return count_planner.contained_total + int(count_files(count_planner.partial_parquet_names)), True
+
+    @abstractmethod
+    def search(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        """
+        filter, sort, and page the parquet files selected by the condition manager.
+
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: dict | {"total": -1 if it is not counted, "is_total_exact": bool, "results": [dict]}
+        """
+        return {}
+
+    @abstractmethod
+    def search_table(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        """
+        same as `search` except that the page is a pyarrow table. rows are never turned into python objects.
+
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: dict | {"total": -1 if it is not counted, "is_total_exact": bool, "results": pyarrow.Table}
+        """
+        return {}
+
+    @abstractmethod
+    def stream(self, condition_manager: ParquetQueryConditionManagementV4):
+        """
+        same page as `search` without counting the total. rows are yielded as they are produced
+        so that the whole page is never held in memory at once.
+
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: generator of dict
+        """
+        return
+
+    @abstractmethod
+    def explain(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        """
+        how `search` would read the files without reading them.
+
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: dict | {"reading_columns": [str], "pushed_filters": [str], "physical_plan": str or None}
+        """
+        return {}
@@ -0,0 +1,173 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from parquet_flask.io_logic.arrow_utils import ArrowUtils
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_engine_abstract import QueryEngineAbstract
+from parquet_flask.io_logic.query_timer import QueryTimer
+from parquet_flask.io_logic.query_v2 import QueryProps
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryEngineArrow(QueryEngineAbstract):
+    """
+    reads the parquet files selected by ES directly with pyarrow datasets. no spark session is involved.
+    filters are pushed down to the parquet reader (row group statistics) and only the needed columns are read.
+    the filter is rendered from the same QueryPredicate as the spark conditions in ParquetQueryConditionManagementV4.
+    """
+    STREAM_BATCH_SIZE = 1000
+
+    def __init__(self, props: QueryProps, parquet_name: str, missing_depth_value):
+        super().__init__(props, parquet_name)
+        self.__missing_depth_value = missing_depth_value
+
+    def __get_distinct_file_paths(self, condition_manager: ParquetQueryConditionManagementV4):
+        distinct_list = []
+        distinct_set = set([])
+        with condition_manager.query_timer.stage(QueryTimer.PATH_DEDUPE):
+            for each in condition_manager.parquet_names:
+                each: PartitionedParquetPath = each
+                file_path = ArrowUtils.strip_scheme(each.generate_file_path())
+                if file_path in distinct_set:
+                    continue
+                distinct_set.add(file_path)
+                distinct_list.append(file_path)
+        LOGGER.debug(f'length of distinct file paths: {len(distinct_list)}')
+        condition_manager.query_timer.set_counter(QueryTimer.DISTINCT_PATHS, len(distinct_list))
+        return distinct_list
+
+    def get_filter_expression(self, condition_manager: ParquetQueryConditionManagementV4):
+        """
+        pyarrow rendering of `ParquetQueryConditionManagementV4.predicate`
+        :param condition_manager:
+        :return: pyarrow.compute.Expression or None if there is no filter
+        """
+        predicate = condition_manager.predicate
+        return None if predicate is None else predicate.to_arrow_expression()
+
+    def __get_output_columns(self, condition_manager: ParquetQueryConditionManagementV4, arrow_schema: pa.Schema):
+        if len(condition_manager.columns) > 0:
+            return condition_manager.columns
+        return [k for k in arrow_schema.names if k not in self.REMOVING_COLUMNS]
+
+    def __get_page_indices(self, query_result: pa.Table, total_result: int):
+        sorted_indices = pc.sort_indices(query_result, sort_keys=[(k, 'ascending') for k in self.SORTING_COLUMNS], null_placement='at_start')
+        if self._props.has_marker():  # keyset condition is already in the filter
+            return sorted_indices.slice(0, self._props.size)
+        if total_result < 0:
+            raise ValueError('total_result is not calculated for old pagination logic. This should not happen. Something has horribly gone wrong')
+        return sorted_indices.slice(self._props.start_at, self._props.size)
+
+    def __get_dataset(self, file_paths: list):
+        arrow_schema = InSituSchemaRegistry().get_arrow_schema()
+        partition_schema = pa.schema([arrow_schema.field(k) for k in self.PARTITION_COLUMNS])
+        return ds.dataset(file_paths,
+                          schema=arrow_schema,
+                          format='parquet',
+                          filesystem=ArrowUtils.get_file_system(self._parquet_name),
+                          partitioning=ds.partitioning(partition_schema, flavor='hive'),
+                          partition_base_dir=ArrowUtils.strip_scheme(self._parquet_name))
+
+    def __count_files(self, parquet_names: list, condition_manager: ParquetQueryConditionManagementV4):
+        file_paths = list(set([ArrowUtils.strip_scheme(k.generate_file_path()) for k in parquet_names]))
+        return self.__get_dataset(file_paths).count_rows(filter=self.get_filter_expression(condition_manager))
+
+    def __get_page_table(self, condition_manager: ParquetQueryConditionManagementV4, dataset: ds.Dataset):
+        query_timer: QueryTimer = condition_manager.query_timer
+        output_columns = self.__get_output_columns(condition_manager, dataset.schema)
+        reading_columns = self._get_reading_columns(condition_manager, dataset.schema.names)
+        with query_timer.stage(QueryTimer.READ):
+            query_result = dataset.to_table(columns=reading_columns, filter=self.get_filter_expression(condition_manager), use_threads=True)
+        total_result = -1 if self._props.has_marker() else query_result.num_rows
+        with query_timer.stage(QueryTimer.PAGE_FETCH):
+            page_result = query_result.take(self.__get_page_indices(query_result, total_result)).select(output_columns)
+        query_timer.set_counter(QueryTimer.RESULT_ROWS, page_result.num_rows)
+        return page_result, total_result
+
+    def search(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        return self.__search(condition_manager, False)
+
+    def search_table(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        return self.__search(condition_manager, True)
+
+    def __search(self, condition_manager: ParquetQueryConditionManagementV4, is_columnar: bool) -> dict:
+        query_timer: QueryTimer = condition_manager.query_timer
+        if len(condition_manager.parquet_names) < 1:
+            LOGGER.fatal(f'cannot find any in ES. returning None instead of searching entire parquet directory for now. ')
+            return {
+                'total': 0,
+                'is_total_exact': True,
+                'results': pa.table({}) if is_columnar else [],
+            }
+        dataset = self.__get_dataset(self.__get_distinct_file_paths(condition_manager))
+        if self._props.size < 1:
+            with query_timer.stage(QueryTimer.COUNT):
+                total_result, is_total_exact = self._get_total_count(condition_manager,
+                                                                     lambda: dataset.count_rows(filter=self.get_filter_expression(condition_manager)),
+                                                                     lambda parquet_names: self.__count_files(parquet_names, condition_manager))
+            LOGGER.debug(f'returning only the size: {total_result}')
+            return {
+                'total': total_result,
+                'is_total_exact': is_total_exact,
+                'results': pa.table({}) if is_columnar else [],
+            }
+        page_result, total_result = self.__get_page_table(condition_manager, dataset)
+        if not is_columnar:
+            with query_timer.stage(QueryTimer.SERIALIZATION):
+                page_result = ArrowUtils.to_dict_list(page_result)
+        return {
+            'total': total_result,
+            'is_total_exact': not self._props.has_marker(),
+            'results': page_result,
+        }
+
+    def stream(self, condition_manager: ParquetQueryConditionManagementV4):
+        """
+        the filtered rows are sorted in memory (bounded by `arrow_max_rows`) like `search`.
+        only the page is converted to python objects, STREAM_BATCH_SIZE rows at a time.
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: generator of dict
+        """
+        if self._props.size < 1 or len(condition_manager.parquet_names) < 1:
+            return
+        dataset = self.__get_dataset(self.__get_distinct_file_paths(condition_manager))
+        page_result, _ = self.__get_page_table(condition_manager, dataset)
+        for each_batch in page_result.to_batches(max_chunksize=self.STREAM_BATCH_SIZE):
+            with condition_manager.query_timer.stage(QueryTimer.SERIALIZATION):
+                batch_rows = ArrowUtils.to_dict_list(pa.Table.from_batches([each_batch], schema=page_result.schema))
+            yield from batch_rows
+        return
+
+    def explain(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        """
+        pyarrow has no plan to show. the filter expression is what is pushed down to the row group statistics.
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: dict
+        """
+        filter_expression = self.get_filter_expression(condition_manager)
+        return {
+            'reading_columns': self._get_reading_columns(condition_manager, InSituSchemaRegistry().get_arrow_schema().names),
+            'pushed_filters': [] if filter_expression is None else [str(filter_expression)],
+            'physical_plan': None,
+        }
@@ -0,0 +1,31 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from parquet_flask.utils.factory_abstract import FactoryAbstract
+
+
+class QueryEngineFactory(FactoryAbstract):
+    SPARK = 'SPARK'
+    ARROW = 'ARROW'
+
+    def get_instance(self, class_type, **kwargs):
+        ct = class_type.upper()
+        if ct == self.SPARK:
+            from parquet_flask.io_logic.query_engine_spark import QueryEngineSpark
+            return QueryEngineSpark(kwargs['props'], kwargs['parquet_name'], spark_session=kwargs.get('spark_session', None))
+        if ct == self.ARROW:
+            from parquet_flask.io_logic.query_engine_arrow import QueryEngineArrow
+            return QueryEngineArrow(kwargs['props'], kwargs['parquet_name'], kwargs['missing_depth_value'])
+        raise ModuleNotFoundError(f'cannot find query engine class for {ct}')
@@ -0,0 +1,407 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from itertools import islice
+
+import pyarrow as pa
+import pyspark.sql.functions as F
+from pyspark import StorageLevel
+from pyspark.sql.pandas.types import to_arrow_schema
+from pyspark.sql.session import SparkSession
+from pyspark.sql.types import StructType
+from pyspark.sql.dataframe import DataFrame
+from pyspark.sql.utils import AnalysisException
+
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_cursor_manager import QueryCursorManager
+from parquet_flask.io_logic.query_engine_abstract import QueryEngineAbstract
+from parquet_flask.io_logic.query_timer import QueryTimer
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
+from parquet_flask.io_logic.spark_row_index import SparkRowIndex
+from parquet_flask.utils.config import Config
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryEngineSpark(QueryEngineAbstract):
+    DEFAULT_TOP_K_MAX_ROWS = 10000
+    PAGE_INDEX_COL = '_page_index'
+
+    def __init__(self, props: QueryProps, parquet_name: str, spark_session: SparkSession = None):
+        super().__init__(props, parquet_name)
+        self.__spark_session = spark_session
+        self.__top_k_max_rows = int(Config().get_value(Config.top_k_max_rows, QueryEngineSpark.DEFAULT_TOP_K_MAX_ROWS))
+
+    def __retrieve_spark(self):
+        if self.__spark_session is not None:
+            return self.__spark_session
+        from parquet_flask.io_logic.retrieve_spark_session import RetrieveSparkSession
+        config = Config()
+        spark = RetrieveSparkSession().retrieve_spark_session(config.get_spark_app_name(), config.get_value(Config.master_spark_url))
+        return spark
+
+    def __strip_duplicates_maintain_order(self, condition_manager: ParquetQueryConditionManagementV4):
+        LOGGER.warning(f'length of parquet_names: {len(condition_manager.parquet_names)}')
+        distinct_list = []
+        distinct_set = set([])
+        for each in condition_manager.parquet_names:
+            each: PartitionedParquetPath = each
+            parquet_path = each.generate_path()
+            if parquet_path in distinct_set:
+                continue
+            distinct_set.add(parquet_path)
+            distinct_list.append(each)
+        LOGGER.warning(f'length of distinct_parquet_names: {len(distinct_list)}')
+        LOGGER.warning(f'distinct_parquet_names: {distinct_set}')
+        return distinct_list
+
+    def __get_read_struct(self, condition_manager: ParquetQueryConditionManagementV4):
+        """
+        projection is applied when the files are read, not only by the final `select`.
+        partition columns are always kept so that their types come from the schema instead of being inferred from the paths.
+        :param condition_manager:
+        :return: StructType
+        """
+        cdms_spark_struct = InSituSchemaRegistry().get_partitioned_spark_struct()
+        reading_columns = set(self._get_reading_columns(condition_manager, cdms_spark_struct.names) + self.PARTITION_COLUMNS)
+        LOGGER.debug(f'reading columns: {reading_columns}')
+        return StructType([k for k in cdms_spark_struct.fields if k.name in reading_columns])
+
+    def __get_existing_paths(self, parquet_paths: list, spark: SparkSession, cdms_spark_struct) -> list:
+        existing_paths = []
+        for each in parquet_paths:
+            try:
+                spark.read.schema(cdms_spark_struct).option('basePath', self._parquet_name).parquet(each)
+                existing_paths.append(each)
+            except AnalysisException as analysis_exception:
+                LOGGER.exception(f'failed to retrieve data from spark for: {each}')
+        return existing_paths
+
+    def get_unioned_read_df(self, condition_manager: ParquetQueryConditionManagementV4, spark: SparkSession) -> DataFrame:
+        """
+        single read over all distinct partition paths.
+        with `basePath`, spark derives provider, project, platform_code, ... from the paths.
+        planning time stays flat instead of growing with one `union` per path.
+        :param condition_manager:
+        :param spark:
+        :return:
+        """
+        cdms_spark_struct = self.__get_read_struct(condition_manager)
+        if len(condition_manager.parquet_names) < 1:
+            LOGGER.fatal(f'cannot find any in ES. returning None instead of searching entire parquet directory for now. ')
+            return None
+            # read_df: DataFrame = spark.read.schema(cdms_spark_struct).parquet(condition_manager.parquet_name)
+            # return read_df
+        query_timer: QueryTimer = condition_manager.query_timer
+        with query_timer.stage(QueryTimer.PATH_DEDUPE):
+            distinct_parquet_paths = [k.generate_path() for k in self.__strip_duplicates_maintain_order(condition_manager)]
+        query_timer.set_counter(QueryTimer.DISTINCT_PATHS, len(distinct_parquet_paths))
+        with query_timer.stage(QueryTimer.READ):
+            try:
+                return spark.read.schema(cdms_spark_struct).option('basePath', self._parquet_name).parquet(*distinct_parquet_paths)
+            except AnalysisException as analysis_exception:
+                LOGGER.exception(f'failed to read all paths at once. removing missing paths')
+            distinct_parquet_paths = self.__get_existing_paths(distinct_parquet_paths, spark, cdms_spark_struct)
+            if len(distinct_parquet_paths) < 1:
+                return None
+            return spark.read.schema(cdms_spark_struct).option('basePath', self._parquet_name).parquet(*distinct_parquet_paths)
+
+    def __get_paged_result(self, result_df: DataFrame, total_result: int):
+        remaining_size = total_result - self._props.start_at
+        current_page_size = remaining_size if remaining_size < self._props.size else self._props.size
+        if current_page_size < 1:
+            return []
+        if self._props.start_at + current_page_size <= self.__top_k_max_rows:
+            return self.__get_top_k_page(result_df, current_page_size)
+        result = result_df.limit(self._props.start_at + current_page_size).tail(current_page_size)
+        return result
+
+    def __get_top_k_page(self, result_df: DataFrame, current_page_size: int):
+        """
+        sort + limit + collect is planned as TakeOrderedAndProject.
+        each partition keeps a bounded heap of start_at + size rows which are merged on the driver. no global sort / shuffle.
+        `tail` is not used as it forces a full sort.
+        :param result_df:
+        :param current_page_size:
+        :return:
+        """
+        result = result_df.limit(self._props.start_at + current_page_size).collect()
+        return result[self._props.start_at:]
+
+    def __get_paged_result_v2(self, result_df: DataFrame):
+        offset = self._props.start_at + self._props.size
+        limit = self._props.size
+        df = result_df.withColumn('_id', F.monotonically_increasing_id())
+        df = df.where(F.col('_id').between(offset, offset + limit))
+        return df.collect()
+
+    def __get_sorting_params(self, query_result: DataFrame):
+        return [query_result[k].asc() for k in self.SORTING_COLUMNS]
+
+    def __get_nth_first_page(self, query_result: DataFrame):
+        """
+        keyset condition is already a part of the where clause.
+        sort + limit is planned as a bounded top-K. cost of each page is independent of how deep it is.
+        :param query_result:
+        :return:
+        """
+        return query_result.limit(self._props.size).collect()
+
+    def __get_page(self, query_result: DataFrame, total_result: int):
+        if self._props.size == 0:
+            return []
+        if self._props.has_marker():  # pagination new logic
+            return self.__get_nth_first_page(query_result)
+        if total_result < 0:
+            raise ValueError('total_result is not calculated for old pagination logic. This should not happen. Something has horribly gone wrong')
+        # result = self.__get_paged_result_v2(query_result)
+        return self.__get_paged_result(query_result, total_result)
+
+    def __collect_as_arrow(self, result_df: DataFrame) -> pa.Table:
+        """
+        record batches are sent from the executors as they are. no `Row` object is created on the driver.
+        :param result_df:
+        :return:
+        """
+        arrow_batches = result_df._collect_as_arrow()
+        if len(arrow_batches) < 1:
+            return pa.Table.from_batches([], schema=to_arrow_schema(result_df.schema))
+        return pa.Table.from_batches(arrow_batches)
+
+    def __get_deep_page_table(self, query_result: DataFrame, start_at: int, page_size: int) -> pa.Table:
+        """
+        rows of the range partitioned sort are numbered in spark and only the rows of the page are collected. (see SparkRowIndex)
+        :param query_result:
+        :param start_at:
+        :param page_size:
+        :return:
+        """
+        numbered_result = SparkRowIndex.number_rows(query_result).persist(StorageLevel.MEMORY_AND_DISK)  # the counts and the page must see the same partitions
+        try:
+            page_result = SparkRowIndex.get_indexed_result(numbered_result, self.PAGE_INDEX_COL, start_at, start_at + page_size)
+            return self.__collect_as_arrow(page_result.drop(self.PAGE_INDEX_COL))
+        finally:
+            numbered_result.unpersist()
+
+    def __get_page_table(self, query_result: DataFrame, total_result: int) -> pa.Table:
+        """
+        columnar version of `__get_page`. pages within `top_k_max_rows` are sliced out of the bounded top-K with zero copy.
+        deeper pages are filtered by the row index in spark so that the earlier rows are not collected.
+        :param query_result:
+        :param total_result:
+        :return:
+        """
+        if self._props.has_marker():
+            return self.__collect_as_arrow(query_result.limit(self._props.size))
+        if total_result < 0:
+            raise ValueError('total_result is not calculated for old pagination logic. This should not happen. Something has horribly gone wrong')
+        remaining_size = total_result - self._props.start_at
+        current_page_size = remaining_size if remaining_size < self._props.size else self._props.size
+        if current_page_size < 1:
+            return self.__collect_as_arrow(query_result.limit(0))
+        if self._props.start_at + current_page_size > self.__top_k_max_rows:
+            return self.__get_deep_page_table(query_result, self._props.start_at, current_page_size)
+        return self.__collect_as_arrow(query_result.limit(self._props.start_at + current_page_size)).slice(self._props.start_at)
+
+    def __filter(self, read_df: DataFrame, condition_manager: ParquetQueryConditionManagementV4):
+        predicate = condition_manager.predicate
+        return read_df if predicate is None else read_df.where(predicate.to_spark_column())
+
+    def __count_files(self, parquet_names: list, condition_manager: ParquetQueryConditionManagementV4, spark: SparkSession):
+        cdms_spark_struct = self.__get_read_struct(condition_manager)
+        file_paths = [k.generate_file_path() for k in parquet_names]
+        return self.__filter(spark.read.schema(cdms_spark_struct).option('basePath', self._parquet_name).parquet(*file_paths), condition_manager).count()
+
+    def __is_creating_cursor(self):
+        return self._props.use_cursor is True and not self._props.has_marker() and QueryCursorManager().is_enabled
+
+    def __get_sorted_result(self, condition_manager: ParquetQueryConditionManagementV4, spark: SparkSession):
+        read_df: DataFrame = self.get_unioned_read_df(condition_manager, spark)
+        if read_df is None:
+            return None
+        with condition_manager.query_timer.stage(QueryTimer.READ):
+            query_result = self.__filter(read_df, condition_manager)
+            return query_result.sort(self.__get_sorting_params(query_result))
+
+    def __select_columns(self, condition_manager: ParquetQueryConditionManagementV4, query_result: DataFrame):
+        if len(condition_manager.columns) > 0:
+            return query_result.select(condition_manager.columns)
+        return query_result.drop(*self.REMOVING_COLUMNS)
+
+    def __retrieve_timed_spark(self, condition_manager: ParquetQueryConditionManagementV4):
+        with condition_manager.query_timer.stage(QueryTimer.SPARK_SESSION):
+            return self.__retrieve_spark()
+
+    def search(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        spark = self.__retrieve_timed_spark(condition_manager)
+        with SparkJobScope(spark, SparkJobScope.QUERY_POOL, 'query'):
+            return self.__search(condition_manager, spark, False)
+
+    def search_table(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        spark = self.__retrieve_timed_spark(condition_manager)
+        with SparkJobScope(spark, SparkJobScope.QUERY_POOL, 'columnar query'):
+            return self.__search(condition_manager, spark, True)
+
+    def __search(self, condition_manager: ParquetQueryConditionManagementV4, spark: SparkSession, is_columnar: bool) -> dict:
+        query_timer: QueryTimer = condition_manager.query_timer
+        LOGGER.debug(f'__parquet_name: {condition_manager.parquet_name}')
+        query_result = self.__get_sorted_result(condition_manager, spark)
+        if query_result is None:
+            return {
+                'total': 0,
+                'is_total_exact': True,
+                'results': pa.table({}) if is_columnar else [],
+            }
+        with query_timer.stage(QueryTimer.COUNT):
+            total_result, is_total_exact = self._get_total_count(condition_manager,
+                                                                 lambda: query_result.count(),
+                                                                 lambda parquet_names: self.__count_files(parquet_names, condition_manager, spark))
+        if self._props.size < 1:
+            LOGGER.debug(f'returning only the size: {total_result}')
+            return {
+                'total': total_result,
+                'is_total_exact': is_total_exact,
+                'results': pa.table({}) if is_columnar else [],
+            }
+        # result = query_result.withColumn('_id', F.monotonically_increasing_id())
+        # result = result.where(F.col('_id').between(self.__props.start_at, self.__props.start_at + self.__props.size)).drop(*removing_cols)
+        query_result = self.__select_columns(condition_manager, query_result)
+        LOGGER.debug(f'<delay_check> returning size : {total_result}')
+        if self.__is_creating_cursor():
+            with query_timer.stage(QueryTimer.PAGE_FETCH):
+                cursor_id = QueryCursorManager().create(query_result, spark)
+                read_cursor = QueryCursorManager().read_table if is_columnar else QueryCursorManager().read_page
+                result = read_cursor(cursor_id, self._props.start_at, self._props.size)
+            return {
+                'total': total_result,
+                'is_total_exact': is_total_exact,
+                'results': result,
+                'cursor_id': cursor_id,
+            }
+        if is_columnar:
+            with query_timer.stage(QueryTimer.PAGE_FETCH):
+                result = self.__get_page_table(query_result, total_result)
+            query_timer.set_counter(QueryTimer.RESULT_ROWS, result.num_rows)
+            return {
+                'total': total_result,
+                'is_total_exact': is_total_exact,
+                'results': result,
+            }
+        with query_timer.stage(QueryTimer.PAGE_FETCH):
+            result = self.__get_page(query_result, total_result)
+        query_result.unpersist()
+        query_timer.set_counter(QueryTimer.RESULT_ROWS, len(result))
+        # spark.stop()
+        with query_timer.stage(QueryTimer.SERIALIZATION):
+            result = [k.asDict() for k in result]
+        return {
+            'total': total_result,
+            'is_total_exact': is_total_exact,
+            'results': result,
+        }
+
+    def __get_pushed_filters(self, query_result: DataFrame) -> list:
+        """
+        from the file scans of the physical plan before adaptive execution.
+        `PushedFilters` in the plan string is cut at `spark.sql.maxMetadataStringLength` characters.
+        :param query_result:
+        :return: list of str
+        """
+        pushed_filters = []
+        leaf_nodes = query_result._jdf.queryExecution().sparkPlan().collectLeaves().iterator()
+        while leaf_nodes.hasNext():
+            leaf_node = leaf_nodes.next()
+            if leaf_node.getClass().getSimpleName() != 'FileSourceScanExec':
+                continue
+            each_filters = leaf_node.pushedDownFilters().iterator()
+            while each_filters.hasNext():
+                pushed_filters.append(each_filters.next().toString())
+        return pushed_filters
+
+    def explain(self, condition_manager: ParquetQueryConditionManagementV4) -> dict:
+        """
+        plan of the page which `search` collects (the filtered rows when only the total is requested).
+        nothing is scanned. the files are only listed, which is a spark job when there are many paths.
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: dict
+        """
+        spark = self.__retrieve_spark()
+        with SparkJobScope(spark, SparkJobScope.QUERY_POOL, 'explain'):
+            query_result = self.__get_sorted_result(condition_manager, spark)
+            if query_result is None:
+                return {
+                    'reading_columns': [],
+                    'pushed_filters': [],
+                    'physical_plan': None,
+                }
+            if self._props.size > 0:
+                page_end = self._props.size if self._props.has_marker() else self._props.start_at + self._props.size
+                query_result = self.__select_columns(condition_manager, query_result).limit(page_end)
+            return {
+                'reading_columns': self.__get_read_struct(condition_manager).names,
+                'pushed_filters': self.__get_pushed_filters(query_result),
+                'physical_plan': spark._jvm.PythonSQLUtils.explainString(query_result._jdf.queryExecution(), 'formatted'),
+            }
+
+    def stream(self, condition_manager: ParquetQueryConditionManagementV4):
+        """
+        rows are pulled to the driver one partition at a time with `toLocalIterator`.
+        pages within `top_k_max_rows` come from the bounded top-K.
+        deeper pages number the rows of the range partitioned sort in spark and keep only the rows of the page. (see SparkRowIndex)
+        so only the page reaches the driver, and the memory on the driver is limited by the page size.
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: generator of dict
+        """
+        if self._props.size < 1:
+            return
+        query_timer: QueryTimer = condition_manager.query_timer
+        spark = self.__retrieve_timed_spark(condition_manager)
+        numbered_result = None
+        try:
+            with SparkJobScope(spark, SparkJobScope.QUERY_POOL, 'streaming query'):
+                # listing the files and planning the read run jobs as well. so the scope starts before the sorted result is built.
+                # the serving thread of the iterator is created here and inherits the pool. its jobs run while the rows are pulled,
+                # possibly from other threads of BlockingExecutor. so the scope does not span the yields.
+                query_result = self.__get_sorted_result(condition_manager, spark)
+                if query_result is None:
+                    return
+                query_result = self.__select_columns(condition_manager, query_result)
+                start_at = 0 if self._props.has_marker() else self._props.start_at
+                if start_at + self._props.size <= self.__top_k_max_rows:
+                    page_result = query_result.limit(start_at + self._props.size)
+                else:
+                    numbered_result = SparkRowIndex.number_rows(query_result).persist(StorageLevel.MEMORY_AND_DISK)  # the counts and the page must see the same partitions
+                    with query_timer.stage(QueryTimer.PAGE_FETCH):
+                        page_result = SparkRowIndex.get_indexed_result(numbered_result, self.PAGE_INDEX_COL, start_at, start_at + self._props.size)\
+                            .drop(self.PAGE_INDEX_COL)
+                    start_at = 0
+                local_iterator = page_result.toLocalIterator(prefetchPartitions=False)
+            page_rows = islice(local_iterator, start_at, start_at + self._props.size)
+            while True:
+                with query_timer.stage(QueryTimer.PAGE_FETCH):
+                    each = next(page_rows, None)
+                if each is None:
+                    return
+                query_timer.add_counter(QueryTimer.RESULT_ROWS)
+                with query_timer.stage(QueryTimer.SERIALIZATION):
+                    each = each.asDict()
+                yield each
+        finally:
+            if numbered_result is not None:
+                numbered_result.unpersist()
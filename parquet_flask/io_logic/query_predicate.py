@@ -0,0 +1,156 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import operator
+from datetime import datetime, timezone
+from functools import reduce
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyspark.sql.functions as F
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryPredicate:
+    """
+    typed predicate tree of the query conditions.
+    the same tree is rendered as a pyspark Column (`to_spark_column`) or a pyarrow compute Expression (`to_arrow_expression`)
+    so that no SQL string is parsed. values are literals and column names are plain references.
+    datetime values become timestamp literals so that spark can push them down to the parquet reader without casting strings.
+    """
+    COMPARE = 'COMPARE'
+    NOT_NULL = 'NOT_NULL'
+    AND = 'AND'
+    OR = 'OR'
+    COMPARISON_OPERATORS = {
+        '>=': operator.ge,
+        '<=': operator.le,
+        '>': operator.gt,
+        '=': operator.eq,
+    }
+
+    def __init__(self, predicate_type: str, col_name: str = None, comparison: str = None, val=None, children: list = None):
+        self.__predicate_type = predicate_type
+        self.__col_name = col_name
+        self.__comparison = comparison
+        self.__val = val
+        self.__children = [] if children is None else children
+
+    @property
+    def predicate_type(self):
+        return self.__predicate_type
+
+    @property
+    def col_name(self):
+        return self.__col_name
+
+    @property
+    def comparison(self):
+        return self.__comparison
+
+    @property
+    def val(self):
+        return self.__val
+
+    @property
+    def children(self):
+        return self.__children
+
+    def get_column_names(self) -> list:
+        """
+        :return: list | distinct column names referenced by this predicate in the order they appear
+        """
+        if self.__predicate_type in [QueryPredicate.COMPARE, QueryPredicate.NOT_NULL]:
+            return [self.__col_name]
+        column_names = []
+        for each in self.__children:
+            column_names.extend([k for k in each.get_column_names() if k not in column_names])
+        return column_names
+
+    @staticmethod
+    def compare(col_name: str, comparison: str, val):
+        if comparison not in QueryPredicate.COMPARISON_OPERATORS:
+            raise ValueError(f'unknown comparison: {comparison}')
+        return QueryPredicate(QueryPredicate.COMPARE, col_name=col_name, comparison=comparison, val=val)
+
+    @staticmethod
+    def is_not_null(col_name: str):
+        return QueryPredicate(QueryPredicate.NOT_NULL, col_name=col_name)
+
+    @staticmethod
+    def all_of(predicates: list):
+        return predicates[0] if len(predicates) == 1 else QueryPredicate(QueryPredicate.AND, children=predicates)
+
+    @staticmethod
+    def any_of(predicates: list):
+        return predicates[0] if len(predicates) == 1 else QueryPredicate(QueryPredicate.OR, children=predicates)
+
+    def __render(self, to_field, to_literal, to_not_null):
+        if self.__predicate_type == QueryPredicate.COMPARE:
+            return self.COMPARISON_OPERATORS[self.__comparison](to_field(self.__col_name), to_literal(self.__val))
+        if self.__predicate_type == QueryPredicate.NOT_NULL:
+            return to_not_null(to_field(self.__col_name))
+        rendered_children = [k.__render(to_field, to_literal, to_not_null) for k in self.__children]
+        if self.__predicate_type == QueryPredicate.AND:
+            return reduce(operator.and_, rendered_children)
+        if self.__predicate_type == QueryPredicate.OR:
+            return reduce(operator.or_, rendered_children)
+        raise ValueError(f'unknown predicate type: {self.__predicate_type}')
+
+    @staticmethod
+    def __to_arrow_literal(val):
+        if isinstance(val, datetime):
+            utc_dt = val if val.tzinfo is None else val.astimezone(timezone.utc).replace(tzinfo=None)
+            return pa.scalar(utc_dt, type=pa.timestamp('ns'))
+        return val
+
+    def to_spark_column(self):
+        """
+        needs an active spark context
+        :return: pyspark.sql.Column
+        """
+        return self.__render(F.col, F.lit, lambda k: k.isNotNull())
+
+    def to_arrow_expression(self):
+        """
+        datetime values are compared as timestamp[ns] in UTC. it is how `time_obj` is read by pyarrow.
+        :return: pyarrow.compute.Expression
+        """
+        return self.__render(pc.field, self.__to_arrow_literal, lambda k: k.is_valid())
+
+    @staticmethod
+    def __to_str_literal(val):
+        if isinstance(val, datetime):
+            return f"TIMESTAMP '{val.isoformat()}'"
+        if isinstance(val, str):
+            escaped_val = val.replace('\\', '\\\\').replace("'", "\\'")
+            return f"'{escaped_val}'"
+        return f'{val}'
+
+    def __str__(self):
+        """
+        SQL like representation for logs. it is never executed.
+        :return: str
+        """
+        if self.__predicate_type == QueryPredicate.COMPARE:
+            return f'{self.__col_name} {self.__comparison} {self.__to_str_literal(self.__val)}'
+        if self.__predicate_type == QueryPredicate.NOT_NULL:
+            return f'{self.__col_name} IS NOT NULL'
+        return f"({f' {self.__predicate_type} '.join([str(k) for k in self.__children])})"
+
+    def __repr__(self):
+        return str(self)
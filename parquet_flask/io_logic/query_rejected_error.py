@@ -0,0 +1,55 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class QueryRejectedError(Exception):
+    """
+    a query which is not run because of its estimated cost.
+    - 400: it is over the limits of a single query. it needs narrower parameters.
+    - 429: the budgets are in use by other queries. it can be retried after `retry_after` seconds.
+    """
+    def __init__(self, message: str, status_code: int, query_cost: dict, suggestions: list, retry_after: int = None):
+        super().__init__(message)
+        self.__message = message
+        self.__status_code = status_code
+        self.__query_cost = query_cost
+        self.__suggestions = suggestions
+        self.__retry_after = retry_after
+
+    @property
+    def status_code(self):
+        return self.__status_code
+
+    @property
+    def query_cost(self):
+        return self.__query_cost
+
+    @property
+    def suggestions(self):
+        return self.__suggestions
+
+    @property
+    def retry_after(self):
+        return self.__retry_after
+
+    def to_json(self) -> dict:
+        return {
+            'message': self.__message,
+            'estimated_cost': self.__query_cost,
+            'suggestions': self.__suggestions,
+        }
+
+    def get_headers(self) -> dict:
+        return {} if self.__retry_after is None else {'Retry-After': str(self.__retry_after)}
@@ -0,0 +1,260 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import math
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from time import time
+
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.singleton import Singleton
+from parquet_flask.utils.time_utils import TimeUtils
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryResultCache(metaclass=Singleton):
+    """
+    in-process LRU + TTL cache of query results (a single page) keyed on a canonical form of QueryProps.
+    entries are evicted from the least recently used one when the total size is over the memory budget.
+    queries see new files only when their parquet_stats documents are searchable. so ParquetStatsCatalog invalidates the entries
+    when it sees new documents. only those whose provider, project, platform, and time range overlap the documents are removed.
+    every invalidation increments the generation. a result of a query which started before it is not cached. (see `put`)
+    """
+    DEFAULT_TTL = 300
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    BBOX_DIGITS = 6
+    TIME_STR_LEN = len('2020-01-01T00:00:00')
+
+    def __init__(self):
+        config = Config()
+        self.__ttl = int(config.get_value(Config.query_cache_ttl, QueryResultCache.DEFAULT_TTL))
+        self.__max_bytes = int(config.get_value(Config.query_cache_max_bytes, QueryResultCache.DEFAULT_MAX_BYTES))
+        self.__entries = OrderedDict()
+        self.__total_bytes = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+        self.__generation = 0
+        self.__stale_puts = 0
+
+    @property
+    def is_enabled(self):
+        return self.__ttl > 0 and self.__max_bytes > 0
+
+    def __round_lat_lon(self, lat_lon):
+        if lat_lon is None:
+            return None
+        return [round(float(k), QueryResultCache.BBOX_DIGITS) for k in lat_lon]
+
+    def get_cache_key(self, props: QueryProps) -> str:
+        """
+        canonical form of QueryProps.
+        platform codes are sorted as their order does not change the result. bbox is rounded.
+        columns and variables are not sorted as they decide the order of the response columns.
+        :param props:
+        :return: str
+        """
+        platform_code = props.platform_code
+        if isinstance(platform_code, list):
+            platform_code = sorted(set(platform_code))
+        canonical_props = {
+            'provider': props.provider,
+            'project': props.project,
+            'platform_code': platform_code,
+            'min_datetime': props.min_datetime,
+            'max_datetime': props.max_datetime,
+            'min_depth': None if props.min_depth is None else float(props.min_depth),
+            'max_depth': None if props.max_depth is None else float(props.max_depth),
+            'min_lat_lon': self.__round_lat_lon(props.min_lat_lon),
+            'max_lat_lon': self.__round_lat_lon(props.max_lat_lon),
+            'variable': props.variable,
+            'columns': props.columns,
+            'quality_flag': props.quality_flag,
+            'start_at': props.start_at,
+            'size': props.size,
+            'marker_platform_code': props.marker_platform_code,
+            'marker_depth': None if props.marker_depth is None else float(props.marker_depth),
+            'marker_lat_lon': props.marker_lat_lon,
+            'use_cursor': props.use_cursor,
+        }
+        return json.dumps(canonical_props, sort_keys=True)
+
+    def __get_scope(self, props: QueryProps) -> dict:
+        platform_code = props.platform_code
+        if platform_code is not None and not isinstance(platform_code, list):
+            platform_code = [platform_code]
+        return {
+            CDMSConstants.provider_col: props.provider,
+            CDMSConstants.project_col: props.project,
+            CDMSConstants.platform_code_col: None if platform_code is None else set(platform_code),
+            CDMSConstants.min_datetime: None if props.min_datetime is None else props.min_datetime[:QueryResultCache.TIME_STR_LEN],
+            CDMSConstants.max_datetime: None if props.max_datetime is None else props.max_datetime[:QueryResultCache.TIME_STR_LEN],
+        }
+
+    def __remove(self, cache_key: str):
+        entry = self.__entries.pop(cache_key)
+        self.__total_bytes -= entry['size']
+        return
+
+    def get(self, props: QueryProps):
+        """
+        :param props:
+        :return: a copy of the cached result or None
+        """
+        if not self.is_enabled:
+            return None
+        cache_key = self.get_cache_key(props)
+        with self.__lock:
+            entry = self.__entries.get(cache_key, None)
+            if entry is not None and entry['expires_at'] < time():
+                self.__remove(cache_key)
+                entry = None
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(cache_key)
+            self.__hits += 1
+            return deepcopy(entry['result'])
+
+    def get_generation(self) -> int:
+        """
+        :return: int | it changes whenever cached results are invalidated
+        """
+        return self.__generation
+
+    def put(self, props: QueryProps, result: dict, generation: int = None):
+        """
+        :param props:
+        :param result:
+        :param generation: `get_generation` before the query looked up its files. the result is dropped if it has changed since then
+        :return: None
+        """
+        if not self.is_enabled:
+            return
+        cache_key = self.get_cache_key(props)
+        result_size = len(cache_key) + len(json.dumps(result, default=str))
+        if result_size > self.__max_bytes:
+            LOGGER.debug(f'not caching the result as its size: {result_size} is over the budget: {self.__max_bytes}')
+            return
+        entry = {
+            'result': deepcopy(result),
+            'size': result_size,
+            'expires_at': time() + self.__ttl,
+            'scope': self.__get_scope(props),
+        }
+        with self.__lock:
+            if generation is not None and generation != self.__generation:
+                LOGGER.debug(f'not caching the result as it may miss files invalidated after the query started')
+                self.__stale_puts += 1
+                return
+            if cache_key in self.__entries:
+                self.__remove(cache_key)
+            self.__entries[cache_key] = entry
+            self.__total_bytes += result_size
+            while self.__total_bytes > self.__max_bytes:
+                self.__remove(next(iter(self.__entries)))
+                self.__evictions += 1
+        return
+
+    def __is_overlapping(self, scope: dict, provider: str, project: str, platform_codes: set, min_time: str, max_time: str):
+        if scope[CDMSConstants.provider_col] is not None and scope[CDMSConstants.provider_col] != provider:
+            return False
+        if scope[CDMSConstants.project_col] is not None and scope[CDMSConstants.project_col] != project:
+            return False
+        if scope[CDMSConstants.platform_code_col] is not None and platform_codes is not None and scope[CDMSConstants.platform_code_col].isdisjoint(platform_codes):
+            return False
+        if scope[CDMSConstants.min_datetime] is not None and max_time is not None and max_time < scope[CDMSConstants.min_datetime]:
+            return False
+        if scope[CDMSConstants.max_datetime] is not None and min_time is not None and min_time > scope[CDMSConstants.max_datetime]:
+            return False
+        return True
+
+    def invalidate(self, provider: str, project: str, platform_codes: set = None, min_time: str = None, max_time: str = None):
+        """
+        removes the cached results which may contain the rows of an ingested / replaced job.
+        None for any argument matches everything.
+        :param provider:
+        :param project:
+        :param platform_codes:
+        :param min_time: str | 2020-01-01T00:00:00Z
+        :param max_time: str | 2020-01-01T00:00:00Z
+        :return: int | number of removed entries
+        """
+        min_time = None if min_time is None else min_time[:QueryResultCache.TIME_STR_LEN]
+        max_time = None if max_time is None else max_time[:QueryResultCache.TIME_STR_LEN]
+        with self.__lock:
+            self.__generation += 1
+            invalid_keys = [k for k, v in self.__entries.items() if self.__is_overlapping(v['scope'], provider, project, platform_codes, min_time, max_time)]
+            for each in invalid_keys:
+                self.__remove(each)
+            self.__invalidations += len(invalid_keys)
+        LOGGER.debug(f'invalidated {len(invalid_keys)} cached results for provider: {provider}, project: {project}, platform: {platform_codes}, time: {min_time} - {max_time}')
+        return len(invalid_keys)
+
+    def invalidate_by_stats_docs(self, stats_docs: list):
+        """
+        invalidate with the provider, project, platform code, and time range of parquet_stats documents which became searchable.
+        :param stats_docs: list of parquet_stats documents (_source)
+        :return: int | number of removed entries
+        """
+        scopes = {}
+        for each in stats_docs:
+            scope_key = (each.get(CDMSConstants.provider_col), each.get(CDMSConstants.project_col))
+            scope = scopes.setdefault(scope_key, {'platform_codes': set([]), 'min_times': [], 'max_times': [], 'is_time_complete': True})
+            scope['platform_codes'].add(each.get(CDMSConstants.platform_code_col))
+            if each.get(CDMSConstants.min_datetime) is None or each.get(CDMSConstants.max_datetime) is None:
+                scope['is_time_complete'] = False
+                continue
+            scope['min_times'].append(each[CDMSConstants.min_datetime])
+            scope['max_times'].append(each[CDMSConstants.max_datetime])
+        invalidated_count = 0
+        for (provider, project), scope in scopes.items():
+            is_time_known = scope['is_time_complete'] and len(scope['min_times']) > 0
+            invalidated_count += self.invalidate(provider, project,
+                                                 None if None in scope['platform_codes'] else scope['platform_codes'],
+                                                 TimeUtils.get_time_str(math.floor(min(scope['min_times'])), in_ms=False) if is_time_known else None,
+                                                 TimeUtils.get_time_str(math.ceil(max(scope['max_times'])), in_ms=False) if is_time_known else None)
+        return invalidated_count
+
+    def clear(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__entries = OrderedDict()
+            self.__total_bytes = 0
+        return
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {
+                'enabled': self.is_enabled,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'invalidations': self.__invalidations,
+                'stale_puts': self.__stale_puts,
+                'generation': self.__generation,
+                'entries': len(self.__entries),
+                'total_bytes': self.__total_bytes,
+                'max_bytes': self.__max_bytes,
+                'ttl': self.__ttl,
+            }
@@ -0,0 +1,101 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """
+    seconds spent in each stage of a single query, and counters such as ES pages or distinct paths.
+    a stage which runs more than once (e.g. page fetch of a stream) is summed up.
+    stages are kept in the order they first ran. `log` writes them as one json line at INFO so that they can be aggregated.
+
+        query_timer = QueryTimer()
+        with query_timer.stage(QueryTimer.COUNT):
+            total = query_result.count()
+    """
+    ES_QUERY = 'es_query'
+    CATALOG_SEARCH = 'catalog_search'
+    PATH_COLLAPSE = 'path_collapse'
+    PATH_DEDUPE = 'path_dedupe'
+    ADMISSION = 'admission'
+    SPARK_SESSION = 'spark_session'
+    READ = 'read'
+    COUNT = 'count'
+    PAGE_FETCH = 'page_fetch'
+    SERIALIZATION = 'serialization'
+
+    ES_PAGES = 'es_pages'
+    ES_DOCUMENTS = 'es_documents'
+    DISTINCT_PATHS = 'distinct_paths'
+    RESULT_ROWS = 'result_rows'
+
+    def __init__(self):
+        self.__begin_time = perf_counter()
+        self.__end_time = None
+        self.__stages = {}
+        self.__counters = {}
+
+    @contextmanager
+    def stage(self, stage_name: str):
+        stage_begin_time = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_seconds(stage_name, perf_counter() - stage_begin_time)
+
+    def add_seconds(self, stage_name: str, seconds: float):
+        self.__stages[stage_name] = self.__stages.get(stage_name, 0.0) + seconds
+        return
+
+    def set_counter(self, counter_name: str, val):
+        self.__counters[counter_name] = val
+        return
+
+    def add_counter(self, counter_name: str, val: int = 1):
+        self.__counters[counter_name] = self.__counters.get(counter_name, 0) + val
+        return
+
+    def stop(self):
+        """
+        fixes `total_seconds`. it keeps growing until this is called
+        :return: None
+        """
+        if self.__end_time is None:
+            self.__end_time = perf_counter()
+        return
+
+    def to_json(self) -> dict:
+        end_time = perf_counter() if self.__end_time is None else self.__end_time
+        return {
+            'total_seconds': round(end_time - self.__begin_time, 6),
+            'stages': {k: round(v, 6) for k, v in self.__stages.items()},
+            'counters': dict(self.__counters),
+        }
+
+    def log(self, **details):
+        """
+        :param details: other json serializable keys of the log line. (e.g. method, engine)
+        :return: None
+        """
+        timing_log = dict(details)
+        timing_log.update(self.to_json())
+        LOGGER.info(f'query_timing: {json.dumps(timing_log, default=str)}')
+        return
@@ -40,6 +40,11 @@ QUERY_PROPS_SCHEMA = {
         'platform_code': {'type': 'array', 'items': {'type': 'string'}, 'minItems': 1},
         'provider': {'type': 'string'},
         'marker_platform_code': {'type': 'string'},
+        'marker_depth': {'type': 'number'},
+        'marker_lat_lon': {'type': 'array', 'items': {'type': 'number'}, 'minItems': 2, 'maxItems': 2},
+        'use_cursor': {'type': 'boolean'},
+        'cursor_id': {'type': 'string'},
+        'cursor_index': {'type': 'integer', 'minimum': 0},
         'project': {'type': 'string'},
         'min_depth': {'type': 'number'},
         'max_depth': {'type': 'number'},
@@ -56,6 +61,11 @@ class QueryProps:
     def __init__(self):
         self.__variable: list = []
         self.__marker_platform_code = None
+        self.__marker_depth = None
+        self.__marker_lat_lon = None
+        self.__use_cursor = False
+        self.__cursor_id = None
+        self.__cursor_index = 0
         self.__quality_flag = False
         self.__platform_code = None
         self.__project = None
@@ -84,6 +94,74 @@ class QueryProps:
         self.__marker_platform_code = val
         return
 
+    @property
+    def marker_depth(self):
+        return self.__marker_depth
+
+    @marker_depth.setter
+    def marker_depth(self, val):
+        """
+        :param val:
+        :return: None
+        """
+        self.__marker_depth = val
+        return
+
+    @property
+    def marker_lat_lon(self):
+        return self.__marker_lat_lon
+
+    @marker_lat_lon.setter
+    def marker_lat_lon(self, val):
+        """
+        :param val:
+        :return: None
+        """
+        self.__marker_lat_lon = val
+        return
+
+    def has_marker(self) -> bool:
+        return self.marker_platform_code is not None
+
+    @property
+    def use_cursor(self):
+        return self.__use_cursor
+
+    @use_cursor.setter
+    def use_cursor(self, val):
+        """
+        :param val:
+        :return: None
+        """
+        self.__use_cursor = val
+        return
+
+    @property
+    def cursor_id(self):
+        return self.__cursor_id
+
+    @cursor_id.setter
+    def cursor_id(self, val):
+        """
+        :param val:
+        :return: None
+        """
+        self.__cursor_id = val
+        return
+
+    @property
+    def cursor_index(self):
+        return self.__cursor_index
+
+    @cursor_index.setter
+    def cursor_index(self, val):
+        """
+        :param val:
+        :return: None
+        """
+        self.__cursor_index = val
+        return
+
     @property
     def variable(self) -> list:
         return self.__variable
@@ -146,6 +224,16 @@ class QueryProps:
             self.variable = input_json['variable']
         if 'marker_platform_code' in input_json:
             self.marker_platform_code = input_json['marker_platform_code']
+        if 'marker_depth' in input_json:
+            self.marker_depth = input_json['marker_depth']
+        if 'marker_lat_lon' in input_json:
+            self.marker_lat_lon = input_json['marker_lat_lon']
+        if 'use_cursor' in input_json:
+            self.use_cursor = input_json['use_cursor']
+        if 'cursor_id' in input_json:
+            self.cursor_id = input_json['cursor_id']
+        if 'cursor_index' in input_json:
+            self.cursor_index = input_json['cursor_index']
         return self
 
     @property
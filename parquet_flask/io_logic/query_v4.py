@@ -13,19 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import logging
-from datetime import datetime
+from contextlib import contextmanager
+from time import perf_counter
 
-import pyspark.sql.functions as F
-from parquet_flask.utils.file_utils import FileUtils
-from pyspark.sql.session import SparkSession
-from pyspark.sql.dataframe import DataFrame
-from pyspark.sql.functions import lit
-from pyspark.sql.types import Row
-from pyspark.sql.utils import AnalysisException
-
-from parquet_flask.io_logic.cdms_schema import CdmsSchema
 from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.query_admission_controller import QueryAdmissionController
+from parquet_flask.io_logic.query_cost_estimator import QueryCostEstimator
+from parquet_flask.io_logic.parquet_stats_catalog import ParquetStatsCatalog
 from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_cursor_manager import QueryCursorManager
+from parquet_flask.io_logic.query_engine_abstract import QueryEngineAbstract
+from parquet_flask.io_logic.query_engine_factory import QueryEngineFactory
+from parquet_flask.io_logic.query_result_cache import QueryResultCache
+from parquet_flask.io_logic.query_timer import QueryTimer
 from parquet_flask.io_logic.query_v2 import QueryProps
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
 from parquet_flask.utils.config import Config
@@ -35,11 +35,27 @@ LOGGER = logging.getLogger(__name__)
 
 
 class QueryV4:
-    def __init__(self, props=QueryProps()):
+    """
+    every stage of a query is timed in `query_timer`. it is logged as a `query_timing` json line when the query ends.
+    """
+    AUTO_ENGINE = 'AUTO'
+    CURSOR_SOURCE = 'cursor'
+    CACHE_SOURCE = 'cache'
+    ENGINE_SOURCE = 'engine'
+    DEFAULT_ARROW_MAX_FILES = 50
+    DEFAULT_ARROW_MAX_ROWS = 1000000
+
+    def __init__(self, props=QueryProps(), client_id: str = None):
+        """
+        :param props:
+        :param client_id: caller of the query for the per client budget of QueryAdmissionController
+        """
         self.__props = props
+        self.__client_id = client_id
+        self.__query_timer = QueryTimer()
+        self.__engine_type = None
+        self.__result_source = None
         config = Config()
-        self.__app_name = config.get_spark_app_name()
-        self.__master_spark = config.get_value(Config.master_spark_url)
         self.__parquet_name = config.get_value(Config.parquet_file_name)
         self.__es_config = {
             'es_url': config.get_value(Config.es_url),
@@ -48,164 +64,212 @@ class QueryV4:
         }
         self.__parquet_name = self.__parquet_name if not self.__parquet_name.endswith('/') else self.__parquet_name[:-1]
         self.__missing_depth_value = CDMSConstants.missing_depth_value
-        self.__conditions = []
-        self.__sorting_columns = [CDMSConstants.time_col, CDMSConstants.platform_code_col, CDMSConstants.depth_col, CDMSConstants.lat_col, CDMSConstants.lon_col]
+        self.__query_engine = config.get_value(Config.query_engine, QueryV4.AUTO_ENGINE).upper()
+        self.__arrow_max_files = int(config.get_value(Config.arrow_max_files, QueryV4.DEFAULT_ARROW_MAX_FILES))
+        self.__arrow_max_rows = int(config.get_value(Config.arrow_max_rows, QueryV4.DEFAULT_ARROW_MAX_ROWS))
         self.__set_missing_depth_val()
 
+    @property
+    def query_timer(self):
+        return self.__query_timer
+
     def __set_missing_depth_val(self):
         possible_missing_depth = Config().get_value(Config.missing_depth_value)
         if GeneralUtils.is_int(possible_missing_depth):
             self.__missing_depth_value = int(possible_missing_depth)
         return
 
-    def __retrieve_spark(self):
-        from parquet_flask.io_logic.retrieve_spark_session import RetrieveSparkSession
-        spark = RetrieveSparkSession().retrieve_spark_session(self.__app_name, self.__master_spark)
-        return spark
-
-    def __strip_duplicates_maintain_order(self, condition_manager: ParquetQueryConditionManagementV4):
-        LOGGER.warning(f'length of parquet_names: {len(condition_manager.parquet_names)}')
-        distinct_list = []
-        distinct_set = set([])
+    def select_engine_type(self, condition_manager: ParquetQueryConditionManagementV4, spark_session=None) -> str:
+        """
+        ARROW when the files from ES are few and small enough to be read in this process. SPARK otherwise.
+        the row count is the sum of `total` from the parquet_stats documents of the selected files.
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :param spark_session: an explicit spark session always uses SPARK
+        :return: str | QueryEngineFactory.SPARK or QueryEngineFactory.ARROW
+        """
+        if spark_session is not None:
+            return QueryEngineFactory.SPARK
+        if self.__query_engine != QueryV4.AUTO_ENGINE:
+            return self.__query_engine
+        file_stats = {}
         for each in condition_manager.parquet_names:
             each: PartitionedParquetPath = each
-            parquet_path = each.generate_path()
-            if parquet_path in distinct_set:
-                continue
-            distinct_set.add(parquet_path)
-            distinct_list.append(each)
-        LOGGER.warning(f'length of distinct_parquet_names: {len(distinct_list)}')
-        LOGGER.warning(f'distinct_parquet_names: {distinct_set}')
-        return distinct_list
-
-    def get_unioned_read_df(self, condition_manager: ParquetQueryConditionManagementV4, spark: SparkSession) -> DataFrame:
-        cdms_spark_struct = CdmsSchema().get_schema_from_json(FileUtils.read_json(Config().get_value(Config.in_situ_schema)))
-        if len(condition_manager.parquet_names) < 1:
-            LOGGER.fatal(f'cannot find any in ES. returning None instead of searching entire parquet directory for now. ')
-            return None
-            # read_df: DataFrame = spark.read.schema(cdms_spark_struct).parquet(condition_manager.parquet_name)
-            # return read_df
-        read_df_list = []
-        distinct_parquet_names = self.__strip_duplicates_maintain_order(condition_manager)
-        for each in distinct_parquet_names:
-            each: PartitionedParquetPath = each
-            try:
-                temp_df: DataFrame = spark.read.schema(cdms_spark_struct).parquet(each.generate_path())
-                for k, v in each.get_df_columns().items():
-                    temp_df: DataFrame = temp_df.withColumn(k, lit(v))
-                read_df_list.append(temp_df)
-            except Exception as e:
-                LOGGER.exception(f'failed to retrieve data from spark for: {each.generate_path()}')
-        if len(read_df_list) < 1:
-            return None
-        main_read_df: DataFrame = read_df_list[0]
-        for each in read_df_list[1:]:
-            main_read_df = main_read_df.union(each)
-        return main_read_df
-
-    def __get_paged_result(self, result_df: DataFrame, total_result: int):
-        remaining_size = total_result - self.__props.start_at
-        current_page_size = remaining_size if remaining_size < self.__props.size else self.__props.size
-        result = result_df.limit(self.__props.start_at + current_page_size).tail(current_page_size)
-        return result
+            if each.s3_url is None or each.total is None:
+                LOGGER.debug(f'missing s3_url or total in ES result. using spark: {each.file_stats}')
+                return QueryEngineFactory.SPARK
+            file_stats[each.s3_url] = each.total
+        total_rows = sum(file_stats.values())
+        LOGGER.debug(f'file count: {len(file_stats)}. total rows: {total_rows}')
+        if len(file_stats) > self.__arrow_max_files or total_rows > self.__arrow_max_rows:
+            return QueryEngineFactory.SPARK
+        return QueryEngineFactory.ARROW
 
-    def __get_paged_result_v2(self, result_df: DataFrame):
-        offset = self.__props.start_at + self.__props.size
-        limit = self.__props.size
-        df = result_df.withColumn('_id', F.monotonically_increasing_id())
-        df = df.where(F.col('_id').between(offset, offset + limit))
-        return df.collect()
-
-    def __is_in_old_page(self, current_item: dict) -> bool:
-        return current_item[CDMSConstants.time_col] == self.__props.min_datetime and current_item[CDMSConstants.platform_col]['code'] <= self.__props.marker_platform_code
-
-    def __get_sorting_params(self, query_result: DataFrame):
-        return [query_result[k].asc() for k in self.__sorting_columns]
-
-    def __get_nth_first_page(self, query_result: DataFrame):
-        result_head = query_result.where(f"{CDMSConstants.time_col} = '{self.__props.min_datetime}'").sort(self.__get_sorting_params(query_result)).collect()
-        new_index = -1
-        for i, each_row in enumerate(result_head):
-            each_row: Row = each_row
-            each_sha_256 = GeneralUtils.gen_sha_256_json_obj(each_row.asDict())
-            if each_sha_256 == self.__props.marker_platform_code:
-                new_index = i
-                break
-        if new_index < 0:
-            LOGGER.warning(f'comparing sha256: {self.__props.marker_platform_code}')
-            for each_row in result_head:
-                each_row: Row = each_row
-                each_sha_256 = GeneralUtils.gen_sha_256_json_obj(each_row.asDict())
-                LOGGER.warning(f'each row: {str(each_row)}. each_sha_256: {each_sha_256}')
-            raise ValueError(f'cannot find existing row. It should not happen.')
-        result_page = query_result.take(self.__props.size + new_index + 1)
-        result_tail = result_page[new_index + 1:]
-        return result_tail
-
-    def __get_page(self, query_result: DataFrame, total_result: int):
-        if self.__props.size == 0:
-            return []
-        if self.__props.marker_platform_code is not None:  # pagination new logic
-            return self.__get_nth_first_page(query_result)
-        if total_result < 0:
-            raise ValueError('total_result is not calculated for old pagination logic. This should not happen. Something has horribly gone wrong')
-        # result = self.__get_paged_result_v2(query_result)
-        return self.__get_paged_result(query_result, total_result)
-
-    def __get_total_count(self, query_result: DataFrame):
-        if self.__props.marker_platform_code is not None:
-            LOGGER.debug(f'not counting total since this is an Nth page')
-            return -1
-        LOGGER.debug(f'counting total')
-        return int(query_result.count())
+    def __get_condition_manager(self):
+        condition_manager = ParquetQueryConditionManagementV4(self.__parquet_name, self.__missing_depth_value, self.__es_config, self.__props, self.__query_timer)
+        condition_manager.manage_query_props()
+        return condition_manager
+
+    def __create_query_engine(self, engine_type: str, spark_session=None) -> QueryEngineAbstract:
+        LOGGER.debug(f'<delay_check> query engine: {engine_type}')
+        return QueryEngineFactory().get_instance(engine_type,
+                                                 props=self.__props,
+                                                 parquet_name=self.__parquet_name,
+                                                 missing_depth_value=self.__missing_depth_value,
+                                                 spark_session=spark_session)
+
+    def __get_query_engine(self, spark_session=None):
+        condition_manager = self.__get_condition_manager()
+        self.__engine_type = self.select_engine_type(condition_manager, spark_session)
+        self.__result_source = QueryV4.ENGINE_SOURCE
+        query_engine = self.__create_query_engine(self.__engine_type, spark_session)
+        return condition_manager, query_engine
+
+    @contextmanager
+    def __admit(self, condition_manager: ParquetQueryConditionManagementV4):
+        """
+        raises QueryRejectedError if the estimated cost is over the limits or the budgets stay in use by other queries.
+        the budget is held while the query is running.
+        :param condition_manager: ParquetQueryConditionManagementV4 which is already loaded with `manage_query_props`
+        :return: None
+        """
+        admission_begin_time = perf_counter()
+        cost_estimator = QueryCostEstimator(self.__props)
+        with QueryAdmissionController().admit(self.__client_id, cost_estimator.estimate(condition_manager), cost_estimator.get_suggestions):
+            self.__query_timer.add_seconds(QueryTimer.ADMISSION, perf_counter() - admission_begin_time)
+            yield
+        return
+
+    def __log_timing(self, method_name: str):
+        self.__query_timer.stop()
+        self.__query_timer.log(method=method_name, source=self.__result_source, engine=self.__engine_type, client_id=self.__client_id)
+        return
+
+    def __read_cursor(self, read_cursor):
+        """
+        :param read_cursor: QueryCursorManager().read_page or read_table
+        :return: page or None if the cursor is not available
+        """
+        with self.__query_timer.stage(QueryTimer.PAGE_FETCH):
+            cursor_page = read_cursor(self.__props.cursor_id, self.__props.cursor_index, self.__props.size)
+        if cursor_page is not None:
+            self.__result_source = QueryV4.CURSOR_SOURCE
+        return cursor_page
 
     def search(self, spark_session=None):
+        try:
+            return self.__search(spark_session)
+        finally:
+            self.__log_timing('search')
+
+    def __search(self, spark_session=None):
         LOGGER.debug(f'<delay_check> query_v4_search started')
-        condition_manager = ParquetQueryConditionManagementV4(self.__parquet_name, self.__missing_depth_value, self.__es_config, self.__props)
-        condition_manager.manage_query_props()
+        if self.__props.cursor_id is not None:
+            cursor_page = self.__read_cursor(QueryCursorManager().read_page)
+            if cursor_page is not None:
+                LOGGER.debug(f'<delay_check> returning page from cursor: {self.__props.cursor_id}')
+                return {
+                    'total': -1,
+                    'is_total_exact': False,
+                    'results': cursor_page,
+                    'cursor_id': self.__props.cursor_id,
+                }
+            LOGGER.debug(f'cursor is not available. running the query: {self.__props.cursor_id}')
+        query_result_cache = QueryResultCache()
+        cached_result = query_result_cache.get(self.__props)
+        if cached_result is not None:
+            LOGGER.debug(f'<delay_check> returning cached result')
+            self.__result_source = QueryV4.CACHE_SOURCE
+            return cached_result
+        cache_generation = query_result_cache.get_generation()  # before the files are searched
+        condition_manager, query_engine = self.__get_query_engine(spark_session)
+        with self.__admit(condition_manager):
+            result = query_engine.search(condition_manager)
+        query_result_cache.put(self.__props, result, cache_generation)
+        return result
+
+    def search_table(self, spark_session=None):
+        """
+        same as `search` except that `results` is a pyarrow table for columnar responses.
+        the result cache is not used as it holds json-like results.
+        :param spark_session:
+        :return: dict | {"total": int, "is_total_exact": bool, "results": pyarrow.Table}
+        """
+        try:
+            return self.__search_table(spark_session)
+        finally:
+            self.__log_timing('search_table')
+
+    def __search_table(self, spark_session=None):
+        LOGGER.debug(f'<delay_check> query_v4_search_table started')
+        if self.__props.cursor_id is not None:
+            cursor_page = self.__read_cursor(QueryCursorManager().read_table)
+            if cursor_page is not None:
+                LOGGER.debug(f'<delay_check> returning page from cursor: {self.__props.cursor_id}')
+                return {
+                    'total': -1,
+                    'is_total_exact': False,
+                    'results': cursor_page,
+                    'cursor_id': self.__props.cursor_id,
+                }
+            LOGGER.debug(f'cursor is not available. running the query: {self.__props.cursor_id}')
+        condition_manager, query_engine = self.__get_query_engine(spark_session)
+        with self.__admit(condition_manager):
+            return query_engine.search_table(condition_manager)
+
+    def stream(self, spark_session=None):
+        """
+        yields the rows of the page one by one. total is not counted. the result cache is not used
+        as caching would hold the whole page in memory.
+        :param spark_session:
+        :return: generator of dict
+        """
+        try:
+            yield from self.__stream(spark_session)
+        finally:
+            self.__log_timing('stream')
+        return
+
+    def __stream(self, spark_session=None):
+        LOGGER.debug(f'<delay_check> query_v4_stream started')
+        if self.__props.cursor_id is not None:
+            cursor_page = self.__read_cursor(QueryCursorManager().read_page)
+            if cursor_page is not None:
+                LOGGER.debug(f'<delay_check> streaming page from cursor: {self.__props.cursor_id}')
+                yield from cursor_page
+                return
+            LOGGER.debug(f'cursor is not available. running the query: {self.__props.cursor_id}')
+        condition_manager, query_engine = self.__get_query_engine(spark_session)
+        with self.__admit(condition_manager):  # held until the stream is finished or closed
+            yield from query_engine.stream(condition_manager)
+        return
 
-        conditions = ' AND '.join(condition_manager.conditions)
-        query_begin_time = datetime.now()
-        LOGGER.debug(f'<delay_check> query begins at {query_begin_time}')
-        spark = self.__retrieve_spark() if spark_session is None else spark_session
-        created_spark_session_time = datetime.now()
-        LOGGER.debug(f'<delay_check>spark session created at {created_spark_session_time}. duration: {created_spark_session_time - query_begin_time}')
-        LOGGER.debug(f'__parquet_name: {condition_manager.parquet_name}')
-        read_df: DataFrame = self.get_unioned_read_df(condition_manager, spark)
-        if read_df is None:
-            return {
-                'total': 0,
-                'results': [],
-            }
-        read_df_time = datetime.now()
-        LOGGER.debug(f'<delay_check> parquet read created at {read_df_time}. duration: {read_df_time - created_spark_session_time}')
-        query_result = read_df.where(conditions)
-        query_result = query_result.sort(self.__get_sorting_params(query_result))
-        query_time = datetime.now()
-        LOGGER.debug(f'<delay_check> parquet read filtered at {query_time}. duration: {query_time - read_df_time}')
-        LOGGER.debug(f'<delay_check> total duration: {query_time - query_begin_time}')
-        total_result = self.__get_total_count(query_result)
-        LOGGER.debug(f'<delay_check> total calc count duration: {datetime.now() - query_time}')
-        if self.__props.size < 1:
-            LOGGER.debug(f'returning only the size: {total_result}')
-            return {
-                'total': total_result,
-                'results': [],
-            }
-        query_time = datetime.now()
-        # result = query_result.withColumn('_id', F.monotonically_increasing_id())
-        removing_cols = [CDMSConstants.time_obj_col, CDMSConstants.year_col, CDMSConstants.month_col]
-        # result = result.where(F.col('_id').between(self.__props.start_at, self.__props.start_at + self.__props.size)).drop(*removing_cols)
-        if len(condition_manager.columns) > 0:
-            query_result = query_result.select(condition_manager.columns)
-        else:
-            query_result = query_result.drop(*removing_cols)
-        LOGGER.debug(f'<delay_check> returning size : {total_result}')
-        result = self.__get_page(query_result, total_result)
-        query_result.unpersist()
-        LOGGER.debug(f'<delay_check> total retrieval duration: {datetime.now() - query_time}')
-        # spark.stop()
-        return {
-            'total': total_result,
-            'results': [k.asDict() for k in result],
+    def explain(self, spark_session=None) -> dict:
+        """
+        what `search` would do for the same props without scanning any parquet file.
+        ES (or ParquetStatsCatalog) is still queried for the candidate files. the cursor and the result cache are not checked.
+        :param spark_session:
+        :return: dict
+        """
+        LOGGER.debug(f'<delay_check> query_v4_explain started')
+        condition_manager = self.__get_condition_manager()
+        engine_type = self.select_engine_type(condition_manager, spark_session)
+        cost_estimator = QueryCostEstimator(self.__props)
+        query_cost = cost_estimator.estimate(condition_manager)
+        admission_controller = QueryAdmissionController()
+        over_limits = admission_controller.get_over_limits(query_cost)
+        predicate = condition_manager.predicate
+        explanation = {
+            'es_dsl': condition_manager.es_dsl,
+            'parquet_stats_source': 'catalog' if ParquetStatsCatalog().is_ready else 'es',
+            'estimated_cost': query_cost,
+            'admission': {
+                'is_within_limits': len(over_limits) < 1,
+                'over_limits': over_limits,
+                'limits': admission_controller.limits,
+                'suggestions': [] if len(over_limits) < 1 else cost_estimator.get_suggestions(query_cost, admission_controller.limits),
+            },
+            'predicate': None if predicate is None else str(predicate),
+            'engine': engine_type,
         }
+        explanation.update(self.__create_query_engine(engine_type, spark_session).explain(condition_manager))
+        return explanation
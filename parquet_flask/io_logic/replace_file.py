@@ -18,6 +18,7 @@ import logging
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
 from parquet_flask.io_logic.ingest_new_file import IngestNewJsonFile
 from parquet_flask.io_logic.retrieve_spark_session import RetrieveSparkSession
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
 from parquet_flask.io_logic.sanitize_record import SanitizeRecord
 from parquet_flask.utils.config import Config
 from parquet_flask.utils.file_utils import FileUtils
@@ -52,11 +53,12 @@ class ReplaceJsonFile:
         input_json = SanitizeRecord(Config().get_value('in_situ_schema')).start(abs_file_path)
         spark_session = self.__sss.retrieve_spark_session(self.__app_name, self.__master_spark)
         spark_session.conf.set("spark.sql.sources.partitionOverwriteMode", "dynamic")
-        df_writer = IngestNewJsonFile.create_df(spark_session,
-                                                input_json[CDMSConstants.observations_key],
-                                                job_id,
-                                                input_json[CDMSConstants.provider_col],
-                                                input_json[CDMSConstants.project_col])
-        df_writer.mode(self.__mode).parquet(self.__parquet_name, compression='GZIP')
+        with SparkJobScope(spark_session, SparkJobScope.INGEST_POOL, f'replace job: {job_id}'):
+            df_writer = IngestNewJsonFile.create_df(spark_session,
+                                                    input_json[CDMSConstants.observations_key],
+                                                    job_id,
+                                                    input_json[CDMSConstants.provider_col],
+                                                    input_json[CDMSConstants.project_col])
+            df_writer.mode(self.__mode).parquet(self.__parquet_name, compression='GZIP')
         LOGGER.debug(f'finished writing parquet')
         return len(input_json[CDMSConstants.observations_key])
@@ -14,12 +14,15 @@
 # limitations under the License.
 import json
 import logging
+import os
+import tempfile
 from socket import gethostbyname, gethostname
 
 from pyspark import SparkConf
 from pyspark.sql import SparkSession
 
 from parquet_flask.io_logic.spark_constants import SparkConstants
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
 from parquet_flask.utils.config import Config
 from parquet_flask.utils.singleton import Singleton
 
@@ -27,10 +30,14 @@ LOGGER = logging.getLogger(__name__)
 
 
 class RetrieveSparkSession(metaclass=Singleton):
+    DEFAULT_QUERY_POOL_WEIGHT = 4
+    DEFAULT_INGEST_POOL_WEIGHT = 1
+    SCHEDULER_FILE_KEY = 'spark.scheduler.allocation.file'
 
     def __init__(self):
         self.__sparks = {}
         self.__spark_config = {
+            'spark.scheduler.mode': 'FAIR',  # queries and ingestion are in their own pools. see SparkJobScope
             'spark.executor.cores': '1',  # fixing to 1 core for now
             'spark.driver.port': '50243',  # a random port.
             'spark.jars.packages': 'org.apache.hadoop:hadoop-aws:3.2.0',  # crosscheck the version.
@@ -61,6 +68,25 @@ class RetrieveSparkSession(metaclass=Singleton):
             LOGGER.exception(f'Not loading extra config. unable to convert to JSON object. {possible_extra_spark_config}.')
         return self
 
+    def __write_scheduler_pools(self):
+        """
+        interactive queries get a larger weight and a minimum share so that long ingestion / statistics jobs
+        cannot hold every executor while queries wait. jobs in a pool run in FIFO order.
+        :return: str | path of the allocation file
+        """
+        config = Config()
+        pool_weights = {
+            SparkJobScope.QUERY_POOL: (int(config.get_value(Config.spark_query_pool_weight, self.DEFAULT_QUERY_POOL_WEIGHT)), 1),
+            SparkJobScope.INGEST_POOL: (int(config.get_value(Config.spark_ingest_pool_weight, self.DEFAULT_INGEST_POOL_WEIGHT)), 0),
+        }
+        pools = ''.join([f'<pool name="{k}"><schedulingMode>FIFO</schedulingMode><weight>{v[0]}</weight><minShare>{v[1]}</minShare></pool>'
+                         for k, v in pool_weights.items()])
+        scheduler_file = os.path.join(tempfile.gettempdir(), 'parquet_flask_fair_scheduler.xml')
+        with open(scheduler_file, 'w') as ff:
+            ff.write(f'<?xml version="1.0"?><allocations>{pools}</allocations>')
+        LOGGER.debug(f'scheduler pools: {pool_weights}')
+        return scheduler_file
+
     def __add_aws_cred(self, conf: SparkConf):
         if SparkConstants.CRED_PROVIDER_KEY not in self.__spark_config:  # assume simple
             raise EnvironmentError(f'missing {SparkConstants.CRED_PROVIDER_KEY} in spark_config. This should not happen')
@@ -83,6 +109,8 @@ class RetrieveSparkSession(metaclass=Singleton):
         conf = SparkConf()
         for k, v in self.__spark_config.items():
             conf.set(k, v)
+        if self.SCHEDULER_FILE_KEY not in self.__spark_config:
+            conf.set(self.SCHEDULER_FILE_KEY, self.__write_scheduler_pools())
         """
         spark.executor.memory                   3072m
 spark.hadoop.fs.s3a.impl                org.apache.hadoop.fs.s3a.S3AFileSystem
@@ -16,6 +16,7 @@
 import logging
 
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
 from parquet_flask.utils.file_utils import FileUtils
 from parquet_flask.utils.general_utils import GeneralUtils
 from parquet_flask.utils.parallel_json_validator import ParallelJsonValidator
@@ -57,8 +58,7 @@ class SanitizeRecord:
         self.__json_schema_path = json_schema_path
         if not FileUtils.file_exist(json_schema_path):
             raise ValueError('json_schema file does not exist: {}'.format(json_schema_path))
-        self.__json_schema = FileUtils.read_json(json_schema_path)
-        self.__schema_key_values = {k: v for k, v in self.__json_schema['definitions']['observation']['properties'].items()}
+        self.__schema_key_values = InSituSchemaRegistry().get_observation_properties(json_schema_path)
         self.__parallel_json_validator = ParallelJsonValidator()
 
     def __sanitize_record(self, data_blk):
@@ -77,7 +77,7 @@ class SanitizeRecord:
             'observations': eachChunk,
         } for eachChunk in GeneralUtils.chunk_list(data['observations'], 1000)]
         if not self.__parallel_json_validator.is_schema_loaded():
-            self.__parallel_json_validator.load_schema(self.__json_schema)
+            self.__parallel_json_validator.load_schema(InSituSchemaRegistry().get_schema(self.__json_schema_path))
         result, error = self.__parallel_json_validator.validate_json(chunked_data)
         return result, error
 
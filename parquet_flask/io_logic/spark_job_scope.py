@@ -0,0 +1,106 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import uuid
+
+from pyspark.sql import SparkSession
+
+from parquet_flask.io_logic.query_deadline import QueryDeadline
+from parquet_flask.io_logic.spark_pool_metrics import SparkPoolMetrics
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SparkJobScope:
+    """
+    runs the spark jobs of a request in a FAIR scheduler pool under its own job group.
+
+        with SparkJobScope(spark, SparkJobScope.QUERY_POOL, 'query'):
+            df.collect()
+
+    the pool and the job group are thread-local properties of the spark context (pinned thread mode is the default since spark 3.2).
+    the previous values are restored on exit as the threads of BlockingExecutor are reused by other requests.
+    on exit, the stage wait times of the job group are recorded in SparkPoolMetrics.
+    the job group is added to the QueryDeadline of the thread if there is one so that it is cancelled with the request.
+    """
+    QUERY_POOL = 'query'
+    INGEST_POOL = 'ingest'
+    POOL_KEY = 'spark.scheduler.pool'
+    JOB_GROUP_KEY = 'spark.jobGroup.id'
+    JOB_DESCRIPTION_KEY = 'spark.job.description'
+    INTERRUPT_ON_CANCEL_KEY = 'spark.job.interruptOnCancel'
+    __LOCAL_KEYS = [POOL_KEY, JOB_GROUP_KEY, JOB_DESCRIPTION_KEY, INTERRUPT_ON_CANCEL_KEY]
+
+    def __init__(self, spark: SparkSession, pool_name: str, description: str = ''):
+        self.__spark = spark
+        self.__pool_name = pool_name
+        self.__description = description
+        self.__job_group = f'{pool_name}_{uuid.uuid4()}'
+        self.__previous_values = {}
+
+    @property
+    def pool_name(self):
+        return self.__pool_name
+
+    @property
+    def job_group(self):
+        return self.__job_group
+
+    def __enter__(self):
+        spark_context = self.__spark.sparkContext
+        self.__previous_values = {k: spark_context.getLocalProperty(k) for k in self.__LOCAL_KEYS}
+        spark_context.setLocalProperty(self.POOL_KEY, self.__pool_name)
+        spark_context.setJobGroup(self.__job_group, self.__description, interruptOnCancel=True)
+        query_deadline = QueryDeadline.get_current()
+        if query_deadline is not None:
+            query_deadline.add_job_group(spark_context, self.__job_group)
+        return self
+
+    @staticmethod
+    def __to_millis(scala_date_option):
+        return scala_date_option.get().getTime() if scala_date_option.isDefined() else None
+
+    def __record_metrics(self):
+        """
+        stage times come from the status store of the driver.
+        it is updated by the listener bus asynchronously. stages which are not there yet are skipped.
+        :return: None
+        """
+        spark_context = self.__spark.sparkContext
+        job_ids = spark_context.statusTracker().getJobIdsForGroup(self.__job_group)
+        status_store = spark_context._jsc.sc().statusStore()
+        stage_waits = []
+        for each_job_id in job_ids:
+            stage_ids = status_store.job(each_job_id).stageIds().iterator()
+            while stage_ids.hasNext():
+                stage_data = status_store.lastStageAttempt(stage_ids.next())
+                submitted_at = self.__to_millis(stage_data.submissionTime())
+                launched_at = self.__to_millis(stage_data.firstTaskLaunchedTime())
+                if submitted_at is not None and launched_at is not None:
+                    stage_waits.append(max(launched_at - submitted_at, 0) / 1000)
+        SparkPoolMetrics().record(self.__pool_name, len(job_ids), stage_waits)
+        LOGGER.debug(f'job group: {self.__job_group}. pool: {self.__pool_name}. jobs: {len(job_ids)}. stage waits: {stage_waits}')
+        return
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        spark_context = self.__spark.sparkContext
+        try:
+            self.__record_metrics()
+        except Exception as e:
+            LOGGER.warning(f'unable to record metrics of job group: {self.__job_group}. cause: {str(e)}')
+        for k, v in self.__previous_values.items():
+            spark_context.setLocalProperty(k, v)
+        return False
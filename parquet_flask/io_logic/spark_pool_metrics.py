@@ -0,0 +1,62 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+
+from parquet_flask.utils.singleton import Singleton
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SparkPoolMetrics(metaclass=Singleton):
+    """
+    per scheduler pool counters of the spark jobs which ran in a SparkJobScope.
+    wait is the time between the submission of a stage and the launch of its first task, i.e. the time it was queued in the pool.
+    """
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__pools = {}
+
+    def record(self, pool_name: str, job_count: int, stage_waits: list):
+        """
+        :param pool_name:
+        :param job_count: number of jobs of the job group
+        :param stage_waits: list of float | seconds that each stage waited
+        :return: None
+        """
+        with self.__lock:
+            pool_metrics = self.__pools.setdefault(pool_name, {
+                'job_groups': 0,
+                'jobs': 0,
+                'stages': 0,
+                'total_wait_seconds': 0.0,
+                'max_wait_seconds': 0.0,
+            })
+            pool_metrics['job_groups'] += 1
+            pool_metrics['jobs'] += job_count
+            pool_metrics['stages'] += len(stage_waits)
+            pool_metrics['total_wait_seconds'] += sum(stage_waits)
+            pool_metrics['max_wait_seconds'] = max([pool_metrics['max_wait_seconds']] + stage_waits)
+        return
+
+    def clear(self):
+        with self.__lock:
+            self.__pools = {}
+        return
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {k: {**v, 'avg_wait_seconds': v['total_wait_seconds'] / v['stages'] if v['stages'] > 0 else 0.0} for k, v in self.__pools.items()}
@@ -0,0 +1,68 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pyspark.sql.functions as F
+from pyspark.sql.dataframe import DataFrame
+
+
+class SparkRowIndex:
+    """
+    row index of a sorted data frame without `row_number` over a window without `partitionBy`, which moves every row to a single task.
+    the sort range partitions the rows. partition N holds the rows right after those of partition N - 1, in order.
+    so row index = rows in the earlier partitions + row number in the partition. only the row count of each partition is collected.
+    """
+    PARTITION_COL = '_row_index_partition'
+    ROW_ID_COL = '_row_index_row_id'
+    PARTITION_ID_SHIFT = 33  # monotonically_increasing_id = partition ID << 33 + row number in the partition
+
+    @staticmethod
+    def number_rows(sorted_result: DataFrame) -> DataFrame:
+        """
+        the result should be persisted so that the counts and the later jobs see the same partitions.
+        :param sorted_result:
+        :return: DataFrame with PARTITION_COL and ROW_ID_COL
+        """
+        return sorted_result.withColumn(SparkRowIndex.PARTITION_COL, F.spark_partition_id())\
+            .withColumn(SparkRowIndex.ROW_ID_COL, F.monotonically_increasing_id())
+
+    @staticmethod
+    def get_indexed_result(numbered_result: DataFrame, index_col: str, start_at: int = 0, end_at: int = None) -> DataFrame:
+        """
+        :param numbered_result: result of `number_rows`
+        :param index_col: name of the row index column
+        :param start_at: first row index to keep
+        :param end_at: row index to stop at (exclusive). None to keep all the rows after start_at
+        :return: DataFrame with index_col in the same partitions and order. partitions outside of the range are filtered out
+        """
+        partition_counts = sorted([(k[SparkRowIndex.PARTITION_COL], k['count']) for k in numbered_result.groupBy(SparkRowIndex.PARTITION_COL).count().collect()])
+        partition_ids = []
+        offset_pairs = []
+        previous_rows = 0
+        for partition_id, row_count in partition_counts:
+            if previous_rows + row_count > start_at and (end_at is None or previous_rows < end_at):
+                partition_ids.append(partition_id)
+                offset_pairs.extend([F.lit(partition_id), F.lit(previous_rows)])
+            previous_rows += row_count
+        if len(partition_ids) < 1:
+            return numbered_result.limit(0).withColumn(index_col, F.lit(0).cast('long')).drop(SparkRowIndex.PARTITION_COL, SparkRowIndex.ROW_ID_COL)
+        partition_offset = F.create_map(*offset_pairs)[F.col(SparkRowIndex.PARTITION_COL)]
+        row_number = F.col(SparkRowIndex.ROW_ID_COL) - F.shiftleft(F.col(SparkRowIndex.PARTITION_COL).cast('long'), SparkRowIndex.PARTITION_ID_SHIFT)
+        indexed_result = numbered_result.filter(F.col(SparkRowIndex.PARTITION_COL).isin(partition_ids))\
+            .withColumn(index_col, partition_offset + row_number)
+        if start_at > 0:
+            indexed_result = indexed_result.filter(F.col(index_col) >= start_at)
+        if end_at is not None:
+            indexed_result = indexed_result.filter(F.col(index_col) < end_at)
+        return indexed_result.drop(SparkRowIndex.PARTITION_COL, SparkRowIndex.ROW_ID_COL)
@@ -16,9 +16,8 @@
 import json
 import logging
 
-from parquet_flask.io_logic.cdms_schema import CdmsSchema
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
 from parquet_flask.io_logic.query_v2 import QueryProps
-from parquet_flask.utils.file_utils import FileUtils
 
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
 from parquet_flask.utils.config import Config
@@ -39,8 +38,7 @@ class SubCollectionStatistics:
                                                          base_url=config.get_value(Config.es_url),
                                                          port=int(config.get_value(Config.es_port, '443')))
         self.__query_props = query_props
-        self.__insitu_schema = FileUtils.read_json(Config().get_value(Config.in_situ_schema))
-        self.__cdms_obs_names = CdmsSchema().get_observation_names(self.__insitu_schema)
+        self.__cdms_obs_names = InSituSchemaRegistry().get_observation_names()
 
     def with_provider(self, provider: str):
         self.__provider = provider
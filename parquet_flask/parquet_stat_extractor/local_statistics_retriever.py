@@ -19,11 +19,10 @@ from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkS
 from parquet_flask.parquet_stat_extractor.statistics_retriever import StatisticsRetriever
 from pyspark.sql.utils import AnalysisException
 
-from parquet_flask.utils.file_utils import FileUtils
 from pyspark.sql import SparkSession
 from pyspark.sql.dataframe import DataFrame
 
-from parquet_flask.io_logic.cdms_schema import CdmsSchema
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
 
 LOGGER = logging.getLogger(__name__)
 
@@ -36,8 +35,7 @@ class LocalStatisticsRetriever:
     def start(self):
         spark: SparkSession = LocalSparkSession().get_spark_session()
         try:
-            insitu_schema = FileUtils.read_json(self.__in_situ_schema_file_path)
-            cdms_spark_struct = CdmsSchema().get_schema_from_json(insitu_schema)
+            cdms_spark_struct = InSituSchemaRegistry().get_spark_struct(self.__in_situ_schema_file_path)
             read_df: DataFrame = spark.read.schema(cdms_spark_struct).parquet(self.__local_parquet_file_path)
         except AnalysisException as analysis_exception:
             if analysis_exception.desc is not None and analysis_exception.desc.startswith('Path does not exist'):
@@ -45,5 +43,5 @@ class LocalStatisticsRetriever:
                 return None
             LOGGER.exception(f'error while retrieving full_parquet_path: {self.__in_situ_schema_file_path}')
             raise analysis_exception
-        stats = StatisticsRetriever(read_df, CdmsSchema().get_observation_names(insitu_schema)).start()
+        stats = StatisticsRetriever(read_df, InSituSchemaRegistry().get_observation_names(self.__in_situ_schema_file_path)).start()
         return stats.to_json()
@@ -31,6 +31,7 @@ class StatisticsRetriever:
         self.__max_datetime = None
         self.__min_depth = None
         self.__max_depth = None
+        self.__has_missing_depth = False
         self.__min_lat = None
         self.__max_lat = None
         self.__min_lon = None
@@ -104,6 +105,19 @@ class StatisticsRetriever:
         self.__max_depth = val
         return
 
+    @property
+    def has_missing_depth(self):
+        return self.__has_missing_depth
+
+    @has_missing_depth.setter
+    def has_missing_depth(self, val):
+        """
+        :param val:
+        :return: None
+        """
+        self.__has_missing_depth = val
+        return
+
     @property
     def min_lat(self):
         return self.__min_lat
@@ -175,6 +189,7 @@ class StatisticsRetriever:
             'max_datetime': self.max_datetime,
             'min_depth': self.min_depth,
             'max_depth': self.max_depth,
+            'has_missing_depth': self.has_missing_depth,
             'min_lat': self.min_lat,
             'max_lat': self.max_lat,
             'min_lon': self.min_lon,
@@ -207,7 +222,8 @@ class StatisticsRetriever:
         self.min_datetime = stats[f'min({CDMSConstants.time_obj_col})'].timestamp()
         self.max_datetime = stats[f'max({CDMSConstants.time_obj_col})'].timestamp()
 
-        if self.min_depth - CDMSConstants.missing_depth_value == 0:
+        self.has_missing_depth = self.min_depth - CDMSConstants.missing_depth_value == 0
+        if self.has_missing_depth:
             self.__get_min_depth_exclude_missing_val()
         self.__observation_count = {}
         for each_obs_key in self.__observation_keys:
@@ -15,12 +15,12 @@
 
 import logging
 
-from parquet_flask.utils.file_utils import FileUtils
 from pyspark.sql import SparkSession
 from pyspark.sql.dataframe import DataFrame
 from pyspark.sql.utils import AnalysisException
 
-from parquet_flask.io_logic.cdms_schema import CdmsSchema
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
 from parquet_flask.parquet_stat_extractor.statistics_retriever import StatisticsRetriever
 from parquet_flask.utils.config import Config
 
@@ -38,11 +38,14 @@ class StatisticsRetrieverWrapper:
     def start(self, parquet_path):
         from parquet_flask.io_logic.retrieve_spark_session import RetrieveSparkSession
         spark: SparkSession = RetrieveSparkSession().retrieve_spark_session(self.__app_name, self.__master_spark)
+        with SparkJobScope(spark, SparkJobScope.INGEST_POOL, f'statistics: {parquet_path}'):
+            return self.__retrieve_stats(spark, parquet_path)
+
+    def __retrieve_stats(self, spark: SparkSession, parquet_path):
         full_parquet_path = f"{self.__parquet_name}/{parquet_path}"
         LOGGER.debug(f'searching for full_parquet_path: {full_parquet_path}')
         try:
-            insitu_schema = FileUtils.read_json(Config().get_value(Config.in_situ_schema))
-            cdms_spark_struct = CdmsSchema().get_schema_from_json(insitu_schema)
+            cdms_spark_struct = InSituSchemaRegistry().get_spark_struct()
             read_df: DataFrame = spark.read.schema(cdms_spark_struct).parquet(full_parquet_path)
         except AnalysisException as analysis_exception:
             if analysis_exception.desc is not None and analysis_exception.desc.startswith('Path does not exist'):
@@ -50,5 +53,5 @@ class StatisticsRetrieverWrapper:
                 return None
             LOGGER.exception(f'error while retrieving full_parquet_path: {full_parquet_path}')
             raise analysis_exception
-        stats = StatisticsRetriever(read_df, CdmsSchema().get_observation_names(insitu_schema)).start()
+        stats = StatisticsRetriever(read_df, InSituSchemaRegistry().get_observation_names()).start()
         return stats.to_json()
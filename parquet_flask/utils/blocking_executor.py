@@ -0,0 +1,72 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+import gevent
+from gevent.threadpool import ThreadPool
+
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.singleton import Singleton
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BlockingExecutor(metaclass=Singleton):
+    """
+    runs blocking calls (py4j sockets of PySpark, boto3, pyarrow reads) in a bounded pool of native threads
+    so that the gevent hub keeps serving other requests while they are running.
+    the calling greenlet waits for the result without blocking the hub. exceptions are raised in the calling greenlet.
+    at most `blocking_pool_size` calls run at the same time. the rest wait in the queue of the pool.
+
+    calls outside a gevent greenlet (tests, lambda, or calls from a pool thread) are executed directly.
+    """
+    DEFAULT_POOL_SIZE = 8
+
+    def __init__(self):
+        self.__pool_size = int(Config(False).get_value(Config.blocking_pool_size, BlockingExecutor.DEFAULT_POOL_SIZE))
+        self.__pool = None
+
+    @property
+    def pool_size(self):
+        return self.__pool_size
+
+    def __get_pool(self) -> ThreadPool:
+        if self.__pool is None:  # created lazily in the thread of the hub which serves the requests
+            LOGGER.debug(f'creating blocking thread pool. size: {self.__pool_size}')
+            self.__pool = ThreadPool(self.__pool_size)
+        return self.__pool
+
+    @staticmethod
+    def is_in_greenlet():
+        return isinstance(gevent.getcurrent(), gevent.Greenlet)
+
+    def spawn(self, func, *args, **kwargs):
+        """
+        must be called from a gevent greenlet
+        :param func: blocking callable
+        :return: gevent.event.AsyncResult of func
+        """
+        return self.__get_pool().spawn(func, *args, **kwargs)
+
+    def run(self, func, *args, **kwargs):
+        """
+        :param func: blocking callable
+        :return: result of func
+        """
+        if not self.is_in_greenlet():
+            return func(*args, **kwargs)
+        return self.spawn(func, *args, **kwargs).get()
+
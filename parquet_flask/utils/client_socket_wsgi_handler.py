@@ -0,0 +1,53 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import select
+import socket
+
+from gevent.pywsgi import WSGIHandler
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ClientSocketWsgiHandler(WSGIHandler):
+    """
+    gevent WSGIHandler which puts the client socket in the WSGI environ
+    so that long requests can check whether the client is still connected.
+    """
+    SOCKET_KEY = 'parquet_flask.client_socket'
+
+    def get_environ(self):
+        environ = super().get_environ()
+        environ[self.SOCKET_KEY] = self.socket
+        return environ
+
+    @staticmethod
+    def is_disconnected(environ: dict) -> bool:
+        """
+        a closed connection is readable and returns no bytes. a pipelined request is readable with bytes.
+        :param environ: WSGI environ
+        :return: bool | False if the socket is not available (other servers)
+        """
+        client_socket = environ.get(ClientSocketWsgiHandler.SOCKET_KEY, None)
+        if client_socket is None:
+            return False
+        try:
+            readable_sockets, _, _ = select.select([client_socket], [], [], 0)
+            if len(readable_sockets) < 1:
+                return False
+            return len(client_socket.recv(1, socket.MSG_PEEK)) < 1
+        except (OSError, ValueError):
+            return True
@@ -37,6 +37,30 @@ class Config(metaclass=Singleton):
     es_url = 'es_url'
     es_index = 'es_index'
     es_port = 'es_port'
+    query_engine = 'query_engine'
+    arrow_max_files = 'arrow_max_files'
+    arrow_max_rows = 'arrow_max_rows'
+    count_mode = 'count_mode'
+    top_k_max_rows = 'top_k_max_rows'
+    query_cache_ttl = 'query_cache_ttl'
+    query_cache_max_bytes = 'query_cache_max_bytes'
+    query_cursor_path = 'query_cursor_path'
+    query_cursor_ttl = 'query_cursor_ttl'
+    parquet_stats_catalog = 'parquet_stats_catalog'
+    parquet_stats_catalog_refresh = 'parquet_stats_catalog_refresh'
+    es_pool_maxsize = 'es_pool_maxsize'
+    authentication_cache_ttl = 'authentication_cache_ttl'
+    blocking_pool_size = 'blocking_pool_size'
+    spark_query_pool_weight = 'spark_query_pool_weight'
+    spark_ingest_pool_weight = 'spark_ingest_pool_weight'
+    query_deadline = 'query_deadline'
+    query_max_files = 'query_max_files'
+    query_max_rows = 'query_max_rows'
+    query_max_bytes = 'query_max_bytes'
+    admission_global_rows = 'admission_global_rows'
+    admission_client_rows = 'admission_client_rows'
+    admission_queue_seconds = 'admission_queue_seconds'
+    trusted_proxy_count = 'trusted_proxy_count'
 
     def __init__(self, validate_env: bool = True):
         self.__keys = [
@@ -55,6 +79,30 @@ class Config(metaclass=Singleton):
             Config.aws_access_key_id,
             Config.aws_secret_access_key,
             Config.aws_session_token,
+            Config.query_engine,
+            Config.arrow_max_files,
+            Config.arrow_max_rows,
+            Config.count_mode,
+            Config.top_k_max_rows,
+            Config.query_cache_ttl,
+            Config.query_cache_max_bytes,
+            Config.query_cursor_path,
+            Config.query_cursor_ttl,
+            Config.parquet_stats_catalog,
+            Config.parquet_stats_catalog_refresh,
+            Config.es_pool_maxsize,
+            Config.authentication_cache_ttl,
+            Config.blocking_pool_size,
+            Config.spark_query_pool_weight,
+            Config.spark_ingest_pool_weight,
+            Config.query_deadline,
+            Config.query_max_files,
+            Config.query_max_rows,
+            Config.query_max_bytes,
+            Config.admission_global_rows,
+            Config.admission_client_rows,
+            Config.admission_queue_seconds,
+            Config.trusted_proxy_count,
         ]
         if validate_env:
             self.__validate()
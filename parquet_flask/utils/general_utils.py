@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import json
+import threading
 from hashlib import sha256
 from math import isnan
 
@@ -20,10 +21,31 @@ import fastjsonschema
 
 
 class GeneralUtils:
+    __json_validators = {}
+    __json_validators_lock = threading.Lock()
+
+    @staticmethod
+    def get_json_validator(schema: dict):
+        """
+        fastjsonschema compiles a schema into python code which takes much longer than validating a small payload.
+        compiled validators are kept per process, keyed on the canonical json of the schema.
+        processes forked after the first call (e.g. multiprocessing.Pool) inherit them.
+        :param schema:
+        :return: compiled validator function
+        """
+        schema_key = json.dumps(schema, sort_keys=True)
+        json_validator = GeneralUtils.__json_validators.get(schema_key, None)
+        if json_validator is not None:
+            return json_validator
+        with GeneralUtils.__json_validators_lock:
+            if schema_key not in GeneralUtils.__json_validators:
+                GeneralUtils.__json_validators[schema_key] = fastjsonschema.compile(schema)
+            return GeneralUtils.__json_validators[schema_key]
+
     @staticmethod
     def is_json_valid(payload, schema):
         try:
-            fastjsonschema.validate(schema, payload)
+            GeneralUtils.get_json_validator(schema)(payload)
         except Exception as error:
             return False, str(error)
         return True, None
@@ -0,0 +1,48 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from bisect import bisect_left, bisect_right
+
+
+class IntervalIndex:
+    """
+    static index of closed intervals [start, end].
+    overlap queries bisect two sorted lists (by start and by end) and only scan the smaller side.
+    """
+    def __init__(self, intervals: list):
+        """
+        :param intervals: list of (start, end, item_id)
+        """
+        by_start = sorted(intervals, key=lambda k: k[0])
+        by_end = sorted(intervals, key=lambda k: k[1])
+        self.__starts = [k[0] for k in by_start]
+        self.__by_start = [(k[1], k[2]) for k in by_start]
+        self.__ends = [k[1] for k in by_end]
+        self.__by_end = [(k[0], k[2]) for k in by_end]
+
+    def __len__(self):
+        return len(self.__starts)
+
+    def query(self, query_start=None, query_end=None) -> list:
+        """
+        :param query_start: None for unbounded
+        :param query_end: None for unbounded
+        :return: list of item_id where start <= query_end and end >= query_start
+        """
+        start_count = len(self.__starts) if query_end is None else bisect_right(self.__starts, query_end)
+        end_index = 0 if query_start is None else bisect_left(self.__ends, query_start)
+        if start_count <= len(self.__ends) - end_index:
+            return [k[1] for k in self.__by_start[:start_count] if query_start is None or k[0] >= query_start]
+        return [k[1] for k in self.__by_end[end_index:] if query_end is None or k[0] <= query_end]
@@ -0,0 +1,78 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+
+
+class PackedRTree:
+    """
+    static R-tree bulk loaded with Sort-Tile-Recursive packing.
+    boxes are (min_x, min_y, max_x, max_y). it is rebuilt instead of updated as the input changes rarely.
+    """
+    NODE_CAPACITY = 16
+
+    def __init__(self, boxes: list, node_capacity: int = NODE_CAPACITY):
+        """
+        :param boxes: list of (min_x, min_y, max_x, max_y, item_id)
+        :param node_capacity:
+        """
+        self.__node_capacity = node_capacity
+        self.__size = len(boxes)
+        self.__root = None
+        if len(boxes) < 1:
+            return
+        level = [(k[0], k[1], k[2], k[3], k[4], True) for k in boxes]
+        while len(level) > 1:
+            level = self.__pack(level)
+        self.__root = level[0]
+
+    def __len__(self):
+        return self.__size
+
+    def __pack(self, entries: list) -> list:
+        """
+        sort by center x, cut into vertical slices, sort each slice by center y, and group every node_capacity entries into a parent.
+        :param entries: list of (min_x, min_y, max_x, max_y, item_id or children, is_leaf_entry)
+        :return: parent entries
+        """
+        node_count = math.ceil(len(entries) / self.__node_capacity)
+        slice_size = math.ceil(math.sqrt(node_count)) * self.__node_capacity
+        entries = sorted(entries, key=lambda k: k[0] + k[2])
+        parents = []
+        for slice_start in range(0, len(entries), slice_size):
+            each_slice = sorted(entries[slice_start: slice_start + slice_size], key=lambda k: k[1] + k[3])
+            for node_start in range(0, len(each_slice), self.__node_capacity):
+                children = each_slice[node_start: node_start + self.__node_capacity]
+                parents.append((min([k[0] for k in children]), min([k[1] for k in children]),
+                                max([k[2] for k in children]), max([k[3] for k in children]), children, False))
+        return parents
+
+    def query(self, min_x=-math.inf, min_y=-math.inf, max_x=math.inf, max_y=math.inf) -> list:
+        """
+        :return: list of item_id whose box intersects the query box (boundaries included)
+        """
+        if self.__root is None:
+            return []
+        result = []
+        stack = [self.__root]
+        while len(stack) > 0:
+            entry = stack.pop()
+            if entry[0] > max_x or entry[2] < min_x or entry[1] > max_y or entry[3] < min_y:
+                continue
+            if entry[5] is True:
+                result.append(entry[4])
+            else:
+                stack.extend(entry[4])
+        return result
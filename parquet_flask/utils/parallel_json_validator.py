@@ -13,27 +13,41 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import fastjsonschema
 import logging
 from datetime import datetime
 from multiprocessing import Pool
+from parquet_flask.utils.general_utils import GeneralUtils
 from parquet_flask.utils.singleton import Singleton
 
 LOGGER = logging.getLogger(__name__)
+__worker_validator = None
 
 
-def __validate_small_data(small_data, schema):
+def __load_worker_validator(schema):
+    global __worker_validator
+    __worker_validator = GeneralUtils.get_json_validator(schema)
+    return
+
+
+def __validate_small_data(small_data):
     try:
-        fastjsonschema.compile(schema)(small_data)
+        __worker_validator(small_data)
         return None
     except Exception as e:
         return str(e)
 
 
 def parallel_validate(chunked_data, schema):
+    """
+    each worker looks up the compiled validator once when it starts. only the chunks are sent to the workers.
+    :param chunked_data:
+    :param schema: json schema dict
+    :return: tuple | (is_valid, list of errors)
+    """
     a = datetime.now()
-    with Pool(16) as p:
-        all_result = p.starmap(__validate_small_data, [(k, schema) for k in chunked_data])
+    GeneralUtils.get_json_validator(schema)  # compiled before forking so that the workers inherit it
+    with Pool(16, initializer=__load_worker_validator, initargs=(schema,)) as p:
+        all_result = p.map(__validate_small_data, chunked_data)
     all_result = [k for k in all_result if k is not None]
     b = datetime.now()
     LOGGER.debug(f'validation took: {b - a}')
@@ -64,13 +78,6 @@ class ParallelJsonValidator(object):
     def is_schema_loaded(self):
         return self.__schema is not None
 
-    def __validate_this(self, small_data):
-        try:
-            self.__schema(small_data)
-            return None
-        except Exception as e:
-            return str(e)
-
     def validate_json(self, chunked_data: list):
         if self.is_schema_loaded() is False:
             raise ValueError(f'schema is not loaded. cannot validate')
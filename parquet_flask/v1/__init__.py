@@ -27,6 +27,11 @@ from .query_data_doms import api as query_data_doms
 from .extract_statistics_from_parquet_file import api as extract_statistics_from_parquet_file
 from .sub_collection_statistics_endpoint import api as sub_collection_statistics_endpoint
 from .query_data_doms_custom_pagination import api as query_data_doms_custom_pagination
+from .query_cache_stats import api as query_cache_stats
+from .spark_pool_stats import api as spark_pool_stats
+from .query_explain import api as query_explain
+from .authenticator_cache_stats import api as authenticator_cache_stats
+from .query_admission_stats import api as query_admission_stats
 from ..io_logic.cdms_constants import CDMSConstants
 
 _version = "1.0"
@@ -52,3 +57,8 @@ api.add_namespace(query_data_doms)
 api.add_namespace(query_data_doms_custom_pagination)
 api.add_namespace(extract_statistics_from_parquet_file)
 api.add_namespace(sub_collection_statistics_endpoint)
+api.add_namespace(query_cache_stats)
+api.add_namespace(spark_pool_stats)
+api.add_namespace(query_explain)
+api.add_namespace(authenticator_cache_stats)
+api.add_namespace(query_admission_stats)
@@ -0,0 +1,34 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from flask_restx import Resource, Namespace
+
+from parquet_flask.authenticator.authenticator_cache import AuthenticatorCache
+
+api = Namespace('authenticator_cache_stats', description="Hits and fetches of the cached authentication credentials")
+LOGGER = logging.getLogger(__name__)
+
+
+@api.route('', methods=["get"], strict_slashes=False)
+@api.route('/', methods=["get"], strict_slashes=False)
+class AuthenticatorCacheStats(Resource):
+    def __init__(self, api=None, *args, **kwargs):
+        super().__init__(api, args, kwargs)
+
+    @api.expect()
+    def get(self):
+        return AuthenticatorCache().get_stats(), 200
@@ -16,6 +16,7 @@
 import logging
 
 from flask_restx import Resource, Namespace, fields
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
 from parquet_flask.utils.config import Config
 from parquet_flask.utils.file_utils import FileUtils
 
@@ -34,7 +35,7 @@ class CdmsSchema(Resource):
         json_schema_path = Config().get_value('in_situ_schema')
         if not FileUtils.file_exist(json_schema_path):
             return {'message': f'file not found: {json_schema_path}'}, 404
-        json_schema = FileUtils.read_json(json_schema_path)
+        json_schema = InSituSchemaRegistry().get_schema(json_schema_path)
         if json_schema is None:
             return {'message': 'file is invalid json'}, 500
         return json_schema, 200
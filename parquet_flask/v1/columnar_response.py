@@ -0,0 +1,85 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import Response, request
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ColumnarResponse:
+    """
+    query page as Arrow IPC stream or Parquet bytes.
+    since the body has no room for the pagination links, they are in the `Link` header (RFC 8288).
+    total and cursor ID are in `X-Total`, `X-Total-Exact`, and `X-Cursor-Id` headers.
+    """
+    ARROW = 'ARROW'
+    PARQUET = 'PARQUET'
+    JSON_MIME_TYPE = 'application/json'
+    MIME_TYPES = {
+        'application/vnd.apache.arrow.stream': ARROW,
+        'application/vnd.apache.parquet': PARQUET,
+        'application/x-parquet': PARQUET,
+    }
+    RESPONSE_MIME_TYPES = {
+        ARROW: 'application/vnd.apache.arrow.stream',
+        PARQUET: 'application/vnd.apache.parquet',
+    }
+
+    @staticmethod
+    def get_requested_format():
+        """
+        `format=arrow|parquet` or the best match of the `Accept` header. `*/*` stays with JSON.
+        :return: str | ARROW, PARQUET, or None for JSON
+        """
+        requested_format = request.args.get('format', '').strip().upper()
+        if requested_format in ColumnarResponse.RESPONSE_MIME_TYPES:
+            return requested_format
+        best_match = request.accept_mimetypes.best_match([ColumnarResponse.JSON_MIME_TYPE] + list(ColumnarResponse.MIME_TYPES.keys()))
+        return ColumnarResponse.MIME_TYPES.get(best_match, None)
+
+    @staticmethod
+    def __to_bytes(table: pa.Table, response_format: str):
+        output_stream = pa.BufferOutputStream()
+        if response_format == ColumnarResponse.PARQUET:
+            pq.write_table(table, output_stream)
+        else:
+            with pa.ipc.new_stream(output_stream, table.schema) as ipc_writer:
+                ipc_writer.write_table(table)
+        return output_stream.getvalue()
+
+    @staticmethod
+    def create(result_set: dict, response_format: str, links: dict):
+        """
+        :param result_set: result of `QueryV4.search_table`
+        :param response_format: ARROW or PARQUET
+        :param links: dict | relation (first, prev, next, ...) -> url. 'NA' and None are skipped
+        :return: flask.Response
+        """
+        headers = {
+            'X-Total': str(result_set['total']),
+            'X-Total-Exact': str(result_set['is_total_exact']).lower(),
+        }
+        if 'cursor_id' in result_set:
+            headers['X-Cursor-Id'] = result_set['cursor_id']
+        link_header = ', '.join([f'<{v}>; rel="{k}"' for k, v in links.items() if v is not None and v != 'NA'])
+        if link_header != '':
+            headers['Link'] = link_header
+        response_bytes = ColumnarResponse.__to_bytes(result_set['results'], response_format)
+        LOGGER.debug(f'columnar response. format: {response_format}. rows: {result_set["results"].num_rows}. bytes: {response_bytes.size}')
+        return Response(response_bytes.to_pybytes(), status=200, mimetype=ColumnarResponse.RESPONSE_MIME_TYPES[response_format], headers=headers)
@@ -19,6 +19,7 @@ from flask_restx import Resource, Namespace, fields
 from flask import request
 
 from parquet_flask.parquet_stat_extractor.statistics_retriever_wrapper import StatisticsRetrieverWrapper
+from parquet_flask.utils.blocking_executor import BlockingExecutor
 
 api = Namespace('extract_stats', description="Querying data")
 LOGGER = logging.getLogger(__name__)
@@ -40,7 +41,7 @@ class IngestParquet(Resource):
         if s3_key == '':
             return {'message': 'invalid input. must have s3_key'}, 500
         try:
-            parquet_stats = StatisticsRetrieverWrapper().start(s3_key)
+            parquet_stats = BlockingExecutor().run(StatisticsRetrieverWrapper().start, s3_key)
         except Exception as e:
             LOGGER.exception(f'error while retrieving stats for s3_key: {s3_key}')
             return {'message': 'error while retrieving stats', 'details': str(e)}, 500
@@ -0,0 +1,67 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+
+from flask import Response, request, stream_with_context
+
+LOGGER = logging.getLogger(__name__)
+
+
+class NdjsonResponse:
+    """
+    newline delimited JSON. one result row per line, written with chunked transfer encoding as the rows are produced.
+    """
+    MIME_TYPE = 'application/x-ndjson'
+    JSON_MIME_TYPE = 'application/json'
+    CHUNK_ROWS = 500
+
+    @staticmethod
+    def is_requested():
+        """
+        `stream=true` or `Accept: application/x-ndjson`. `*/*` stays with the default JSON response.
+        :return: bool
+        """
+        if request.args.get('stream', 'false').strip().lower() == 'true':
+            return True
+        return request.accept_mimetypes.best_match([NdjsonResponse.JSON_MIME_TYPE, NdjsonResponse.MIME_TYPE]) == NdjsonResponse.MIME_TYPE
+
+    @staticmethod
+    def __generate_lines(first_row: dict, rows):
+        if first_row is None:
+            return
+        lines = [json.dumps(first_row, default=str)]
+        for each_row in rows:
+            lines.append(json.dumps(each_row, default=str))
+            if len(lines) >= NdjsonResponse.CHUNK_ROWS:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if len(lines) > 0:
+            yield '\n'.join(lines) + '\n'
+        return
+
+    @staticmethod
+    def create(rows):
+        """
+        the first row is pulled before the response is created.
+        so errors from ES or the query planning are still returned as a normal error response instead of a truncated 200 stream.
+        at most CHUNK_ROWS serialized rows are buffered.
+        :param rows: iterable of dict
+        :return: flask.Response
+        """
+        rows = iter(rows)
+        first_row = next(rows, None)
+        return Response(stream_with_context(NdjsonResponse.__generate_lines(first_row, rows)), status=200, mimetype=NdjsonResponse.MIME_TYPE)
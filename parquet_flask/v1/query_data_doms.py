@@ -20,7 +20,13 @@ from flask_restx import Resource, Namespace, fields
 from flask import request
 
 from parquet_flask.io_logic.query_v2 import QueryProps, QUERY_PROPS_SCHEMA
+from parquet_flask.io_logic.query_rejected_error import QueryRejectedError
 from parquet_flask.io_logic.query_v4 import QueryV4
+from parquet_flask.v1.columnar_response import ColumnarResponse
+from parquet_flask.v1.ndjson_response import NdjsonResponse
+from parquet_flask.v1.request_client import RequestClient
+from parquet_flask.v1.request_deadline import RequestDeadline
+from parquet_flask.v1.request_query_props import RequestQueryProps
 from parquet_flask.utils.general_utils import GeneralUtils
 
 api = Namespace('query_data_doms', description="Querying data")
@@ -33,6 +39,9 @@ query_model = api.model('query_data_doms', {
     'maxDepth': fields.Float(required=True, example=-65.34),
     'startTime': fields.String(required=True, example='2020-01-01T00:00:00Z'),
     'endTime': fields.String(required=True, example='2020-01-31T00:00:00Z'),
+    'format': fields.String(required=False, example='arrow', description='`arrow` (IPC stream) or `parquet` binary response. same as `Accept: application/vnd.apache.arrow.stream` or `application/vnd.apache.parquet`'),
+    'stream': fields.Boolean(required=False, example=False, description='stream the results as newline delimited JSON. same as `Accept: application/x-ndjson`'),
+    'debug': fields.Boolean(required=False, example=False, description='add seconds spent in each stage of the query as `debug` to JSON responses'),
     'platform': fields.String(required=True, example='30,3B'),
     'provider': fields.Integer(required=True, example=0),
     'project': fields.Integer(required=True, example=0),
@@ -49,6 +58,7 @@ class IngestParquet(Resource):
         super().__init__(api, args, kwargs)
         self.__start_from = 0
         self.__size = 0
+        self.__is_debug = False
 
     def __calculate_4_ranges(self, total_result):
         if self.__size == 0:
@@ -74,6 +84,10 @@ class IngestParquet(Resource):
         new_args['startIndex'] = new_start_from
         return '&'.join([f'{k}={v}' for k, v in new_args.items()])
 
+    def __get_page_links(self, total_result):
+        page_info = self.__calculate_4_ranges(total_result)
+        return {k: f'{request.base_url}?{self.__replace_start_from(page_info[k])}'.replace('http://', 'https://') for k in ['last', 'first', 'next', 'prev']}
+
     def __execute_query(self, payload):
         """
         TODO: transform the results to:
@@ -92,47 +106,39 @@ class IngestParquet(Resource):
         if not is_valid:
             return {'message': 'invalid request body', 'details': str(json_error)}, 400
         try:
-            query = QueryV4(QueryProps().from_json(payload))
-            result_set = query.search()
+            query_deadline = RequestDeadline.create()
+            query = QueryV4(QueryProps().from_json(payload), RequestClient.get_client_id())
+            if NdjsonResponse.is_requested():
+                LOGGER.debug(f'streaming search params: {payload}')
+                return NdjsonResponse.create(query_deadline.iterate(query.stream()))
+            response_format = ColumnarResponse.get_requested_format()
+            if response_format is not None:
+                result_set = query_deadline.run(query.search_table)
+                LOGGER.debug(f'{response_format} search params: {payload}')
+                return ColumnarResponse.create(result_set, response_format, self.__get_page_links(result_set['total']))
+            result_set = query_deadline.run(query.search)
             LOGGER.debug(f'search params: {payload}b')
-            page_info = self.__calculate_4_ranges(result_set['total'])
-            result_set['last'] = f'{request.base_url}?{self.__replace_start_from(page_info["last"])}'.replace('http://', 'https://')
-            result_set['first'] = f'{request.base_url}?{self.__replace_start_from(page_info["first"])}'.replace('http://', 'https://')
-            result_set['next'] = f'{request.base_url}?{self.__replace_start_from(page_info["next"])}'.replace('http://', 'https://')
-            result_set['prev'] = f'{request.base_url}?{self.__replace_start_from(page_info["prev"])}'.replace('http://', 'https://')
+            if self.__is_debug:
+                result_set = {**result_set, 'debug': query.query_timer.to_json()}  # cached results are shared
+            result_set.update(self.__get_page_links(result_set['total']))
             return result_set, 200
+        except QueryRejectedError as e:
+            LOGGER.warning(f'query is rejected. cause: {str(e)}')
+            return e.to_json(), e.status_code, e.get_headers()
+        except TimeoutError as e:
+            LOGGER.warning(f'query is aborted. cause: {str(e)}')
+            return {'message': 'query deadline exceeded', 'details': str(e)}, 504
         except Exception as e:
             LOGGER.exception(f'failed to query parquet. cause: {str(e)}')
             return {'message': 'failed to query parquet', 'details': str(e)}, 500
 
     @api.expect()
     def get(self):
-        self.__start_from = int(request.args.get('startIndex', '0'))
-        self.__size = int(request.args.get('itemsPerPage', '10'))
-        query_json = {
-            'start_from': self.__start_from,
-            'size': self.__size,
-        }
-        if 'startTime' in request.args:
-            query_json['min_time'] = request.args.get('startTime')
-        if 'endTime' in request.args:
-            query_json['max_time'] = request.args.get('endTime')
-        if 'minDepth' in request.args:
-            query_json['min_depth'] = float(request.args.get('minDepth'))
-        if 'maxDepth' in request.args:
-            query_json['max_depth'] = float(request.args.get('maxDepth'))
-        if 'bbox' in request.args:
-            bounding_box = GeneralUtils.gen_float_list_from_comma_sep_str(request.args.get('bbox'), 4)
-            query_json['min_lat_lon'] = [bounding_box[1], bounding_box[0]]
-            query_json['max_lat_lon'] = [bounding_box[3], bounding_box[2]]
-        if 'platform' in request.args:
-            query_json['platform_code'] = [k.strip() for k in request.args.get('platform').strip().split(',')]
-        if 'provider' in request.args:
-            query_json['provider'] = request.args.get('provider')
-        if 'project' in request.args:
-            query_json['project'] = request.args.get('project')
-        if 'columns' in request.args and request.args.get('columns').strip() != '':
-            query_json['columns'] = [k.strip() for k in request.args.get('columns').split(',')]
-        if 'variable' in request.args and request.args.get('variable').strip() != '':
-            query_json['variable'] = [k.strip() for k in request.args.get('variable').split(',')]
+        try:
+            query_json = RequestQueryProps.get_query_json(request.args)
+        except ValueError as e:
+            return {'message': 'invalid request', 'details': str(e)}, 400
+        self.__start_from = query_json['start_from']
+        self.__size = query_json['size']
+        self.__is_debug = request.args.get('debug', 'false').strip().lower() == 'true'
         return self.__execute_query(query_json)
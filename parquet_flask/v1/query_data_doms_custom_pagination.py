@@ -14,7 +14,6 @@
 # limitations under the License.
 
 import logging
-import signal
 from copy import deepcopy
 
 from flask_restx import Resource, Namespace, fields
@@ -22,7 +21,13 @@ from flask import request
 
 from parquet_flask.io_logic.cdms_constants import CDMSConstants
 from parquet_flask.io_logic.query_v2 import QueryProps, QUERY_PROPS_SCHEMA
+from parquet_flask.io_logic.query_rejected_error import QueryRejectedError
 from parquet_flask.io_logic.query_v4 import QueryV4
+from parquet_flask.v1.columnar_response import ColumnarResponse
+from parquet_flask.v1.ndjson_response import NdjsonResponse
+from parquet_flask.v1.request_client import RequestClient
+from parquet_flask.v1.request_deadline import RequestDeadline
+from parquet_flask.v1.request_query_props import RequestQueryProps
 from parquet_flask.utils.general_utils import GeneralUtils
 
 api = Namespace('query_data_doms_custom_pagination', description="Querying data")
@@ -36,6 +41,15 @@ query_model = api.model('query_data_doms', {
     'endTime': fields.String(required=True, example='2020-01-31T00:00:00Z'),
     'markerTime': fields.String(required=False, example='2020-01-02T00:00:00Z', description='timestamp of the last item of the current page'),
     'markerPlatform': fields.String(required=False, example='30', description='platform ID of the last item of the current page'),
+    'markerDepth': fields.Float(required=False, example=-5.0, description='depth of the last item of the current page'),
+    'markerLat': fields.Float(required=False, example=-23.8257, description='latitude of the last item of the current page'),
+    'markerLon': fields.Float(required=False, example=154.4868, description='longitude of the last item of the current page'),
+    'cursor': fields.Boolean(required=False, example=True, description='materialize the result on the first page so that next pages read slices of it'),
+    'cursorId': fields.String(required=False, description='cursor ID from the previous page. pages fall back to markers when it is expired'),
+    'cursorIndex': fields.Integer(required=False, example=100, description='index of the first item of the page in the cursor'),
+    'format': fields.String(required=False, example='arrow', description='`arrow` (IPC stream) or `parquet` binary response. same as `Accept: application/vnd.apache.arrow.stream` or `application/vnd.apache.parquet`'),
+    'stream': fields.Boolean(required=False, example=False, description='stream the results as newline delimited JSON. same as `Accept: application/x-ndjson`'),
+    'debug': fields.Boolean(required=False, example=False, description='add seconds spent in each stage of the query as `debug` to JSON responses'),
     'platform': fields.String(required=True, example='30,3B'),
     'provider': fields.Integer(required=True, example=0),
     'project': fields.Integer(required=True, example=0),
@@ -45,19 +59,6 @@ query_model = api.model('query_data_doms', {
 })
 
 
-class timeout:
-    def __init__(self, seconds=1, error_message='Timeout'):
-        self.seconds = seconds
-        self.error_message = error_message
-    def handle_timeout(self, signum, frame):
-        raise TimeoutError(self.error_message)
-    def __enter__(self):
-        signal.signal(signal.SIGALRM, self.handle_timeout)
-        signal.alarm(self.seconds)
-    def __exit__(self, type, value, traceback):
-        signal.alarm(0)
-
-
 @api.route('', methods=["get", "post"], strict_slashes=False)
 @api.route('/', methods=["get", "post"], strict_slashes=False)
 class IngestParquet(Resource):
@@ -65,13 +66,13 @@ class IngestParquet(Resource):
         super().__init__(api, args, kwargs)
         self.__start_from = 0
         self.__size = 0
+        self.__is_debug = False
 
     def __get_first_page_url(self):
         new_args = deepcopy(dict(request.args))
-        if 'markerTime' in new_args:
-            new_args.pop('markerTime')
-        if 'markerPlatform' in new_args:
-            new_args.pop('markerPlatform')
+        for each_marker_key in RequestQueryProps.MARKER_KEYS + RequestQueryProps.CURSOR_KEYS:
+            if each_marker_key in new_args:
+                new_args.pop(each_marker_key)
         new_args = '&'.join([f'{k}={v}' for k, v in new_args.items()])
         return f'{request.base_url}?{new_args}'.replace('http://', 'https://')
 
@@ -80,13 +81,19 @@ class IngestParquet(Resource):
         new_args = '&'.join([f'{k}={v}' for k, v in new_args.items()])
         return f'{request.base_url}?{new_args}'.replace('http://', 'https://')
 
-    def __get_next_page_url(self, query_result: list):
+    def __get_next_page_url(self, query_result: list, cursor_id=None, page_size=None):
         if len(query_result) < 1:
             return 'NA'
         last_item: dict = query_result[-1]
         new_args = deepcopy(dict(request.args))
+        if cursor_id is not None:
+            new_args['cursorId'] = cursor_id
+            new_args['cursorIndex'] = int(request.args.get('cursorIndex', '0')) + (len(query_result) if page_size is None else page_size)
         new_args['markerTime'] = last_item[CDMSConstants.time_col]
-        new_args['markerPlatform'] = GeneralUtils.gen_sha_256_json_obj(last_item)
+        new_args['markerPlatform'] = last_item[CDMSConstants.platform_code_col]
+        new_args['markerDepth'] = last_item[CDMSConstants.depth_col]
+        new_args['markerLat'] = last_item[CDMSConstants.lat_col]
+        new_args['markerLon'] = last_item[CDMSConstants.lon_col]
         new_args = '&'.join([f'{k}={v}' for k, v in new_args.items()])
         return f'{request.base_url}?{new_args}'.replace('http://', 'https://')
 
@@ -109,59 +116,52 @@ class IngestParquet(Resource):
             return {'message': 'invalid request body', 'details': str(json_error)}, 400
         try:
             LOGGER.debug(f'<delay_check> query_data_doms_custom_pagination calling QueryV4: {request.args}')
-            query = QueryV4(QueryProps().from_json(payload))
-            # with timeout(seconds=20):
-            #     result_set = query.search()
-            result_set = query.search()
+            query_deadline = RequestDeadline.create()
+            query = QueryV4(QueryProps().from_json(payload), RequestClient.get_client_id())
+            if NdjsonResponse.is_requested():
+                LOGGER.debug(f'streaming search params: {payload}')
+                return NdjsonResponse.create(query_deadline.iterate(query.stream()))
+            response_format = ColumnarResponse.get_requested_format()
+            if response_format is not None:
+                result_set = query_deadline.run(query.search_table)
+                LOGGER.debug(f'{response_format} search params: {payload}')
+                page_result = result_set['results']
+                links = {
+                    'first': self.__get_first_page_url(),
+                    'prev': self.__get_prev_page_url(),
+                    # only the last row is needed for the marker
+                    'next': self.__get_next_page_url(page_result.slice(max(page_result.num_rows - 1, 0)).to_pylist(), result_set.get('cursor_id', None), page_result.num_rows),
+                }
+                return ColumnarResponse.create(result_set, response_format, links)
+            result_set = query_deadline.run(query.search)
             LOGGER.debug(f'search params: {payload}')
+            if self.__is_debug:
+                result_set = {**result_set, 'debug': query.query_timer.to_json()}  # cached results are shared
             # page_info = self.__calculate_4_ranges(result_set['total'])
             LOGGER.debug(f'search done')
             result_set['last'] = 'keep browsing next till there is nothing left'
             result_set['first'] = self.__get_first_page_url()
             result_set['prev'] = self.__get_prev_page_url()
-            result_set['next'] = self.__get_next_page_url(result_set['results'])
+            result_set['next'] = self.__get_next_page_url(result_set['results'], result_set.get('cursor_id', None))
             LOGGER.debug(f'pagination done')
             return result_set, 200
+        except QueryRejectedError as e:
+            LOGGER.warning(f'query is rejected. cause: {str(e)}')
+            return e.to_json(), e.status_code, e.get_headers()
+        except TimeoutError as e:
+            LOGGER.warning(f'query is aborted. cause: {str(e)}')
+            return {'message': 'query deadline exceeded', 'details': str(e)}, 504
         except Exception as e:
             LOGGER.exception(f'failed to query parquet. cause: {str(e)}')
             return {'message': 'failed to query parquet', 'details': str(e)}, 500
 
     @api.expect()
     def get(self):
-        self.__size = int(request.args.get('itemsPerPage', '10'))
+        self.__is_debug = request.args.get('debug', 'false').strip().lower() == 'true'
         LOGGER.debug(f'<delay_check> query_data_doms_custom_pagination started: {request.args}')
-        query_json = {
-            'start_from': self.__start_from,
-            'size': self.__size,
-        }
-        if 'markerPlatform' in request.args:
-            query_json['marker_platform_code'] = request.args.get('markerPlatform')
-
-        if 'markerTime' in request.args:
-            query_json['min_time'] = request.args.get('markerTime')
-        elif 'startTime' in request.args:
-            query_json['min_time'] = request.args.get('startTime')
-        if 'endTime' in request.args:
-            query_json['max_time'] = request.args.get('endTime')
-
-        if 'minDepth' in request.args:
-            query_json['min_depth'] = float(request.args.get('minDepth'))
-        if 'maxDepth' in request.args:
-            query_json['max_depth'] = float(request.args.get('maxDepth'))
-
-        if 'bbox' in request.args:
-            bounding_box = GeneralUtils.gen_float_list_from_comma_sep_str(request.args.get('bbox'), 4)
-            query_json['min_lat_lon'] = [bounding_box[1], bounding_box[0]]
-            query_json['max_lat_lon'] = [bounding_box[3], bounding_box[2]]
-        if 'platform' in request.args:
-            query_json['platform_code'] = [k.strip() for k in request.args.get('platform').strip().split(',')]
-            query_json['platform_code'].sort()
-        if 'provider' in request.args:
-            query_json['provider'] = request.args.get('provider')
-        if 'project' in request.args:
-            query_json['project'] = request.args.get('project')
-        if 'columns' in request.args and request.args.get('columns').strip() != '':
-            query_json['columns'] = [k.strip() for k in request.args.get('columns').split(',')]
-        if 'variable' in request.args and request.args.get('variable').strip() != '':
-            query_json['variable'] = [k.strip() for k in request.args.get('variable').split(',')]
+        try:
+            query_json = RequestQueryProps.get_query_json(request.args, True)
+        except ValueError as e:
+            return {'message': 'invalid request', 'details': str(e)}, 400
+        self.__size = query_json['size']
         return self.__execute_query(query_json)
@@ -0,0 +1,61 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from flask_restx import Resource, Namespace
+from flask import request
+
+from parquet_flask.io_logic.query_v2 import QueryProps, QUERY_PROPS_SCHEMA
+from parquet_flask.io_logic.query_v4 import QueryV4
+from parquet_flask.v1.request_client import RequestClient
+from parquet_flask.v1.request_deadline import RequestDeadline
+from parquet_flask.v1.request_query_props import RequestQueryProps
+from parquet_flask.utils.general_utils import GeneralUtils
+
+api = Namespace('query_explain', description="Plan and estimated cost of a query_data_doms query without running it")
+LOGGER = logging.getLogger(__name__)
+
+
+@api.route('', methods=["get"], strict_slashes=False)
+@api.route('/', methods=["get"], strict_slashes=False)
+class QueryExplain(Resource):
+    def __init__(self, api=None, *args, **kwargs):
+        super().__init__(api, args, kwargs)
+
+    def __explain_query(self, payload):
+        is_valid, json_error = GeneralUtils.is_json_valid(payload, QUERY_PROPS_SCHEMA)
+        if not is_valid:
+            return {'message': 'invalid request body', 'details': str(json_error)}, 400
+        try:
+            query_deadline = RequestDeadline.create()
+            query = QueryV4(QueryProps().from_json(payload), RequestClient.get_client_id())
+            explanation = query_deadline.run(query.explain)
+            LOGGER.debug(f'explain params: {payload}')
+            return explanation, 200
+        except TimeoutError as e:
+            LOGGER.warning(f'explain is aborted. cause: {str(e)}')
+            return {'message': 'query deadline exceeded', 'details': str(e)}, 504
+        except Exception as e:
+            LOGGER.exception(f'failed to explain query. cause: {str(e)}')
+            return {'message': 'failed to explain query', 'details': str(e)}, 500
+
+    @api.expect()
+    def get(self):
+        try:
+            query_json = RequestQueryProps.get_query_json(request.args, RequestQueryProps.is_custom_pagination(request.args))
+        except ValueError as e:
+            return {'message': 'invalid request', 'details': str(e)}, 400
+        return self.__explain_query(query_json)
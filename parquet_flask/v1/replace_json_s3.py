@@ -21,6 +21,7 @@ from flask import request
 from parquet_flask.utils.general_utils import GeneralUtils
 from parquet_flask.v1.authenticator_decorator import authenticator_decorator
 from parquet_flask.v1.ingest_aws_json import IngestAwsJsonProps, IngestAwsJson
+from parquet_flask.utils.blocking_executor import BlockingExecutor
 
 api = Namespace('replace_json_s3', description="Ingesting JSON files")
 LOGGER = logging.getLogger(__name__)
@@ -67,4 +68,4 @@ class IngestParquet(Resource):
         props.is_replacing = True
         props.is_sanitizing = payload['sanitize_record'] if 'sanitize_record' in payload else True
         props.wait_till_complete = payload['wait_till_finish'] if 'wait_till_finish' in payload else True
-        return IngestAwsJson(props).ingest()
+        return BlockingExecutor().run(lambda: IngestAwsJson(props).ingest())
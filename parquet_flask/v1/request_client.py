@@ -0,0 +1,42 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from flask import request
+
+from parquet_flask.utils.config import Config
+
+
+class RequestClient:
+    """
+    the entries of `X-Forwarded-For` are sent by the client except the ones appended by the trusted proxies in front of the server.
+    with `trusted_proxy_count` proxies (default 0), the client is the entry appended by the outermost one: the Nth from the end.
+    the peer address otherwise, or when the header has fewer entries than the proxies.
+    """
+    FORWARDED_FOR_HEADER = 'X-Forwarded-For'
+    DEFAULT_TRUSTED_PROXY_COUNT = 0
+
+    @staticmethod
+    def get_client_id() -> str:
+        """
+        needs a flask request context
+        :return: str | None if it is unknown
+        """
+        trusted_proxy_count = int(Config(False).get_value(Config.trusted_proxy_count, RequestClient.DEFAULT_TRUSTED_PROXY_COUNT))
+        if trusted_proxy_count < 1:
+            return request.remote_addr
+        forwarded_for = [k.strip() for k in request.headers.get(RequestClient.FORWARDED_FOR_HEADER, '').split(',') if k.strip() != '']
+        if len(forwarded_for) < trusted_proxy_count:
+            return request.remote_addr
+        return forwarded_for[-trusted_proxy_count]
@@ -0,0 +1,51 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from flask import request
+
+from parquet_flask.io_logic.query_deadline import QueryDeadline
+from parquet_flask.utils.client_socket_wsgi_handler import ClientSocketWsgiHandler
+from parquet_flask.utils.config import Config
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RequestDeadline:
+    """
+    the deadline is `query_deadline` seconds from Config.
+    clients can ask for a shorter one with the `X-Query-Deadline` header (seconds). longer ones are capped.
+    """
+    HEADER = 'X-Query-Deadline'
+    DEFAULT_SECONDS = 300
+
+    @staticmethod
+    def create() -> QueryDeadline:
+        """
+        needs a flask request context
+        :return: QueryDeadline which also checks whether the client of the request has disconnected
+        """
+        deadline_seconds = float(Config().get_value(Config.query_deadline, RequestDeadline.DEFAULT_SECONDS))
+        requested_seconds = request.headers.get(RequestDeadline.HEADER, None)
+        if requested_seconds is not None:
+            try:
+                requested_seconds = float(requested_seconds)
+                if requested_seconds > 0:
+                    deadline_seconds = min(requested_seconds, deadline_seconds)
+            except ValueError:
+                LOGGER.warning(f'ignoring invalid {RequestDeadline.HEADER}: {requested_seconds}')
+        environ = request.environ
+        return QueryDeadline(deadline_seconds, lambda: ClientSocketWsgiHandler.is_disconnected(environ))
@@ -0,0 +1,91 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from parquet_flask.utils.general_utils import GeneralUtils
+
+
+class RequestQueryProps:
+    """
+    query arguments of `query_data_doms`, `query_data_doms_custom_pagination`, and `query_explain` to QueryProps JSON.
+    """
+    MARKER_KEYS = ['markerTime', 'markerPlatform', 'markerDepth', 'markerLat', 'markerLon']
+    CURSOR_KEYS = ['cursorId', 'cursorIndex']
+
+    @staticmethod
+    def is_custom_pagination(args: dict) -> bool:
+        """
+        :param args: request.args
+        :return: bool | True if it has page marker or cursor arguments
+        """
+        return any([k in args for k in RequestQueryProps.MARKER_KEYS + RequestQueryProps.CURSOR_KEYS]) or \
+            args.get('cursor', 'false').strip().lower() == 'true'
+
+    @staticmethod
+    def get_query_json(args: dict, is_custom_pagination: bool = False) -> dict:
+        """
+        pages of custom pagination start from the page marker or the cursor. `startIndex` is ignored.
+        :param args: request.args
+        :param is_custom_pagination:
+        :return: dict | QueryProps JSON
+        :raise ValueError: if a number or bbox argument is malformed, or the page marker is incomplete
+        """
+        query_json = {
+            'start_from': 0 if is_custom_pagination else int(args.get('startIndex', '0')),
+            'size': int(args.get('itemsPerPage', '10')),
+        }
+        if is_custom_pagination:
+            RequestQueryProps.__load_page_marker(args, query_json)
+        if is_custom_pagination and 'markerTime' in args:
+            query_json['min_time'] = args.get('markerTime')
+        elif 'startTime' in args:
+            query_json['min_time'] = args.get('startTime')
+        if 'endTime' in args:
+            query_json['max_time'] = args.get('endTime')
+        if 'minDepth' in args:
+            query_json['min_depth'] = float(args.get('minDepth'))
+        if 'maxDepth' in args:
+            query_json['max_depth'] = float(args.get('maxDepth'))
+        if 'bbox' in args:
+            bounding_box = GeneralUtils.gen_float_list_from_comma_sep_str(args.get('bbox'), 4)
+            query_json['min_lat_lon'] = [bounding_box[1], bounding_box[0]]
+            query_json['max_lat_lon'] = [bounding_box[3], bounding_box[2]]
+        if 'platform' in args:
+            query_json['platform_code'] = [k.strip() for k in args.get('platform').strip().split(',')]
+            if is_custom_pagination:
+                query_json['platform_code'].sort()
+        if 'provider' in args:
+            query_json['provider'] = args.get('provider')
+        if 'project' in args:
+            query_json['project'] = args.get('project')
+        if 'columns' in args and args.get('columns').strip() != '':
+            query_json['columns'] = [k.strip() for k in args.get('columns').split(',')]
+        if 'variable' in args and args.get('variable').strip() != '':
+            query_json['variable'] = [k.strip() for k in args.get('variable').split(',')]
+        return query_json
+
+    @staticmethod
+    def __load_page_marker(args: dict, query_json: dict):
+        if 'markerPlatform' in args:
+            if any([k not in args for k in RequestQueryProps.MARKER_KEYS]):
+                raise ValueError(f'incomplete page marker. {RequestQueryProps.MARKER_KEYS} are required. restart from the first page')
+            query_json['marker_platform_code'] = args.get('markerPlatform')
+            query_json['marker_depth'] = float(args.get('markerDepth'))
+            query_json['marker_lat_lon'] = [float(args.get('markerLat')), float(args.get('markerLon'))]
+        if args.get('cursor', 'false').strip().lower() == 'true':
+            query_json['use_cursor'] = True
+        if 'cursorId' in args:
+            query_json['cursor_id'] = args.get('cursorId')
+            query_json['cursor_index'] = int(args.get('cursorIndex', '0'))
+        return
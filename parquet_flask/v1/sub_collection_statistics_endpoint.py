@@ -20,6 +20,7 @@ from flask import request
 
 from parquet_flask.io_logic.query_v2 import QueryProps
 from parquet_flask.io_logic.sub_collection_statistics import SubCollectionStatistics
+from parquet_flask.utils.blocking_executor import BlockingExecutor
 from parquet_flask.utils.general_utils import GeneralUtils
 from parquet_flask.utils.time_utils import TimeUtils
 
@@ -73,7 +74,7 @@ class SubCollectionStatisticsEndpoint(Resource):
             if 'project' in request.args:
                 query_props.project = request.args.get('project')
 
-            sub_collection_stats = sub_collection_stats_api.start()
+            sub_collection_stats = BlockingExecutor().run(sub_collection_stats_api.start)
         except Exception as e:
             LOGGER.exception(f'error while retrieving stats')
             return {'message': 'error while retrieving stats', 'details': str(e)}, 500
@@ -40,6 +40,7 @@ install_requires = [
     'requests===2.26.0',
     'boto3', 'botocore',
     'requests_aws4auth===1.1.1',  # to send aws signed headers in requests
+    'pyarrow',  # spark-free query engine for small queries
     'elasticsearch===7.13.4',
 ]
 
@@ -0,0 +1,81 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+
+import pyspark.sql.functions as F
+from pyspark.sql import SparkSession
+from pyspark.sql.types import StructType
+
+from parquet_flask.io_logic.query_engine_spark import QueryEngineSpark
+from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+
+
+class BenchProjectionBytesRead:
+    """
+    bytes read from the file system (hadoop FileSystem statistics. s3a reports the same counters) for a page of a two-variable query
+    - full: every column is read and 3 are dropped. (what `columns=` empty does)
+    - late_select: full schema. `select` at the end. (before. catalyst prunes it through sort + filter)
+    - projected: schema is pruned to output + sort + predicate columns at read time. (after)
+    """
+    def __init__(self):
+        self.__spark: SparkSession = LocalSparkSession().get_spark_session()
+        self.__base_path = tempfile.mkdtemp()
+        self.__row_count = 1000000
+        self.__variable_count = 20
+        self.__page_size = 100
+        self.__output_columns = ['time', 'latitude', 'longitude', 'depth', 'platform_code', 'var_0', 'var_0_quality', 'var_1', 'var_1_quality']
+
+    def __create_rows(self):
+        df = self.__spark.range(self.__row_count)
+        df = df.withColumn('time', F.date_format(F.from_unixtime(F.lit(1514764800) + F.col('id') % 2678400), "yyyy-MM-dd'T'HH:mm:ss'Z'"))\
+            .withColumn('platform_code', (F.col('id') % 17).cast('string'))\
+            .withColumn('depth', (F.col('id') % 113).cast('double'))\
+            .withColumn('latitude', (F.col('id') % 181 - 90).cast('double'))\
+            .withColumn('longitude', (F.col('id') % 361 - 180).cast('double'))\
+            .withColumn('platform', F.create_map(F.lit('code'), F.col('platform_code'), F.lit('type'), F.lit('31')))\
+            .withColumn('meta', F.concat(F.lit('{"source": "mock in-situ record with a long meta string"}'), F.col('id').cast('string')))
+        for i in range(self.__variable_count):
+            df = df.withColumn(f'var_{i}', F.when(F.col('id') % (i + 2) == 0, F.rand()))\
+                .withColumn(f'var_{i}_quality', F.when(F.col('id') % (i + 2) == 0, F.lit(1)))
+        df.drop('id').write.mode('overwrite').parquet(self.__base_path)
+        return
+
+    def __get_bytes_read(self):
+        all_stats = self.__spark._jvm.org.apache.hadoop.fs.FileSystem.getAllStatistics()
+        return sum([all_stats.get(i).getBytesRead() for i in range(all_stats.size())])
+
+    def __query(self, read_schema: StructType, output_columns: list):
+        query_result = self.__spark.read.schema(read_schema).parquet(self.__base_path)
+        query_result = query_result.where(((F.col('latitude') >= -45.0) & (F.col('latitude') <= 45.0)) & (F.col('var_0').isNotNull() | F.col('var_1').isNotNull()))
+        query_result = query_result.sort([query_result[k].asc() for k in QueryEngineSpark.SORTING_COLUMNS])
+        before_bytes = self.__get_bytes_read()
+        query_result.select(output_columns).limit(self.__page_size).collect()
+        return self.__get_bytes_read() - before_bytes
+
+    def start(self):
+        self.__create_rows()
+        full_schema = self.__spark.read.parquet(self.__base_path).schema
+        reading_columns = set(self.__output_columns + QueryEngineSpark.SORTING_COLUMNS)
+        projected_schema = StructType([k for k in full_schema.fields if k.name in reading_columns])
+        print('read, bytes_read')
+        print(f'full, {self.__query(full_schema, full_schema.names)}')
+        print(f'late_select, {self.__query(full_schema, self.__output_columns)}')
+        print(f'projected, {self.__query(projected_schema, self.__output_columns)}')
+        return
+
+
+if __name__ == '__main__':
+    BenchProjectionBytesRead().start()
@@ -0,0 +1,72 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+
+import pyspark.sql.functions as F
+from pyspark.sql import SparkSession
+from pyspark.sql.dataframe import DataFrame
+
+from parquet_flask.io_logic.query_engine_spark import QueryEngineSpark
+from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+from tests.bench_mark.func_exec_time_decorator import func_exec_time_decorator
+
+
+class BenchTopKFirstPage:
+    """
+    compares the first page (start_at=0, size=100) of a sorted result with
+    - limit(start + size).tail(size) (old)
+    - limit(start + size).collect() which is planned as TakeOrderedAndProject (new)
+    """
+    def __init__(self):
+        self.__spark: SparkSession = LocalSparkSession().get_spark_session()
+        self.__base_path = tempfile.mkdtemp()
+        self.__row_counts = [1000000, 5000000, 10000000]
+        self.__page_size = 100
+        self.__repeat = 3
+
+    def __create_rows(self, row_count: int) -> DataFrame:
+        df = self.__spark.range(row_count)
+        df = df.withColumn('time', F.date_format(F.from_unixtime(F.lit(1514764800) + F.col('id') % 2678400), "yyyy-MM-dd'T'HH:mm:ss'Z'"))\
+            .withColumn('platform_code', (F.col('id') % 17).cast('string'))\
+            .withColumn('depth', (F.col('id') % 113).cast('double'))\
+            .withColumn('latitude', (F.col('id') % 181 - 90).cast('double'))\
+            .withColumn('longitude', (F.col('id') % 361 - 180).cast('double'))
+        df.write.mode('overwrite').parquet(self.__base_path)
+        df = self.__spark.read.parquet(self.__base_path)
+        return df.sort([df[k].asc() for k in QueryEngineSpark.SORTING_COLUMNS]).drop('id')
+
+    @func_exec_time_decorator
+    def __limit_tail(self, sorted_df: DataFrame):
+        return sorted_df.limit(self.__page_size).tail(self.__page_size)
+
+    @func_exec_time_decorator
+    def __top_k(self, sorted_df: DataFrame):
+        return sorted_df.limit(self.__page_size).collect()
+
+    def start(self):
+        print('row_count, limit_tail_seconds, top_k_seconds')
+        for each_count in self.__row_counts:
+            sorted_df = self.__create_rows(each_count)
+            limit_tail_results = [self.__limit_tail(sorted_df) for _ in range(self.__repeat)]
+            top_k_results = [self.__top_k(sorted_df) for _ in range(self.__repeat)]
+            if limit_tail_results[0][0] != top_k_results[0][0]:
+                raise ValueError(f'different first pages for {each_count} rows')
+            print(f'{each_count}, {min([k[1] for k in limit_tail_results])}, {min([k[1] for k in top_k_results])}')
+        return
+
+
+if __name__ == '__main__':
+    BenchTopKFirstPage().start()
@@ -0,0 +1,91 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+
+from pyspark.sql import SparkSession
+from pyspark.sql.dataframe import DataFrame
+from pyspark.sql.functions import lit
+
+from tests.bench_mark.func_exec_time_decorator import func_exec_time_decorator
+
+IN_SITU_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', 'in_situ_schema.json')
+for each_key in ['master_spark_url', 'spark_app_name', 'parquet_file_name', 'authentication_type', 'authentication_key', 'parquet_metadata_tbl', 'es_url']:
+    os.environ[each_key] = os.environ.get(each_key, '')
+os.environ['in_situ_schema'] = IN_SITU_SCHEMA
+
+from parquet_flask.io_logic.cdms_schema import CdmsSchema
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_engine_spark import QueryEngineSpark
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+from parquet_flask.utils.file_utils import FileUtils
+
+
+class BenchUnionedReadPlanning:
+    """
+    compares planning time of
+    - one spark.read + withColumn(lit) per partition path, chained with `union` (old)
+    - one spark.read over all partition paths with `basePath` (new)
+
+    planning = building the DataFrame + generating the executed physical plan. no data is scanned.
+    """
+    def __init__(self):
+        self.__spark: SparkSession = LocalSparkSession().get_spark_session()
+        self.__base_path = tempfile.mkdtemp()
+        self.__path_counts = [10, 50, 100, 200, 400]
+
+    def __create_partitions(self, partition_count: int):
+        rows = [('2017-01-01T00:00:00Z', 1.0, 1.0, 1.0, 'mock_provider', 'mock_project', f'{i}', '0_0', 2017, 1, 'mock_job')
+                for i in range(partition_count)]
+        df = self.__spark.createDataFrame(rows, ['time', 'depth', 'latitude', 'longitude', 'provider', 'project', 'platform_code', 'geo_spatial_interval', 'year', 'month', 'job_id'])
+        df.write.mode('overwrite').partitionBy('provider', 'project', 'platform_code', 'geo_spatial_interval', 'year', 'month', 'job_id').parquet(self.__base_path)
+        return [PartitionedParquetPath(self.__base_path).set_provider('mock_provider').set_project('mock_project').set_platform(f'{i}').set_lat_lon('0_0').set_year(2017).set_month(1)
+                for i in range(partition_count)]
+
+    @func_exec_time_decorator
+    def __plan_union(self, parquet_names: list):
+        cdms_spark_struct = CdmsSchema().get_schema_from_json(FileUtils.read_json(IN_SITU_SCHEMA))
+        main_read_df: DataFrame = None
+        for each in parquet_names:
+            temp_df: DataFrame = self.__spark.read.schema(cdms_spark_struct).parquet(each.generate_path())
+            for k, v in each.get_df_columns().items():
+                temp_df: DataFrame = temp_df.withColumn(k, lit(v))
+            main_read_df = temp_df if main_read_df is None else main_read_df.union(temp_df)
+        main_read_df._jdf.queryExecution().executedPlan()
+        return main_read_df
+
+    @func_exec_time_decorator
+    def __plan_single_read(self, parquet_names: list):
+        condition_manager = ParquetQueryConditionManagementV4(self.__base_path, -99999, {})
+        condition_manager.parquet_names = parquet_names
+        main_read_df = QueryEngineSpark(QueryProps(), self.__base_path, self.__spark).get_unioned_read_df(condition_manager, self.__spark)
+        main_read_df._jdf.queryExecution().executedPlan()
+        return main_read_df
+
+    def start(self):
+        print('path_count, union_seconds, single_read_seconds')
+        for each_count in self.__path_counts:
+            parquet_names = self.__create_partitions(each_count)
+            union_result = self.__plan_union(parquet_names)
+            single_read_result = self.__plan_single_read(parquet_names)
+            print(f'{each_count}, {union_result[1]}, {single_read_result[1]}')
+        return
+
+
+if __name__ == '__main__':
+    BenchUnionedReadPlanning().start()
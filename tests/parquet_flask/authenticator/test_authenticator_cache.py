@@ -0,0 +1,78 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from parquet_flask.authenticator.authenticator_cache import AuthenticatorCache
+from parquet_flask.authenticator.authenticator_factory import AuthenticatorFactory
+from parquet_flask.authenticator.authenticator_filebased import AuthenticatorFileBased
+from parquet_flask.utils.singleton import Singleton
+
+
+class TestAuthenticatorCache(unittest.TestCase):
+    def setUp(self) -> None:
+        Singleton._instances.pop(AuthenticatorCache, None)
+        self.cred_path = os.path.join(tempfile.mkdtemp(), 'auth_cred.json')
+        self.__write_token('token_1')
+        return
+
+    def tearDown(self) -> None:
+        Singleton._instances.pop(AuthenticatorCache, None)
+        return
+
+    def __write_token(self, token: str):
+        with open(self.cred_path, 'w') as ff:
+            ff.write(json.dumps({'auth_cred': token}))
+        return
+
+    def __get_headers(self, token: str):
+        return {'Authorization': base64.standard_b64encode(token.encode()).decode()}
+
+    def test_cached_credentials(self):
+        with patch.object(AuthenticatorFileBased, 'get_auth_credentials', autospec=True, side_effect=AuthenticatorFileBased.get_auth_credentials) as mock_fetch:
+            auth_cache = AuthenticatorCache()
+            for _ in range(5):
+                self.assertEqual(auth_cache.authenticate(AuthenticatorFactory.FILE, self.cred_path, self.__get_headers('token_1')), None, 'wrong auth result')
+            self.assertEqual(mock_fetch.call_count, 1, 'credentials are fetched more than once')
+        self.assertEqual(auth_cache.get_stats()['fetches'], 1, 'wrong fetch counter')
+        self.assertEqual(auth_cache.get_stats()['hits'], 4, 'wrong hit counter')
+        return
+
+    def test_refresh_on_failure(self):
+        auth_cache = AuthenticatorCache()
+        self.assertEqual(auth_cache.authenticate(AuthenticatorFactory.FILE, self.cred_path, self.__get_headers('token_1')), None, 'wrong auth result')
+        self.__write_token('token_2')
+        self.assertNotEqual(auth_cache.authenticate(AuthenticatorFactory.FILE, self.cred_path, self.__get_headers('token_2')), None,
+                            'credentials are refreshed within MIN_REFRESH_INTERVAL')
+        with patch.object(AuthenticatorCache, 'MIN_REFRESH_INTERVAL', 0):
+            self.assertEqual(auth_cache.authenticate(AuthenticatorFactory.FILE, self.cred_path, self.__get_headers('token_2')), None, 'rotated token is not picked up')
+        self.assertEqual(auth_cache.get_stats()['forced_refreshes'], 1, 'wrong forced refresh counter')
+        return
+
+    def test_zero_ttl(self):
+        os.environ['authentication_cache_ttl'] = '0'
+        try:
+            auth_cache = AuthenticatorCache()
+            for _ in range(3):
+                auth_cache.authenticate(AuthenticatorFactory.FILE, self.cred_path, self.__get_headers('token_1'))
+        finally:
+            os.environ.pop('authentication_cache_ttl')
+        self.assertEqual(auth_cache.get_stats()['fetches'], 3, 'credentials are cached with ttl 0')
+        return
@@ -0,0 +1,55 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+import unittest
+
+from parquet_flask.aws.aws_cred import AwsCred
+
+
+class TestAwsCred(unittest.TestCase):
+    def setUp(self) -> None:
+        os.environ['aws_access_key_id'] = 'mock_key_id'
+        os.environ['aws_secret_access_key'] = 'mock_secret'
+        AwsCred.clear_cache()
+        return
+
+    def tearDown(self) -> None:
+        for each in ['aws_access_key_id', 'aws_secret_access_key']:
+            os.environ.pop(each, None)
+        AwsCred.clear_cache()
+        return
+
+    def test_shared_client(self):
+        s3_client = AwsCred().get_client('s3')
+        self.assertTrue(s3_client is AwsCred().get_client('s3'), 'client is not shared')
+        self.assertTrue(AwsCred().get_session() is AwsCred().get_session(), 'session is not shared')
+        return
+
+    def test_credential_change(self):
+        s3_client = AwsCred().get_client('s3')
+        os.environ['aws_access_key_id'] = 'mock_key_id_2'
+        self.assertTrue(s3_client is not AwsCred().get_client('s3'), 'new credentials should create a new client')
+        return
+
+    def test_resource_per_thread(self):
+        s3_resources = [AwsCred().get_resource('s3')]
+        other_thread = threading.Thread(target=lambda: s3_resources.append(AwsCred().get_resource('s3')))
+        other_thread.start()
+        other_thread.join()
+        self.assertTrue(s3_resources[0] is AwsCred().get_resource('s3'), 'resource is not cached in the same thread')
+        self.assertTrue(s3_resources[0] is not s3_resources[1], 'resource is shared across threads')
+        return
@@ -0,0 +1,49 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from parquet_flask.aws.es_client_registry import EsClientRegistry
+from parquet_flask.aws.es_factory import ESFactory
+from parquet_flask.utils.singleton import Singleton
+
+
+class TestEsClientRegistry(unittest.TestCase):
+    def tearDown(self) -> None:
+        Singleton._instances.pop(EsClientRegistry, None)
+        for each in ['aws_access_key_id', 'aws_secret_access_key']:
+            os.environ.pop(each, None)
+        return
+
+    def test_shared_client(self):
+        with patch.object(EsClientRegistry, '_EsClientRegistry__create_client', side_effect=lambda *args: MagicMock()) as mock_create:
+            registry = EsClientRegistry()
+            es_client = registry.get_client(ESFactory.AWS, 'mock-es', 443)
+            self.assertTrue(es_client is registry.get_client(ESFactory.AWS, 'mock-es', '443'), 'client is not shared')
+            self.assertTrue(es_client is not registry.get_client(ESFactory.NO_AUTH, 'mock-es', 443), 'auth type is not in the key')
+            self.assertTrue(es_client is not registry.get_client(ESFactory.AWS, 'mock-es', 9200), 'port is not in the key')
+            self.assertEqual(mock_create.call_count, 3, 'wrong number of created clients')
+        return
+
+    def test_credential_change(self):
+        with patch.object(EsClientRegistry, '_EsClientRegistry__create_client', side_effect=lambda *args: MagicMock()):
+            registry = EsClientRegistry()
+            es_client = registry.get_client(ESFactory.AWS, 'mock-es', 443)
+            os.environ['aws_access_key_id'] = 'mock_key_id'
+            os.environ['aws_secret_access_key'] = 'mock_secret'
+            self.assertTrue(es_client is not registry.get_client(ESFactory.AWS, 'mock-es', 443), 'new credentials should create a new client')
+        return
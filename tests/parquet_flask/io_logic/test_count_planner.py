@@ -0,0 +1,91 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from parquet_flask.io_logic.count_planner import CountPlanner
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.time_utils import TimeUtils
+
+
+class TestCountPlanner(unittest.TestCase):
+    def __get_parquet_name(self, file_name: str, min_time: str, max_time: str, min_depth=0.0, max_depth=10.0, total=100, observation_counts=None, has_missing_depth=None):
+        es_result = {
+            's3_url': f's3://mock-bucket/base-path/provider=p/project=pr/platform_code=30/geo_spatial_interval=0_0/year=2018/month=3/job_id=j/{file_name}',
+            'provider': 'p', 'project': 'pr', 'platform_code': '30', 'geo_spatial_interval': '0_0', 'year': '2018', 'month': '3',
+            'total': total,
+            'min_datetime': TimeUtils.get_datetime_obj(min_time).timestamp(),
+            'max_datetime': TimeUtils.get_datetime_obj(max_time).timestamp(),
+            'min_depth': min_depth, 'max_depth': max_depth,
+            'min_lat': 1.0, 'max_lat': 2.0, 'min_lon': 1.0, 'max_lon': 2.0,
+            'observation_counts': {'air_temperature': total} if observation_counts is None else observation_counts,
+        }
+        if has_missing_depth is not None:
+            es_result['has_missing_depth'] = has_missing_depth
+        return PartitionedParquetPath('s3a://mock-bucket/base-path').load_from_es(es_result)
+
+    def __get_props(self):
+        props = QueryProps()
+        props.min_datetime = '2018-03-03T00:00:00Z'
+        props.max_datetime = '2018-03-10T00:00:00Z'
+        props.min_lat_lon = [0.0, 0.0]
+        props.max_lat_lon = [5.0, 5.0]
+        return props
+
+    def test_contained_and_partial(self):
+        parquet_names = [
+            self.__get_parquet_name('contained.parquet', '2018-03-04T00:00:00Z', '2018-03-05T00:00:00Z'),
+            self.__get_parquet_name('contained.parquet', '2018-03-04T00:00:00Z', '2018-03-05T00:00:00Z'),
+            self.__get_parquet_name('partial.parquet', '2018-03-01T00:00:00Z', '2018-03-05T00:00:00Z'),
+        ]
+        count_planner = CountPlanner(self.__get_props()).plan(parquet_names)
+        self.assertTrue(count_planner.is_plannable)
+        self.assertEqual(count_planner.contained_total, 100, f'duplicated s3_url should be counted once')
+        self.assertEqual([k.s3_url.split('/')[-1] for k in count_planner.partial_parquet_names], ['partial.parquet'])
+        self.assertEqual(parquet_names[2].generate_file_path(), 's3a://mock-bucket/base-path/provider=p/project=pr/platform_code=30/geo_spatial_interval=0_0/year=2018/month=3/job_id=j/partial.parquet')
+        self.assertEqual(count_planner.estimate_partial_total(), 50, f'half of the partial file is inside the time range')
+        return
+
+    def test_depth(self):
+        parquet_names = [self.__get_parquet_name('a.parquet', '2018-03-04T00:00:00Z', '2018-03-05T00:00:00Z', min_depth=1.0, max_depth=5.0)]
+        props = self.__get_props()
+        props.min_depth = 0.0
+        props.max_depth = 10.0
+        self.assertEqual(CountPlanner(props).plan(parquet_names).contained_total, 100, f'missing depth rows are included. file is contained')
+        props.min_depth = 0.5
+        self.assertEqual(CountPlanner(props).plan(parquet_names).contained_total, 0, f'missing depth rows are excluded. file may have them')
+        parquet_names = [self.__get_parquet_name('a.parquet', '2018-03-04T00:00:00Z', '2018-03-05T00:00:00Z', min_depth=1.0, max_depth=5.0, has_missing_depth=False)]
+        self.assertEqual(CountPlanner(props).plan(parquet_names).contained_total, 100, f'missing depth rows are excluded. file does not have them')
+        parquet_names = [self.__get_parquet_name('a.parquet', '2018-03-04T00:00:00Z', '2018-03-05T00:00:00Z', min_depth=1.0, max_depth=5.0, has_missing_depth=True)]
+        self.assertEqual(CountPlanner(props).plan(parquet_names).contained_total, 0, f'missing depth rows are excluded. file has them')
+        return
+
+    def test_variables(self):
+        parquet_names = [
+            self.__get_parquet_name('a.parquet', '2018-03-04T00:00:00Z', '2018-03-05T00:00:00Z'),
+            self.__get_parquet_name('b.parquet', '2018-03-04T00:00:00Z', '2018-03-05T00:00:00Z', observation_counts={'air_temperature': 99}),
+        ]
+        props = self.__get_props()
+        props.variable = ['air_temperature']
+        count_planner = CountPlanner(props).plan(parquet_names)
+        self.assertEqual(count_planner.contained_total, 100)
+        self.assertEqual(len(count_planner.partial_parquet_names), 1)
+        return
+
+    def test_not_plannable(self):
+        parquet_names = [PartitionedParquetPath('s3a://mock-bucket/base-path').set_provider('p')]
+        self.assertFalse(CountPlanner(self.__get_props()).plan(parquet_names).is_plannable)
+        return
@@ -0,0 +1,55 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+from parquet_flask.io_logic.in_situ_schema_registry import InSituSchemaRegistry
+from parquet_flask.utils.file_utils import FileUtils
+from parquet_flask.utils.singleton import Singleton
+
+IN_SITU_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'in_situ_schema.json')
+
+
+class TestInSituSchemaRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.schema_path = os.path.join(tempfile.mkdtemp(), 'in_situ_schema.json')
+        self.in_situ_schema = FileUtils.read_json(IN_SITU_SCHEMA)
+        FileUtils.write_json(self.schema_path, self.in_situ_schema, overwrite=True)
+        return
+
+    def tearDown(self) -> None:
+        Singleton._instances.pop(InSituSchemaRegistry, None)
+        return
+
+    def test_memoized(self):
+        registry = InSituSchemaRegistry()
+        spark_struct = registry.get_spark_struct(self.schema_path)
+        self.assertTrue(spark_struct is registry.get_spark_struct(self.schema_path), 'spark struct is rebuilt')
+        self.assertTrue(registry.get_validator(self.schema_path) is registry.get_validator(self.schema_path), 'validator is recompiled')
+        self.assertTrue('air_temperature' in registry.get_observation_names(self.schema_path), 'missing observation name')
+        self.assertTrue('air_temperature' in spark_struct.names, 'missing spark column')
+        return
+
+    def test_reload_on_mtime(self):
+        registry = InSituSchemaRegistry()
+        self.assertFalse('mock_variable' in registry.get_observation_names(self.schema_path), 'unexpected observation name')
+        self.in_situ_schema['definitions']['observation']['properties']['mock_variable'] = {'type': 'number'}
+        FileUtils.write_json(self.schema_path, self.in_situ_schema, overwrite=True)
+        os.utime(self.schema_path, ns=(os.stat(self.schema_path).st_atime_ns, os.stat(self.schema_path).st_mtime_ns + 1000000000))
+        self.assertTrue('mock_variable' in registry.get_observation_names(self.schema_path), 'schema is not reloaded')
+        self.assertTrue('mock_variable' in registry.get_arrow_schema(self.schema_path).names, 'arrow schema is not reloaded')
+        return
@@ -0,0 +1,132 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+from unittest.mock import MagicMock
+
+os.environ['master_spark_url'] = ''
+os.environ['spark_app_name'] = ''
+os.environ['parquet_file_name'] = ''
+os.environ['in_situ_schema'] = ''
+os.environ['authentication_type'] = ''
+os.environ['authentication_key'] = ''
+os.environ['parquet_metadata_tbl'] = ''
+os.environ['es_url'] = ''
+
+from parquet_flask.io_logic.parquet_paths_es_retriever import ParquetPathsEsRetriever
+from parquet_flask.io_logic.parquet_stats_catalog import ParquetStatsCatalog
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.singleton import Singleton
+
+
+class TestParquetPathsEsRetriever(unittest.TestCase):
+    def tearDown(self) -> None:
+        Singleton._instances.pop(ParquetStatsCatalog, None)
+        return
+
+    def __get_doc(self, year: int, month: int, job_id='j'):
+        return {
+            's3_url': f's3://mock-bucket/base/provider=p/project=pr/platform_code=30/geo_spatial_interval=0_0/year={year}/month={month}/job_id={job_id}/a.parquet',
+            'provider': 'p', 'project': 'pr', 'platform_code': '30', 'geo_spatial_interval': '0_0', 'year': str(year), 'month': str(month),
+            'total': 10,
+        }
+
+    def __get_paths(self, docs: list):
+        mock_es = MagicMock()
+        mock_es.query_pages.return_value = {'items': [{'_source': k} for k in docs], 'total': len(docs)}
+        return ParquetPathsEsRetriever('/tmp/base', QueryProps()).load_es_obj(mock_es).start()
+
+    def __get_es_terms(self, props: QueryProps):
+        mock_es = MagicMock()
+        mock_es.query_pages.return_value = {'items': [], 'total': 0}
+        ParquetPathsEsRetriever('/tmp/base', props).load_es_obj(mock_es).start()
+        return mock_es.query_pages.call_args[0][0]['query']['bool']['must']
+
+    def test_no_variable(self):
+        props = QueryProps()
+        props.provider = 'mock_provider'
+        es_terms = self.__get_es_terms(props)
+        self.assertEqual(es_terms, [{'term': {'provider': 'mock_provider'}}], f'unexpected terms: {es_terms}')
+        return
+
+    def test_variables(self):
+        props = QueryProps()
+        props.variable = ['sea_water_salinity', 'air_temperature']
+        es_terms = self.__get_es_terms(props)
+        expected_term = {
+            'bool': {
+                'should': [
+                    {'range': {'observation_counts.sea_water_salinity': {'gt': 0}}},
+                    {'bool': {'must_not': [{'exists': {'field': 'observation_counts.sea_water_salinity'}}]}},
+                    {'range': {'observation_counts.air_temperature': {'gt': 0}}},
+                    {'bool': {'must_not': [{'exists': {'field': 'observation_counts.air_temperature'}}]}},
+                ],
+                'minimum_should_match': 1,
+            }
+        }
+        self.assertEqual(es_terms, [expected_term], f'unexpected terms: {es_terms}')
+        return
+
+    def test_depth(self):
+        props = QueryProps()
+        props.min_depth = 0.0
+        props.max_depth = 5.0
+        es_terms = self.__get_es_terms(props)
+        expected_term = {
+            'bool': {
+                'should': [
+                    {'bool': {'must': [{'range': {'max_depth': {'gte': 0.0}}}, {'range': {'min_depth': {'lte': 5.0}}}]}},
+                    {'term': {'has_missing_depth': True}},
+                    {'bool': {'must_not': [{'exists': {'field': 'has_missing_depth'}}]}},
+                ],
+                'minimum_should_match': 1,
+            }
+        }
+        self.assertEqual(es_terms, [expected_term], f'surface query should include missing depth files: {es_terms}')
+        props.min_depth = 10.0
+        props.max_depth = 200.0
+        es_terms = self.__get_es_terms(props)
+        self.assertEqual(es_terms[0]['bool']['should'], [{'bool': {'must': [{'range': {'max_depth': {'gte': 10.0}}}, {'range': {'min_depth': {'lte': 200.0}}}]}}],
+                         f'subsurface query should only use the depth range: {es_terms}')
+        props.min_depth = None
+        props.max_depth = -10.0
+        es_terms = self.__get_es_terms(props)
+        self.assertEqual(len(es_terms[0]['bool']['should']), 3, f'missing depth value is inside the range: {es_terms}')
+        return
+
+    def test_collapse_full_year(self):
+        docs = [self.__get_doc(2018, k, job_id) for k in range(1, 13) for job_id in ['j1', 'j2']] + [self.__get_doc(2019, 1)]
+        paths = self.__get_paths(docs)
+        self.assertEqual(len(paths), len(docs), 'results should not be dropped')
+        self.assertEqual(set([k.generate_path() for k in paths[:-1]]), {'/tmp/base/provider=p/project=pr/platform_code=30/geo_spatial_interval=0_0/year=2018'}, 'full year is not collapsed')
+        self.assertEqual(paths[-1].generate_path(), '/tmp/base/provider=p/project=pr/platform_code=30/geo_spatial_interval=0_0/year=2019/month=1', 'partial year should not be collapsed')
+        self.assertEqual(paths[0].generate_file_path(), '/tmp/base/provider=p/project=pr/platform_code=30/geo_spatial_interval=0_0/year=2018/month=1/job_id=j1/a.parquet', 'file path should not change')
+        return
+
+    def test_collapse_with_catalog(self):
+        docs = [self.__get_doc(2018, 3), self.__get_doc(2018, 4), self.__get_doc(2019, 1)]
+        ParquetStatsCatalog().load_docs(docs)
+        mock_es = MagicMock()
+        paths = ParquetPathsEsRetriever('/tmp/base', QueryProps()).load_es_obj(mock_es).start()
+        mock_es.query_pages.assert_not_called()
+        self.assertEqual(set([k.generate_path() for k in paths]), {'/tmp/base/provider=p/project=pr/platform_code=30'}, 'all existing partitions are selected')
+        props = QueryProps()
+        props.min_datetime = '2018-01-01T00:00:00Z'
+        props.max_datetime = '2018-12-31T00:00:00Z'
+        ParquetStatsCatalog().load_docs([{**k, 'min_datetime': 1520000000.0 if k['year'] == '2018' else 1550000000.0, 'max_datetime': 1520000000.0 if k['year'] == '2018' else 1550000000.0} for k in docs])
+        paths = ParquetPathsEsRetriever('/tmp/base', props).start()
+        self.assertEqual(set([k.generate_path() for k in paths]), {'/tmp/base/provider=p/project=pr/platform_code=30/geo_spatial_interval=0_0/year=2018'}, 'only 2018 is fully selected')
+        return
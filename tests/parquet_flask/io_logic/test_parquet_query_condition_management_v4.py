@@ -0,0 +1,103 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from unittest.mock import patch
+
+from parquet_flask.io_logic.parquet_paths_es_retriever import ParquetPathsEsRetriever
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.query_v2 import QueryProps
+
+
+class TestParquetQueryConditionManagementV4(unittest.TestCase):
+    def __get_condition_manager(self, props: QueryProps):
+        es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+        condition_manager = ParquetQueryConditionManagementV4('s3a://mock-bucket/base-path/', -99999, es_config, props)
+        with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                patch.object(ParquetPathsEsRetriever, 'start', return_value=[]):
+            condition_manager.manage_query_props()
+        return condition_manager
+
+    def __get_base_props(self):
+        props = QueryProps()
+        props.min_datetime = '2018-03-03T00:00:00Z'
+        props.max_datetime = '2018-03-30T00:00:00Z'
+        return props
+
+    def test_no_marker(self):
+        condition_manager = self.__get_condition_manager(self.__get_base_props())
+        self.assertEqual([str(k) for k in condition_manager.conditions],
+                         ["time_obj >= TIMESTAMP '2018-03-03T00:00:00+00:00'", "time_obj <= TIMESTAMP '2018-03-30T00:00:00+00:00'"], f'wrong conditions')
+        return
+
+    def test_keyset_marker(self):
+        props = self.__get_base_props()
+        props.marker_platform_code = '30'
+        props.marker_depth = -5.0
+        props.marker_lat_lon = [-23.8257, 154.4868]
+        condition_manager = self.__get_condition_manager(props)
+        expected_keyset = "(time > '2018-03-03T00:00:00Z' OR (time = '2018-03-03T00:00:00Z' AND " \
+                          "(platform_code > '30' OR (platform_code = '30' AND " \
+                          "(depth > -5.0 OR (depth = -5.0 AND " \
+                          "(latitude > -23.8257 OR (latitude = -23.8257 AND " \
+                          "longitude > 154.4868))))))))"
+        self.assertEqual(str(condition_manager.conditions[-1]), expected_keyset, f'wrong keyset condition')
+        return
+
+    def test_keyset_marker_literal(self):
+        props = self.__get_base_props()
+        props.marker_platform_code = "30' OR 1=1 --"
+        props.marker_depth = 0.0
+        props.marker_lat_lon = [0.0, 0.0]
+        condition_manager = self.__get_condition_manager(props)
+        platform_condition = condition_manager.conditions[-1].children[1].children[1].children[0]
+        self.assertEqual(platform_condition.col_name, 'platform_code', f'wrong keyset condition: {condition_manager.conditions[-1]}')
+        self.assertEqual(platform_condition.val, "30' OR 1=1 --", f'platform code is not kept as a literal: {platform_condition}')
+        return
+
+    def test_incomplete_marker(self):
+        props = self.__get_base_props()
+        props.marker_platform_code = '30'
+        with self.assertRaises(ValueError):
+            self.__get_condition_manager(props)
+        return
+
+    def test_keyset_pages(self):
+        from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+        rows = [
+            ('2018-03-03T00:00:00Z', '30', 5.0, 1.0, 1.0),
+            ('2018-03-03T00:00:00Z', '30', 5.0, 1.0, 2.0),
+            ('2018-03-03T00:00:00Z', '30', 5.0, 2.0, 0.0),
+            ('2018-03-03T00:00:00Z', '31', -1.0, 0.0, 0.0),
+            ('2018-03-03T00:00:00Z', '31', 2.0, 0.0, 0.0),
+            ('2018-03-03T00:01:00Z', '30', 0.0, 0.0, 0.0),
+            ('2018-03-04T00:00:00Z', '29', 0.0, 0.0, 0.0),
+        ]
+        columns = ['time', 'platform_code', 'depth', 'latitude', 'longitude']
+        df = LocalSparkSession().get_spark_session().createDataFrame(rows, columns).sort(columns)
+        collected = []
+        page = df.limit(2).collect()
+        while len(page) > 0:
+            collected.extend([tuple(k) for k in page])
+            last_row = page[-1].asDict()
+            props = self.__get_base_props()
+            props.min_datetime = last_row['time']
+            props.marker_platform_code = last_row['platform_code']
+            props.marker_depth = last_row['depth']
+            props.marker_lat_lon = [last_row['latitude'], last_row['longitude']]
+            keyset_condition = self.__get_condition_manager(props).conditions[-1]
+            page = df.where(keyset_condition.to_spark_column()).limit(2).collect()
+        self.assertEqual(collected, sorted(rows), f'keyset pages do not match sorted rows')
+        return
@@ -0,0 +1,147 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+from unittest.mock import MagicMock
+
+os.environ['master_spark_url'] = ''
+os.environ['spark_app_name'] = ''
+os.environ['parquet_file_name'] = ''
+os.environ['in_situ_schema'] = ''
+os.environ['authentication_type'] = ''
+os.environ['authentication_key'] = ''
+os.environ['parquet_metadata_tbl'] = ''
+os.environ['es_url'] = ''
+
+from parquet_flask.io_logic.parquet_paths_es_retriever import ParquetPathsEsRetriever
+from parquet_flask.io_logic.parquet_stats_catalog import ParquetStatsCatalog
+from parquet_flask.io_logic.query_result_cache import QueryResultCache
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.singleton import Singleton
+from parquet_flask.utils.time_utils import TimeUtils
+
+
+class TestParquetStatsCatalog(unittest.TestCase):
+    def tearDown(self) -> None:
+        Singleton._instances.pop(ParquetStatsCatalog, None)
+        return
+
+    def __get_doc(self, file_name: str, platform_code: str, min_time: str, max_time: str, lat_lon: float, min_depth=0.0, max_depth=10.0, **kwargs):
+        return {
+            's3_url': f's3://mock-bucket/base/provider=p/project=pr/platform_code={platform_code}/geo_spatial_interval=0_0/year=2018/month=3/job_id=j/{file_name}',
+            'provider': 'p', 'project': 'pr', 'platform_code': platform_code, 'geo_spatial_interval': '0_0', 'year': '2018', 'month': '3',
+            'total': 10,
+            'min_datetime': TimeUtils.get_datetime_obj(min_time).timestamp(),
+            'max_datetime': TimeUtils.get_datetime_obj(max_time).timestamp(),
+            'min_depth': min_depth, 'max_depth': max_depth,
+            'min_lat': lat_lon, 'max_lat': lat_lon + 1.0, 'min_lon': lat_lon, 'max_lon': lat_lon + 1.0,
+            **kwargs,
+        }
+
+    def __get_docs(self):
+        return [
+            self.__get_doc('a.parquet', '30', '2018-03-01T00:00:00Z', '2018-03-02T00:00:00Z', 0.0),
+            self.__get_doc('b.parquet', '30', '2018-03-03T00:00:00Z', '2018-03-04T00:00:00Z', 10.0),
+            self.__get_doc('c.parquet', '31', '2018-03-01T12:00:00Z', '2018-03-05T00:00:00Z', 0.5, min_depth=50.0, max_depth=100.0, has_missing_depth=True),
+            self.__get_doc('d.parquet', '31', '2018-03-10T00:00:00Z', '2018-03-11T00:00:00Z', 0.0, observation_counts={'air_temperature': 0}),
+        ]
+
+    def __search(self, props: QueryProps):
+        return [k.s3_url.split('/')[-1] for k in ParquetPathsEsRetriever('/tmp/base', props).start()]
+
+    def test_search(self):
+        catalog = ParquetStatsCatalog()
+        catalog.load_docs(self.__get_docs())
+        self.assertTrue(catalog.is_ready, 'catalog is not ready after loading')
+        props = QueryProps()
+        props.min_datetime = '2018-03-01T18:00:00Z'
+        props.max_datetime = '2018-03-09T00:00:00Z'
+        self.assertEqual(self.__search(props), ['a.parquet', 'c.parquet', 'b.parquet'], 'wrong time range result')
+        props.min_lat_lon = [0.0, 0.0]
+        props.max_lat_lon = [5.0, 5.0]
+        self.assertEqual(self.__search(props), ['a.parquet', 'c.parquet'], 'wrong bbox result')
+        props.platform_code = ['31']
+        self.assertEqual(self.__search(props), ['c.parquet'], 'wrong platform result')
+        props.min_depth = 0.0
+        props.max_depth = 5.0
+        self.assertEqual(self.__search(props), ['c.parquet'], 'missing depth rows should match surface')
+        props.min_depth = 1.0
+        self.assertEqual(self.__search(props), [], 'missing depth rows should not match subsurface')
+        props = QueryProps()
+        props.variable = ['air_temperature']
+        self.assertEqual(self.__search(props), ['a.parquet', 'c.parquet', 'b.parquet'], 'file without observations should be dropped')
+        return
+
+    def test_refresh(self):
+        docs = self.__get_docs()
+        mock_es = MagicMock()
+        mock_es.query_pages.return_value = {'items': [{'_source': k} for k in docs[:2]], 'total': 2}
+        catalog = ParquetStatsCatalog().load_es_obj(mock_es)
+        catalog.refresh()
+        self.assertEqual(self.__search(QueryProps()), ['a.parquet', 'b.parquet'], 'wrong snapshot')
+        mock_es.query_pages.return_value = {'items': [{'_source': docs[2]}], 'total': 1}
+        mock_es.count.return_value = 3
+        catalog.refresh()
+        self.assertEqual(self.__search(QueryProps()), ['a.parquet', 'c.parquet', 'b.parquet'], 'new document is not added')
+        self.assertIn('range', mock_es.query_pages.call_args[0][0]['query'], 'refresh should be incremental')
+        mock_es.query_pages.side_effect = [{'items': [], 'total': 0}, {'items': [{'_source': docs[0]}], 'total': 1}]
+        mock_es.count.return_value = 1
+        catalog.refresh()
+        self.assertEqual(self.__search(QueryProps()), ['a.parquet'], 'deleted documents are not removed')
+        return
+
+    def __get_cached_props(self, platform_code: str):
+        props = QueryProps()
+        props.provider = 'p'
+        props.project = 'pr'
+        props.platform_code = [platform_code]
+        props.min_datetime = '2018-03-01T00:00:00Z'
+        props.max_datetime = '2018-03-31T00:00:00Z'
+        QueryResultCache().put(props, {'total': 0, 'results': []})
+        return props
+
+    def test_refresh_invalidates_cache(self):
+        QueryResultCache().clear()
+        docs = self.__get_docs()
+        mock_es = MagicMock()
+        mock_es.query_pages.return_value = {'items': [{'_source': k} for k in docs[:2]], 'total': 2}
+        catalog = ParquetStatsCatalog().load_es_obj(mock_es)
+        catalog.refresh()
+        props_30, props_31 = self.__get_cached_props('30'), self.__get_cached_props('31')
+        mock_es.query_pages.return_value = {'items': [{'_source': k} for k in docs[:3]], 'total': 3}
+        mock_es.count.return_value = 3
+        catalog.refresh()
+        self.assertEqual(QueryResultCache().get(props_31), None, 'new document should invalidate its platform')
+        self.assertNotEqual(QueryResultCache().get(props_30), None, 'unchanged documents should not invalidate')
+        return
+
+    def test_watch_updates(self):
+        QueryResultCache().clear()
+        docs = self.__get_docs()
+        mock_es = MagicMock()
+        mock_es.query_pages.return_value = {'items': [{'_source': docs[0]}], 'total': 1}
+        catalog = ParquetStatsCatalog().load_es_obj(mock_es)
+        catalog.watch_updates()
+        self.assertFalse(mock_es.query_pages.called, 'first poll should not read the whole index')
+        props_30, props_31 = self.__get_cached_props('30'), self.__get_cached_props('31')
+        catalog.watch_updates()
+        self.assertEqual(QueryResultCache().get(props_30), None, 'new document should invalidate its platform')
+        self.assertNotEqual(QueryResultCache().get(props_31), None, 'other platforms should stay cached')
+        props_30 = self.__get_cached_props('30')
+        catalog.watch_updates()
+        self.assertNotEqual(QueryResultCache().get(props_30), None, 'documents seen in the previous poll should not invalidate again')
+        self.assertFalse(catalog.is_ready, 'catalog should not be loaded when it is disabled')
+        return
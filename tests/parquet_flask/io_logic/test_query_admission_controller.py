@@ -0,0 +1,148 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+os.environ['master_spark_url'] = ''
+os.environ['spark_app_name'] = ''
+os.environ['parquet_file_name'] = ''
+os.environ['in_situ_schema'] = ''
+os.environ['authentication_type'] = ''
+os.environ['authentication_key'] = ''
+os.environ['parquet_metadata_tbl'] = ''
+os.environ['es_url'] = ''
+
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_admission_controller import QueryAdmissionController
+from parquet_flask.io_logic.query_cost_estimator import QueryCostEstimator
+from parquet_flask.io_logic.query_rejected_error import QueryRejectedError
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.config import Config
+from parquet_flask.utils.singleton import Singleton
+
+
+class TestQueryAdmissionController(unittest.TestCase):
+    def setUp(self) -> None:
+        os.environ[Config.query_max_rows] = '1000'
+        os.environ[Config.admission_global_rows] = '1500'
+        os.environ[Config.admission_client_rows] = '1000'
+        os.environ[Config.admission_queue_seconds] = '0.5'
+        Singleton._instances.pop(QueryAdmissionController, None)
+        return
+
+    def tearDown(self) -> None:
+        for each in [Config.query_max_rows, Config.admission_global_rows, Config.admission_client_rows, Config.admission_queue_seconds]:
+            os.environ.pop(each, None)
+        Singleton._instances.pop(QueryAdmissionController, None)
+        return
+
+    def __get_props(self):
+        props = QueryProps()
+        props.provider = 'Florida State University, COAPS'
+        props.project = 'SAMOS'
+        props.platform_code = ['30', '31']
+        props.min_datetime = '2017-01-01T00:00:00Z'
+        props.max_datetime = '2017-03-02T00:00:00Z'
+        props.min_lat_lon = [-90.0, -180.0]
+        props.max_lat_lon = [90.0, 180.0]
+        return props
+
+    def __get_condition_manager(self, file_stats: list):
+        parquet_names = []
+        for i, each in enumerate(file_stats):
+            parquet_names.append(PartitionedParquetPath('base').set_provider('p').set_project('s').set_platform('30').set_year('2017').set_month(f'{i + 1}').load_from_es(each))
+        condition_manager = MagicMock()
+        condition_manager.parquet_names = parquet_names
+        condition_manager.stringify_parquet_names.return_value = [k.generate_path() for k in parquet_names]
+        return condition_manager
+
+    def __get_cost(self, rows: int):
+        return {'files': 1, 'rows': rows, 'bytes': None, 'partition_paths': 1}
+
+    def test_estimate_01(self):
+        condition_manager = self.__get_condition_manager([
+            {CDMSConstants.s3_url_key: 's3://b/a.parquet', CDMSConstants.total_key: 100, CDMSConstants.file_size_key: 2000},
+            {CDMSConstants.s3_url_key: 's3://b/b.parquet', CDMSConstants.total_key: 50},
+            {CDMSConstants.s3_url_key: 's3://b/a.parquet', CDMSConstants.total_key: 100, CDMSConstants.file_size_key: 2000},
+        ])
+        query_cost = QueryCostEstimator(self.__get_props()).estimate(condition_manager)
+        self.assertEqual(2, query_cost['files'], 'wrong files')
+        self.assertEqual(150, query_cost['rows'], 'wrong rows')
+        self.assertEqual(3000, query_cost['bytes'], 'missing file_size is not extrapolated')
+        return
+
+    def test_estimate_02(self):
+        condition_manager = self.__get_condition_manager([
+            {CDMSConstants.s3_url_key: 's3://b/a.parquet', CDMSConstants.total_key: 100},
+            {},
+        ])
+        query_cost = QueryCostEstimator(self.__get_props()).estimate(condition_manager)
+        self.assertEqual(None, query_cost['rows'], 'rows of incomplete stats should be unknown')
+        self.assertEqual(None, query_cost['bytes'], 'bytes of incomplete stats should be unknown')
+        return
+
+    def test_over_limits(self):
+        estimator = QueryCostEstimator(self.__get_props())
+        with self.assertRaises(QueryRejectedError) as context:
+            with QueryAdmissionController().admit('c1', self.__get_cost(3000), estimator.get_suggestions):
+                self.fail('query over the limits should not run')
+        self.assertEqual(400, context.exception.status_code, 'wrong status code')
+        self.assertEqual({}, context.exception.get_headers(), '400 should not have Retry-After')
+        suggestions = context.exception.suggestions
+        self.assertTrue(any([k.startswith('narrow startTime / endTime from 60.0 days to about 20.0 days') for k in suggestions]), f'wrong suggestions: {suggestions}')
+        self.assertTrue(any([k.startswith('shrink bbox') for k in suggestions]), f'wrong suggestions: {suggestions}')
+        self.assertEqual(1, QueryAdmissionController().get_stats()['rejected_by_limits'], 'wrong stats')
+        return
+
+    def test_client_budget(self):
+        estimator = QueryCostEstimator(self.__get_props())
+        controller = QueryAdmissionController()
+        with controller.admit('c1', self.__get_cost(800), estimator.get_suggestions):
+            with self.assertRaises(QueryRejectedError) as context:
+                with controller.admit('c1', self.__get_cost(800), estimator.get_suggestions):
+                    self.fail('query over the client budget should not run')
+            self.assertEqual(429, context.exception.status_code, 'wrong status code')
+            self.assertEqual({'Retry-After': '1'}, context.exception.get_headers(), 'wrong headers')
+            with controller.admit('c2', self.__get_cost(500), estimator.get_suggestions):
+                self.assertEqual(1300, controller.get_stats()['running_rows'], 'other clients should be admitted within the global budget')
+        self.assertEqual(0, controller.get_stats()['running_queries'], 'queries are not released')
+        return
+
+    def test_queued_until_released(self):
+        estimator = QueryCostEstimator(self.__get_props())
+        controller = QueryAdmissionController()
+        admitted_at = []
+
+        def queued_query():
+            with controller.admit('c2', self.__get_cost(900), estimator.get_suggestions):
+                admitted_at.append(time.monotonic())
+            return
+
+        with controller.admit('c1', self.__get_cost(900), estimator.get_suggestions):
+            queued_thread = threading.Thread(target=queued_query)
+            queued_thread.start()
+            time.sleep(0.2)
+            self.assertEqual([], admitted_at, 'query over the global budget should be queued')
+            released_at = time.monotonic()
+        queued_thread.join()
+        self.assertEqual(1, len(admitted_at), 'queued query is not admitted')
+        self.assertTrue(admitted_at[0] >= released_at, 'queued query is admitted before the release')
+        self.assertEqual(1, controller.get_stats()['queued'], 'wrong stats')
+        return
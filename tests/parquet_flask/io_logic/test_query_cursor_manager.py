@@ -0,0 +1,105 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import pyspark.sql.functions as F
+
+os.environ['master_spark_url'] = ''
+os.environ['spark_app_name'] = ''
+os.environ['parquet_file_name'] = ''
+os.environ['in_situ_schema'] = ''
+os.environ['authentication_type'] = ''
+os.environ['authentication_key'] = ''
+os.environ['parquet_metadata_tbl'] = ''
+os.environ['es_url'] = ''
+
+from parquet_flask.io_logic.query_cursor_manager import QueryCursorManager
+from parquet_flask.io_logic.spark_row_index import SparkRowIndex
+from parquet_flask.utils.singleton import Singleton
+
+
+class TestQueryCursorManager(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+        cls.spark = LocalSparkSession().get_spark_session()
+        cls.cursor_path = tempfile.mkdtemp()
+        os.environ['query_cursor_path'] = cls.cursor_path
+        Singleton._instances.pop(QueryCursorManager, None)
+        return
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        os.environ.pop('query_cursor_path')
+        Singleton._instances.pop(QueryCursorManager, None)
+        return
+
+    def test_read_pages(self):
+        rows = [(f'2018-03-0{k % 9 + 1}T00:00:00Z', str(k % 3), float(k)) for k in range(25)]
+        df = self.spark.createDataFrame(rows, ['time', 'platform_code', 'depth'])
+        sorting_params = [df['time'].asc_nulls_first(), df['platform_code'].asc_nulls_first(), df['depth'].asc_nulls_first()]
+        sorted_df = df.sort(*sorting_params)
+        expected = [k.asDict() for k in sorted_df.collect()]
+        cursor_id = QueryCursorManager().create(sorted_df, self.spark)
+        self.assertFalse(QueryCursorManager().is_expired(cursor_id), f'new cursor is expired: {cursor_id}')
+        for start_at in range(0, 30, 10):
+            page = QueryCursorManager().read_page(cursor_id, start_at, 10)
+            self.assertEqual(page, expected[start_at: start_at + 10], f'wrong page at {start_at}')
+        return
+
+    def test_index_across_partitions(self):
+        df = self.spark.range(1000).withColumn('depth', (1000 - F.col('id')).cast('double')).repartition(7)
+        sorted_df = df.sort(df['depth'].asc_nulls_first())
+        self.spark.conf.set('spark.sql.adaptive.coalescePartitions.enabled', 'false')  # keeps the sorted rows in many partitions
+        try:
+            self.assertTrue(sorted_df.rdd.getNumPartitions() > 1, 'sorted result should have many partitions')
+            cursor_id = QueryCursorManager().create(sorted_df, self.spark)
+        finally:
+            self.spark.conf.unset('spark.sql.adaptive.coalescePartitions.enabled')
+        cursor_path = QueryCursorManager().get_cursor_path(cursor_id)
+        index_values = sorted([k[QueryCursorManager.INDEX_COL] for k in self.spark.read.parquet(cursor_path).collect()])
+        self.assertEqual(list(range(1000)), index_values, 'row index is not consecutive')
+        page = QueryCursorManager().read_page(cursor_id, 500, 3)
+        self.assertEqual([501.0, 502.0, 503.0], [k['depth'] for k in page], f'wrong page: {page}')
+        return
+
+    def test_index_range(self):
+        df = self.spark.range(1000).withColumn('depth', (1000 - F.col('id')).cast('double')).repartition(7)
+        sorted_df = df.sort(df['depth'].asc_nulls_first())
+        self.spark.conf.set('spark.sql.adaptive.coalescePartitions.enabled', 'false')
+        try:
+            numbered_result = SparkRowIndex.number_rows(sorted_df).cache()
+            page = SparkRowIndex.get_indexed_result(numbered_result, 'index', 498, 503).collect()
+            empty_page = SparkRowIndex.get_indexed_result(numbered_result, 'index', 1000, 1010).collect()
+            numbered_result.unpersist()
+        finally:
+            self.spark.conf.unset('spark.sql.adaptive.coalescePartitions.enabled')
+        self.assertEqual([(k, float(k + 1)) for k in range(498, 503)], [(k['index'], k['depth']) for k in page], f'wrong page: {page}')
+        self.assertEqual([], empty_page, f'page after the last row should be empty')
+        return
+
+    def test_expired_cursor(self):
+        expired_id = f'{"0" * 32}_1'
+        os.makedirs(os.path.join(self.cursor_path, expired_id))
+        self.assertTrue(QueryCursorManager().is_expired(expired_id), f'cursor is not expired: {expired_id}')
+        self.assertEqual(QueryCursorManager().read_page(expired_id, 0, 10), None, f'expired cursor is read')
+        self.assertEqual(QueryCursorManager().read_page('../not_a_cursor', 0, 10), None, f'invalid cursor is read')
+        self.assertEqual(QueryCursorManager().read_page(f'{"1" * 32}_9999999999', 0, 10), None, f'missing cursor is read')
+        self.assertEqual(QueryCursorManager().gc(self.spark, force=True), 1, f'expired cursor is not deleted')
+        self.assertFalse(os.path.exists(os.path.join(self.cursor_path, expired_id)), f'expired cursor still exists')
+        return
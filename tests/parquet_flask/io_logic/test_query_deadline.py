@@ -0,0 +1,105 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+import time
+import unittest
+
+import gevent
+
+from parquet_flask.io_logic.query_deadline import QueryDeadline
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
+from parquet_flask.utils.client_socket_wsgi_handler import ClientSocketWsgiHandler
+
+
+class TestQueryDeadline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+        cls.spark = LocalSparkSession().get_spark_session()
+        return
+
+    def __run_slow_job(self, job_scopes: list):
+        with SparkJobScope(self.spark, SparkJobScope.QUERY_POOL, 'slow query') as job_scope:
+            job_scopes.append(job_scope)
+            return self.spark.sparkContext.parallelize(range(2), 2).map(lambda k: time.sleep(60) or k).collect()
+
+    def test_cancel_spark_job(self):
+        job_scopes = []
+        start_time = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            QueryDeadline(2).run(self.__run_slow_job, job_scopes)
+        self.assertTrue(time.monotonic() - start_time < 30, f'spark job is not cancelled. duration: {time.monotonic() - start_time}')
+        spark_context = self.spark.sparkContext
+        job_ids = spark_context.statusTracker().getJobIdsForGroup(job_scopes[0].job_group)
+        self.assertTrue(len(job_ids) > 0, 'no job in the job group')
+        self.assertEqual([spark_context.statusTracker().getJobInfo(k).status for k in job_ids], ['FAILED'] * len(job_ids), 'job is not cancelled')
+        return
+
+    def test_greenlet_deadline(self):
+        query_deadline = QueryDeadline(0.3)
+        start_time = time.monotonic()
+        greenlet = gevent.spawn(query_deadline.run, time.sleep, 2)
+        greenlet.join()
+        self.assertTrue(isinstance(greenlet.exception, TimeoutError), f'deadline is not raised: {greenlet.exception}')
+        self.assertTrue(time.monotonic() - start_time < 1.5, 'greenlet waited for the blocking call')
+        return
+
+    def test_greenlet_disconnect(self):
+        query_deadline = QueryDeadline(60, lambda: True)
+        greenlet = gevent.spawn(query_deadline.run, time.sleep, 0.5)
+        greenlet.join()
+        self.assertTrue(isinstance(greenlet.exception, TimeoutError), f'disconnect is not raised: {greenlet.exception}')
+        self.assertEqual(query_deadline.cancel_reason, 'client disconnected', 'wrong cancel reason')
+        return
+
+    def test_within_deadline(self):
+        self.assertEqual(QueryDeadline(10).run(lambda: QueryDeadline.get_current() is not None), True, 'deadline is not visible in the thread')
+        self.assertEqual(QueryDeadline.get_current(), None, 'deadline leaked out of run')
+        return
+
+    def test_iterate(self):
+        self.assertEqual(list(QueryDeadline(10).iterate(iter(range(5)))), list(range(5)), 'wrong items')
+        return
+
+    def test_iterate_close(self):
+        events = []
+
+        def generate_items():
+            try:
+                events.append('started')
+                yield from range(5)
+            finally:
+                events.append('released')
+
+        inner_items = generate_items()  # referenced here so that it is not finalized by the garbage collection
+        items = QueryDeadline(10).iterate(inner_items)
+        self.assertEqual(next(items), 0, 'wrong first item')
+        items.close()
+        self.assertEqual(events, ['started', 'released'], 'inner iterator is not closed with the stream')
+        return
+
+    def test_is_disconnected(self):
+        server_socket, client_socket = socket.socketpair()
+        environ = {ClientSocketWsgiHandler.SOCKET_KEY: server_socket}
+        self.assertFalse(ClientSocketWsgiHandler.is_disconnected(environ), 'open socket is disconnected')
+        client_socket.sendall(b'GET')
+        self.assertFalse(ClientSocketWsgiHandler.is_disconnected(environ), 'pipelined request is disconnected')
+        client_socket.close()
+        server_socket.recv(3)
+        self.assertTrue(ClientSocketWsgiHandler.is_disconnected(environ), 'closed socket is connected')
+        server_socket.close()
+        self.assertFalse(ClientSocketWsgiHandler.is_disconnected({}), 'missing socket is disconnected')
+        return
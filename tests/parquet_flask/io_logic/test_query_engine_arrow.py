@@ -0,0 +1,258 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+os.environ['master_spark_url'] = ''
+os.environ['spark_app_name'] = ''
+os.environ['parquet_file_name'] = ''
+os.environ['in_situ_schema'] = ''
+os.environ['authentication_type'] = ''
+os.environ['authentication_key'] = ''
+os.environ['parquet_metadata_tbl'] = ''
+os.environ['es_url'] = ''
+
+from parquet_flask.io_logic.arrow_utils import ArrowUtils
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.parquet_paths_es_retriever import ParquetPathsEsRetriever
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.partitioned_parquet_path import PartitionedParquetPath
+from parquet_flask.io_logic.query_engine_arrow import QueryEngineArrow
+from parquet_flask.io_logic.query_engine_spark import QueryEngineSpark
+from parquet_flask.io_logic.query_timer import QueryTimer
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
+
+IN_SITU_SCHEMA = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'in_situ_schema.json')
+
+
+class TestQueryEngineArrow(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from pyspark.sql.functions import to_timestamp
+        from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+        os.environ['in_situ_schema'] = IN_SITU_SCHEMA  # other test modules overwrite it while being collected
+        cls.spark = LocalSparkSession().get_spark_session()
+        cls.base_path = tempfile.mkdtemp()
+        rows = [
+            ('2018-03-03T00:00:00Z', 1.0, 1.0, 5.0, 20.1, 1, {'code': '30', 'type': '31'}, '30', '0_0', 2018, 3),
+            ('2018-03-03T00:00:00Z', 1.0, 2.0, 5.0, None, None, {'code': '30', 'type': '31'}, '30', '0_0', 2018, 3),
+            ('2018-03-03T00:00:00Z', 2.0, 0.0, -99999.0, 21.5, 1, {'code': '31', 'type': '31'}, '31', '0_0', 2018, 3),
+            ('2018-03-03T00:01:00Z', 0.0, 0.0, 0.0, 19.0, 2, {'code': '30', 'type': '31'}, '30', '0_0', 2018, 3),
+            ('2018-03-04T00:00:00Z', 0.0, 0.0, None, 18.2, 1, {'code': '3B', 'type': '31'}, '3B', '0_0', 2018, 3),
+            ('2018-03-05T00:00:00Z', 12.0, 11.0, 30.0, None, None, {'code': '3B', 'type': '31'}, '3B', '10_10', 2018, 3),
+            ('2018-04-01T00:00:00Z', 3.0, 3.0, 1.0, 17.0, 1, {'code': '30', 'type': '31'}, '30', '0_0', 2018, 4),
+        ]
+        columns = [CDMSConstants.time_col, CDMSConstants.lat_col, CDMSConstants.lon_col, CDMSConstants.depth_col, 'air_temperature', 'air_temperature_quality',
+                   CDMSConstants.platform_col, CDMSConstants.platform_code_col, CDMSConstants.geo_spatial_interval_col, CDMSConstants.year_col, CDMSConstants.month_col]
+        df = cls.spark.createDataFrame(rows, columns)
+        df = df.withColumn(CDMSConstants.time_obj_col, to_timestamp(CDMSConstants.time_col))
+        df.repartition(2).write.mode('overwrite').partitionBy(CDMSConstants.platform_code_col, CDMSConstants.geo_spatial_interval_col, CDMSConstants.year_col, CDMSConstants.month_col)\
+            .parquet(os.path.join(cls.base_path, f'{CDMSConstants.provider_col}=mock_provider', f'{CDMSConstants.project_col}=mock_project'))
+        cls.parquet_names = []
+        for each in sorted(glob.glob(os.path.join(cls.base_path, '**', '*.parquet'), recursive=True)):
+            partitions = dict([k.split('=', 1) for k in each[len(cls.base_path):].split(os.sep) if '=' in k])
+            partitions[CDMSConstants.s3_url_key] = each
+            partitions[CDMSConstants.total_key] = 1
+            cls.parquet_names.append(PartitionedParquetPath(cls.base_path).load_from_es(partitions))
+        return
+
+    def __assert_identical(self, props: QueryProps):
+        es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+        condition_manager = ParquetQueryConditionManagementV4(self.base_path, -99999, es_config, props)
+        with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                patch.object(ParquetPathsEsRetriever, 'start', return_value=self.parquet_names):
+            condition_manager.manage_query_props()
+        spark_result = QueryEngineSpark(props, self.base_path, self.spark).search(condition_manager)
+        arrow_result = QueryEngineArrow(props, self.base_path, -99999).search(condition_manager)
+        self.assertEqual(spark_result, arrow_result, f'different results for {condition_manager.conditions}')
+        return spark_result
+
+    def __get_props(self):
+        props = QueryProps()
+        props.min_datetime = '2018-03-03T00:00:00Z'
+        props.max_datetime = '2018-03-31T00:00:00Z'
+        props.size = 10
+        return props
+
+    def test_time_range(self):
+        result = self.__assert_identical(self.__get_props())
+        self.assertEqual(result['total'], 6, f'wrong total: {result}')
+        self.assertEqual(result['results'][0][CDMSConstants.platform_col], {'code': '30', 'type': '31'}, f'platform is not a dict: {result}')
+        return
+
+    def test_depth_and_variable(self):
+        props = self.__get_props()
+        props.min_depth = -10.0
+        props.max_depth = 10.0
+        props.variable = ['air_temperature']
+        result = self.__assert_identical(props)
+        self.assertEqual(result['total'], 3, f'wrong total: {result}')
+        return
+
+    def test_bbox_and_offset(self):
+        props = self.__get_props()
+        props.min_lat_lon = [0.0, 0.0]
+        props.max_lat_lon = [5.0, 5.0]
+        props.start_at = 2
+        props.size = 2
+        result = self.__assert_identical(props)
+        self.assertEqual(len(result['results']), 2, f'wrong page size: {result}')
+        return
+
+    def test_marker(self):
+        props = self.__get_props()
+        props.marker_platform_code = '30'
+        props.marker_depth = 5.0
+        props.marker_lat_lon = [1.0, 1.0]
+        result = self.__assert_identical(props)
+        self.assertEqual(result['total'], -1, f'total should not be counted: {result}')
+        self.assertEqual(len(result['results']), 5, f'wrong page size: {result}')
+        return
+
+    def test_search_table(self):
+        for start_at, size in [(0, 10), (2, 3), (7, 2)]:
+            props = self.__get_props()
+            props.start_at = start_at
+            props.size = size
+            result = self.__assert_identical(props)
+            es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+            condition_manager = ParquetQueryConditionManagementV4(self.base_path, -99999, es_config, props)
+            with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                    patch.object(ParquetPathsEsRetriever, 'start', return_value=self.parquet_names):
+                condition_manager.manage_query_props()
+            spark_result = QueryEngineSpark(props, self.base_path, self.spark).search_table(condition_manager)
+            os.environ['top_k_max_rows'] = '0'  # deep pages
+            try:
+                deep_spark_result = QueryEngineSpark(props, self.base_path, self.spark).search_table(condition_manager)
+            finally:
+                os.environ.pop('top_k_max_rows')
+            arrow_result = QueryEngineArrow(props, self.base_path, -99999).search_table(condition_manager)
+            self.assertEqual(spark_result['total'], result['total'], f'wrong spark total at {start_at}')
+            self.assertEqual(arrow_result['total'], result['total'], f'wrong arrow total at {start_at}')
+            self.assertEqual(ArrowUtils.to_dict_list(spark_result['results']), result['results'], f'spark table is different from search at {start_at}')
+            self.assertEqual(ArrowUtils.to_dict_list(deep_spark_result['results']), result['results'], f'deep spark table is different from search at {start_at}')
+            self.assertEqual(ArrowUtils.to_dict_list(arrow_result['results']), result['results'], f'arrow table is different from search at {start_at}')
+        return
+
+    def test_stream(self):
+        for start_at, size in [(0, 10), (2, 3), (7, 2)]:
+            props = self.__get_props()
+            props.start_at = start_at
+            props.size = size
+            result = self.__assert_identical(props)
+            es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+            condition_manager = ParquetQueryConditionManagementV4(self.base_path, -99999, es_config, props)
+            with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                    patch.object(ParquetPathsEsRetriever, 'start', return_value=self.parquet_names):
+                condition_manager.manage_query_props()
+            spark_rows = list(QueryEngineSpark(props, self.base_path, self.spark).stream(condition_manager))
+            os.environ['top_k_max_rows'] = '0'  # deep pages
+            try:
+                deep_spark_rows = list(QueryEngineSpark(props, self.base_path, self.spark).stream(condition_manager))
+            finally:
+                os.environ.pop('top_k_max_rows')
+            arrow_rows = list(QueryEngineArrow(props, self.base_path, -99999).stream(condition_manager))
+            self.assertEqual(spark_rows, result['results'], f'spark stream is different from search at {start_at}')
+            self.assertEqual(deep_spark_rows, result['results'], f'deep spark stream is different from search at {start_at}')
+            self.assertEqual(arrow_rows, result['results'], f'arrow stream is different from search at {start_at}')
+        return
+
+    def test_stream_read_in_scope(self):
+        props = self.__get_props()
+        es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+        condition_manager = ParquetQueryConditionManagementV4(self.base_path, -99999, es_config, props)
+        with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                patch.object(ParquetPathsEsRetriever, 'start', return_value=self.parquet_names):
+            condition_manager.manage_query_props()
+        read_pools = []
+        get_unioned_read_df = QueryEngineSpark.get_unioned_read_df
+
+        def get_read_df(query_engine, *args):
+            read_pools.append(self.spark.sparkContext.getLocalProperty(SparkJobScope.POOL_KEY))
+            return get_unioned_read_df(query_engine, *args)
+
+        with patch.object(QueryEngineSpark, 'get_unioned_read_df', get_read_df):
+            list(QueryEngineSpark(props, self.base_path, self.spark).stream(condition_manager))
+        self.assertEqual(read_pools, [SparkJobScope.QUERY_POOL], 'files are read outside of the query scope')
+        return
+
+    def test_count_only(self):
+        props = self.__get_props()
+        props.size = 0
+        props.variable = ['air_temperature']
+        result = self.__assert_identical(props)
+        self.assertEqual(result['total'], 4, f'wrong total: {result}')
+        self.assertTrue(result['is_total_exact'], f'partial files are scanned. total should be exact: {result}')
+        return
+
+    def test_projected_columns(self):
+        props = self.__get_props()
+        props.columns = [CDMSConstants.lat_col]
+        props.variable = ['air_temperature']
+        props.quality_flag = True
+        props.min_depth = -10.0
+        result = self.__assert_identical(props)
+        self.assertEqual(list(result['results'][0].keys()), [CDMSConstants.lat_col, 'air_temperature', 'air_temperature_quality', CDMSConstants.time_col,
+                                                             CDMSConstants.platform_code_col, CDMSConstants.depth_col, CDMSConstants.lon_col], f'wrong columns: {result}')
+        es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+        condition_manager = ParquetQueryConditionManagementV4(self.base_path, -99999, es_config, props)
+        with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                patch.object(ParquetPathsEsRetriever, 'start', return_value=self.parquet_names):
+            condition_manager.manage_query_props()
+        all_columns = [CDMSConstants.time_col, CDMSConstants.time_obj_col, CDMSConstants.lat_col, CDMSConstants.lon_col, CDMSConstants.depth_col, 'meta',
+                       CDMSConstants.platform_col, 'air_temperature', 'air_temperature_quality', 'sea_water_salinity', CDMSConstants.platform_code_col]
+        reading_columns = QueryEngineArrow(props, self.base_path, -99999)._get_reading_columns(condition_manager, all_columns)
+        self.assertEqual(reading_columns, [CDMSConstants.time_col, CDMSConstants.time_obj_col, CDMSConstants.lat_col, CDMSConstants.lon_col, CDMSConstants.depth_col,
+                                           'air_temperature', 'air_temperature_quality', CDMSConstants.platform_code_col], f'wrong reading columns')
+        return
+
+    def test_explain(self):
+        props = self.__get_props()
+        props.variable = ['air_temperature']
+        es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+        condition_manager = ParquetQueryConditionManagementV4(self.base_path, -99999, es_config, props)
+        with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                patch.object(ParquetPathsEsRetriever, 'start', return_value=self.parquet_names):
+            condition_manager.manage_query_props()
+        self.assertTrue(f'{CDMSConstants.observation_counts_key}.air_temperature' in str(condition_manager.es_dsl), f'variable is not in es_dsl: {condition_manager.es_dsl}')
+        spark_explanation = QueryEngineSpark(props, self.base_path, self.spark).explain(condition_manager)
+        self.assertTrue('TakeOrderedAndProject' in spark_explanation['physical_plan'], f'page is not planned as top-K: {spark_explanation}')
+        self.assertTrue('IsNotNull(air_temperature)' in spark_explanation['pushed_filters'], f'wrong pushed filters: {spark_explanation}')
+        self.assertTrue(any([k.startswith('GreaterThanOrEqual(time_obj,') for k in spark_explanation['pushed_filters']]), f'wrong pushed filters: {spark_explanation}')
+        arrow_explanation = QueryEngineArrow(props, self.base_path, -99999).explain(condition_manager)
+        self.assertEqual(None, arrow_explanation['physical_plan'], f'arrow has no physical plan: {arrow_explanation}')
+        self.assertEqual(1, len(arrow_explanation['pushed_filters']), f'wrong pushed filters: {arrow_explanation}')
+        self.assertTrue('air_temperature' in arrow_explanation['reading_columns'], f'wrong reading columns: {arrow_explanation}')
+        return
+
+    def test_query_timer(self):
+        props = self.__get_props()
+        es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+        for query_engine in [QueryEngineSpark(props, self.base_path, self.spark), QueryEngineArrow(props, self.base_path, -99999)]:
+            condition_manager = ParquetQueryConditionManagementV4(self.base_path, -99999, es_config, props, QueryTimer())
+            with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                    patch.object(ParquetPathsEsRetriever, 'start', return_value=self.parquet_names):
+                condition_manager.manage_query_props()
+            result = query_engine.search(condition_manager)
+            timing = condition_manager.query_timer.to_json()
+            for each in [QueryTimer.PATH_DEDUPE, QueryTimer.READ, QueryTimer.PAGE_FETCH, QueryTimer.SERIALIZATION]:
+                self.assertTrue(each in timing['stages'], f'missing {each} of {type(query_engine).__name__}: {timing}')
+            self.assertEqual(len(result['results']), timing['counters'][QueryTimer.RESULT_ROWS], f'wrong result_rows: {timing}')
+        return
@@ -0,0 +1,40 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from parquet_flask.io_logic.cdms_constants import CDMSConstants
+from parquet_flask.io_logic.query_engine_spark import QueryEngineSpark
+
+
+class TestQueryEngineSpark(unittest.TestCase):
+    def __get_sorted_df(self):
+        from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+        rows = [(f'2018-03-0{i % 9 + 1}T00:00:00Z', f'{i % 7}', float(i % 5), float(i % 3), float(i), 2018, 3) for i in range(100)]
+        columns = [CDMSConstants.time_col, CDMSConstants.platform_code_col, CDMSConstants.depth_col, CDMSConstants.lat_col, CDMSConstants.lon_col, CDMSConstants.year_col, CDMSConstants.month_col]
+        df = LocalSparkSession().get_spark_session().createDataFrame(rows, columns).repartition(4)
+        df = df.where(f'{CDMSConstants.depth_col} >= 0')
+        return df.sort([df[k].asc() for k in QueryEngineSpark.SORTING_COLUMNS]).drop(CDMSConstants.year_col, CDMSConstants.month_col)
+
+    def test_top_k_plan(self):
+        top_k_plan = self.__get_sorted_df().limit(20)._jdf.queryExecution().executedPlan().toString()
+        self.assertTrue('TakeOrderedAndProject' in top_k_plan, f'sort + limit is not planned as top-K: {top_k_plan}')
+        return
+
+    def test_top_k_page(self):
+        sorted_df = self.__get_sorted_df()
+        expected_page = sorted_df.limit(20).tail(10)
+        self.assertEqual(sorted_df.limit(20).collect()[10:], expected_page, f'top-K page is different from limit + tail')
+        return
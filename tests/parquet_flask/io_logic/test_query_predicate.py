@@ -0,0 +1,85 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pyarrow.dataset as ds
+
+from parquet_flask.io_logic.parquet_paths_es_retriever import ParquetPathsEsRetriever
+from parquet_flask.io_logic.parquet_query_condition_management_v4 import ParquetQueryConditionManagementV4
+from parquet_flask.io_logic.query_v2 import QueryProps
+
+
+class TestQueryPredicate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from pyspark.sql.functions import to_timestamp
+        from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+        cls.spark = LocalSparkSession().get_spark_session()
+        cls.parquet_path = os.path.join(tempfile.mkdtemp(), 'predicate')
+        rows = [
+            ('2018-03-03T00:00:00Z', '30', 5.0, 1.0, 1.0, 20.1),
+            ('2018-03-03T00:01:00Z', '30', -99999.0, 1.0, 2.0, None),
+            ('2018-03-04T00:00:00Z', '31', 30.0, 2.0, 0.0, 19.0),
+            ('2018-03-05T00:00:00Z', '31', 1.0, 20.0, 0.0, 18.2),
+            ('2018-04-01T00:00:00Z', '32', 0.0, 0.0, 0.0, 17.0),
+        ]
+        df = cls.spark.createDataFrame(rows, ['time', 'platform_code', 'depth', 'latitude', 'longitude', 'air_temperature'])
+        df.withColumn('time_obj', to_timestamp('time')).write.mode('overwrite').parquet(cls.parquet_path)
+        return
+
+    def __get_condition_manager(self):
+        props = QueryProps()
+        props.min_datetime = '2018-03-03T00:00:00Z'
+        props.max_datetime = '2018-03-31T00:00:00Z'
+        props.min_lat_lon = [0.0, 0.0]
+        props.max_lat_lon = [10.0, 10.0]
+        props.min_depth = -10.0
+        props.max_depth = 10.0
+        props.variable = ['air_temperature']
+        es_config = {'es_url': 'https://mock-es', 'es_index': 'mock_index', 'es_port': 443}
+        condition_manager = ParquetQueryConditionManagementV4(self.parquet_path, -99999, es_config, props)
+        with patch.object(ParquetPathsEsRetriever, 'load_es_from_config', lambda self, *args: self), \
+                patch.object(ParquetPathsEsRetriever, 'start', return_value=[]):
+            condition_manager.manage_query_props()
+        return condition_manager
+
+    def test_pushed_filters(self):
+        query_result = self.spark.read.parquet(self.parquet_path).where(self.__get_condition_manager().predicate.to_spark_column())
+        self.spark.conf.set('spark.sql.maxMetadataStringLength', '10000')  # PushedFilters is truncated at 100 characters by default
+        try:
+            physical_plan = query_result._jdf.queryExecution().executedPlan().toString()
+        finally:
+            self.spark.conf.unset('spark.sql.maxMetadataStringLength')
+        pushed_filters = [k for k in physical_plan.split('\n') if 'PushedFilters' in k]
+        self.assertEqual(len(pushed_filters), 1, f'missing PushedFilters in plan: {physical_plan}')
+        pushed_filters = pushed_filters[0]
+        for each in ['GreaterThanOrEqual(time_obj,', 'LessThanOrEqual(time_obj,',
+                     'GreaterThanOrEqual(latitude,0.0)', 'LessThanOrEqual(latitude,10.0)',
+                     'GreaterThanOrEqual(longitude,0.0)', 'LessThanOrEqual(longitude,10.0)',
+                     'EqualTo(depth,-99999.0)', 'IsNotNull(air_temperature)']:
+            self.assertTrue(each in pushed_filters, f'{each} is not pushed down: {pushed_filters}')
+        return
+
+    def test_spark_and_arrow(self):
+        predicate = self.__get_condition_manager().predicate
+        spark_result = self.spark.read.parquet(self.parquet_path).where(predicate.to_spark_column()).select('time').collect()
+        arrow_result = ds.dataset(self.parquet_path, format='parquet').to_table(columns=['time'], filter=predicate.to_arrow_expression())
+        self.assertEqual(sorted([k['time'] for k in spark_result]), ['2018-03-03T00:00:00Z'], f'wrong spark result: {spark_result}')
+        self.assertEqual(sorted(arrow_result.column('time').to_pylist()), ['2018-03-03T00:00:00Z'], f'wrong arrow result: {arrow_result}')
+        return
@@ -0,0 +1,90 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+
+os.environ['master_spark_url'] = ''
+os.environ['spark_app_name'] = ''
+os.environ['parquet_file_name'] = ''
+os.environ['in_situ_schema'] = ''
+os.environ['authentication_type'] = ''
+os.environ['authentication_key'] = ''
+os.environ['parquet_metadata_tbl'] = ''
+os.environ['es_url'] = ''
+
+from parquet_flask.io_logic.query_result_cache import QueryResultCache
+from parquet_flask.io_logic.query_v2 import QueryProps
+from parquet_flask.utils.time_utils import TimeUtils
+
+
+class TestQueryResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        QueryResultCache().clear()
+        return
+
+    def __get_props(self, platform_code: list, min_lat_lon=None):
+        props = QueryProps()
+        props.provider = 'Florida State University, COAPS'
+        props.project = 'SAMOS'
+        props.platform_code = platform_code
+        props.min_datetime = '2017-06-01T00:00:00Z'
+        props.max_datetime = '2017-06-30T00:00:00Z'
+        props.min_lat_lon = [-30.0, 150.0] if min_lat_lon is None else min_lat_lon
+        props.max_lat_lon = [-20.0, 160.0]
+        props.size = 10
+        return props
+
+    def test_canonical_key(self):
+        query_result_cache = QueryResultCache()
+        query_result_cache.put(self.__get_props(['30', '3B']), {'total': 1, 'results': [{'depth': 1.0}]})
+        before_stats = query_result_cache.get_stats()
+        cached_result = query_result_cache.get(self.__get_props(['3B', '30'], [-30.0000000001, 150.0]))
+        self.assertEqual(cached_result, {'total': 1, 'results': [{'depth': 1.0}]})
+        cached_result['next'] = 'mutated by the endpoint'
+        self.assertEqual(query_result_cache.get(self.__get_props(['30', '3B'])), {'total': 1, 'results': [{'depth': 1.0}]}, f'cached result is mutated')
+        self.assertEqual(query_result_cache.get(self.__get_props(['30'])), None)
+        after_stats = query_result_cache.get_stats()
+        self.assertEqual(after_stats['hits'] - before_stats['hits'], 2)
+        self.assertEqual(after_stats['misses'] - before_stats['misses'], 1)
+        return
+
+    def test_invalidate(self):
+        query_result_cache = QueryResultCache()
+        query_result_cache.put(self.__get_props(['30']), {'total': 1, 'results': []})
+        query_result_cache.put(self.__get_props(['3B']), {'total': 2, 'results': []})
+        stats_doc = {
+            'provider': 'Florida State University, COAPS',
+            'project': 'SAMOS',
+            'platform_code': '30',
+            'min_datetime': TimeUtils.get_datetime_obj('2017-07-01T00:00:00Z').timestamp(),
+            'max_datetime': TimeUtils.get_datetime_obj('2017-07-02T00:00:00Z').timestamp(),
+        }
+        self.assertEqual(query_result_cache.invalidate_by_stats_docs([stats_doc]), 0, f'file time range does not overlap')
+        stats_doc['min_datetime'] = TimeUtils.get_datetime_obj('2017-06-30T00:00:00Z').timestamp() + 0.5
+        self.assertEqual(query_result_cache.invalidate_by_stats_docs([stats_doc]), 1, f'file overlaps only platform 30')
+        self.assertEqual(query_result_cache.get(self.__get_props(['30'])), None)
+        self.assertEqual(query_result_cache.get(self.__get_props(['3B'])), {'total': 2, 'results': []})
+        return
+
+    def test_stale_put(self):
+        query_result_cache = QueryResultCache()
+        generation = query_result_cache.get_generation()
+        query_result_cache.invalidate('Florida State University, COAPS', 'SAMOS', {'31'})
+        query_result_cache.put(self.__get_props(['30']), {'total': 1, 'results': []}, generation)
+        self.assertEqual(query_result_cache.get(self.__get_props(['30'])), None, f'result of a query started before the invalidation is cached')
+        query_result_cache.put(self.__get_props(['30']), {'total': 1, 'results': []}, query_result_cache.get_generation())
+        self.assertEqual(query_result_cache.get(self.__get_props(['30'])), {'total': 1, 'results': []})
+        return
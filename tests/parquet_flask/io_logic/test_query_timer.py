@@ -0,0 +1,59 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import time
+import unittest
+
+from parquet_flask.io_logic.query_timer import QueryTimer
+
+
+class TestQueryTimer(unittest.TestCase):
+    def test_stages(self):
+        query_timer = QueryTimer()
+        with query_timer.stage(QueryTimer.ES_QUERY):
+            time.sleep(0.05)
+        for _ in range(3):
+            with query_timer.stage(QueryTimer.PAGE_FETCH):
+                time.sleep(0.01)
+        with self.assertRaises(ValueError):
+            with query_timer.stage(QueryTimer.COUNT):
+                raise ValueError('failed count')
+        query_timer.set_counter(QueryTimer.ES_PAGES, 2)
+        query_timer.add_counter(QueryTimer.RESULT_ROWS)
+        query_timer.add_counter(QueryTimer.RESULT_ROWS)
+        query_timer.stop()
+        timing = query_timer.to_json()
+        self.assertEqual([QueryTimer.ES_QUERY, QueryTimer.PAGE_FETCH, QueryTimer.COUNT], list(timing['stages'].keys()), 'stages are not in the order they ran')
+        self.assertTrue(timing['stages'][QueryTimer.ES_QUERY] >= 0.05, f'wrong es_query: {timing}')
+        self.assertTrue(timing['stages'][QueryTimer.PAGE_FETCH] >= 0.03, f'repeated stages are not summed: {timing}')
+        self.assertEqual({QueryTimer.ES_PAGES: 2, QueryTimer.RESULT_ROWS: 2}, timing['counters'], 'wrong counters')
+        self.assertTrue(timing['total_seconds'] >= sum(timing['stages'].values()), f'wrong total: {timing}')
+        time.sleep(0.02)
+        self.assertEqual(timing['total_seconds'], query_timer.to_json()['total_seconds'], 'total is not fixed by stop')
+        return
+
+    def test_log(self):
+        query_timer = QueryTimer()
+        with query_timer.stage(QueryTimer.READ):
+            pass
+        with self.assertLogs('parquet_flask.io_logic.query_timer', level='INFO') as logs:
+            query_timer.log(method='search', engine='ARROW')
+        self.assertEqual(1, len(logs.output), f'wrong logs: {logs.output}')
+        timing_log = json.loads(logs.output[0].split('query_timing: ', 1)[1])
+        self.assertEqual('search', timing_log['method'], f'wrong log: {timing_log}')
+        self.assertEqual('ARROW', timing_log['engine'], f'wrong log: {timing_log}')
+        self.assertTrue(QueryTimer.READ in timing_log['stages'], f'wrong log: {timing_log}')
+        return
@@ -0,0 +1,78 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from parquet_flask.io_logic.spark_job_scope import SparkJobScope
+from parquet_flask.io_logic.spark_pool_metrics import SparkPoolMetrics
+
+
+class TestSparkJobScope(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from parquet_flask.parquet_stat_extractor.local_spark_session import LocalSparkSession
+        cls.spark = LocalSparkSession().get_spark_session()
+        return
+
+    def setUp(self) -> None:
+        SparkPoolMetrics().clear()
+        return
+
+    def __get_stage_pools(self, job_group: str):
+        spark_context = self.spark.sparkContext
+        status_store = spark_context._jsc.sc().statusStore()
+        time.sleep(0.5)  # the status store is updated asynchronously
+        stage_pools = []
+        for each_job_id in spark_context.statusTracker().getJobIdsForGroup(job_group):
+            stage_ids = status_store.job(each_job_id).stageIds().iterator()
+            while stage_ids.hasNext():
+                stage_pools.append(status_store.lastStageAttempt(stage_ids.next()).schedulingPool())
+        return stage_pools
+
+    def test_pool_and_job_group(self):
+        spark_context = self.spark.sparkContext
+        with SparkJobScope(self.spark, SparkJobScope.INGEST_POOL, 'mock ingest') as job_scope:
+            self.assertEqual(spark_context.getLocalProperty(SparkJobScope.POOL_KEY), SparkJobScope.INGEST_POOL, 'pool is not set')
+            self.spark.range(100).selectExpr('sum(id)').collect()
+        self.assertEqual(spark_context.getLocalProperty(SparkJobScope.POOL_KEY), None, 'pool is not restored')
+        self.assertEqual(spark_context.getLocalProperty(SparkJobScope.JOB_GROUP_KEY), None, 'job group is not restored')
+        stage_pools = self.__get_stage_pools(job_scope.job_group)
+        self.assertTrue(len(stage_pools) > 0, 'no stage in the job group')
+        self.assertEqual(set(stage_pools), {SparkJobScope.INGEST_POOL}, f'wrong pools: {stage_pools}')
+        self.assertEqual(SparkPoolMetrics().get_stats()[SparkJobScope.INGEST_POOL]['job_groups'], 1, 'metrics are not recorded')
+        return
+
+    def test_nested_and_threads(self):
+        spark_context = self.spark.sparkContext
+        other_thread_pools = []
+        with SparkJobScope(self.spark, SparkJobScope.INGEST_POOL):
+            with SparkJobScope(self.spark, SparkJobScope.QUERY_POOL):
+                other_thread = threading.Thread(target=lambda: other_thread_pools.append(spark_context.getLocalProperty(SparkJobScope.POOL_KEY)))
+                other_thread.start()
+                other_thread.join()
+            self.assertEqual(spark_context.getLocalProperty(SparkJobScope.POOL_KEY), SparkJobScope.INGEST_POOL, 'outer pool is not restored')
+        self.assertEqual(other_thread_pools, [None], 'pool leaked to another thread')
+        return
+
+    def test_local_iterator_outside_scope(self):
+        with SparkJobScope(self.spark, SparkJobScope.QUERY_POOL) as job_scope:
+            local_iterator = self.spark.range(0, 100, numPartitions=4).toLocalIterator(prefetchPartitions=False)
+        self.assertEqual(len(list(local_iterator)), 100, 'wrong row count')
+        stage_pools = self.__get_stage_pools(job_scope.job_group)
+        self.assertTrue(len(stage_pools) > 0, 'no stage in the job group')
+        self.assertEqual(set(stage_pools), {SparkJobScope.QUERY_POOL}, f'wrong pools: {stage_pools}')
+        return
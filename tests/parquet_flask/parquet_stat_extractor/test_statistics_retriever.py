@@ -76,3 +76,22 @@ class TestStatisticsRetriever(TestCase):
         self.assertEqual(stats_retriever.max_datetime, TimeUtils.get_datetime_obj('2000-01-01T00:00:03Z').timestamp(), 'wrong max_datetime')
         self.assertEqual(stats_retriever.total, 5, 'wrong total')
         return
+
+    def test_has_missing_depth(self):
+        input_json = [
+            {CDMSConstants.lat_col: 0.0, CDMSConstants.lon_col: 1.0, CDMSConstants.depth_col: 2.0, CDMSConstants.time_col: '2000-01-01T00:00:03Z'},
+            {CDMSConstants.lat_col: 1.0, CDMSConstants.lon_col: 2.0, CDMSConstants.depth_col: float(CDMSConstants.missing_depth_value), CDMSConstants.time_col: '2000-01-01T00:00:00Z'},
+        ]
+        spark = SparkSession.builder \
+            .master("local") \
+            .appName('TestAppName') \
+            .getOrCreate()
+        df = spark.createDataFrame(input_json)
+        df = df.withColumn(CDMSConstants.time_obj_col, to_timestamp(CDMSConstants.time_col))
+        stats_retriever = StatisticsRetriever(df, []).start()
+        self.assertTrue(stats_retriever.has_missing_depth, 'missing depth row is not detected')
+        self.assertEqual(stats_retriever.min_depth, 2.0, 'wrong min_depth')
+        self.assertTrue(stats_retriever.to_json()[CDMSConstants.has_missing_depth], 'has_missing_depth is not in stats json')
+        stats_retriever = StatisticsRetriever(df.where(f'{CDMSConstants.depth_col} = 2.0'), []).start()
+        self.assertFalse(stats_retriever.has_missing_depth, 'file without missing depth rows')
+        return
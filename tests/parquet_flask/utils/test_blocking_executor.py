@@ -0,0 +1,87 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+from urllib.request import urlopen
+
+import gevent
+from flask import Flask
+from gevent.pywsgi import WSGIServer
+
+from parquet_flask.utils.blocking_executor import BlockingExecutor
+from parquet_flask.utils.singleton import Singleton
+
+
+class TestBlockingExecutor(unittest.TestCase):
+    """
+    time.sleep is not monkey patched. it blocks the hub like a py4j socket call of a spark query.
+    """
+    HEAVY_SECONDS = 1.0
+
+    def setUp(self) -> None:
+        Singleton._instances.pop(BlockingExecutor, None)
+        return
+
+    def __measure_cheap_latency(self, heavy_func):
+        app = Flask(__name__)
+        app.add_url_rule('/heavy', 'heavy', lambda: heavy_func() or 'done')
+        app.add_url_rule('/cheap', 'cheap', lambda: 'done')
+        http_server = WSGIServer(('127.0.0.1', 0), app, log=None)
+        http_server.start()
+        base_url = f'http://127.0.0.1:{http_server.server_port}'
+        latencies = []
+
+        def call_heavy():
+            urlopen(f'{base_url}/heavy').read()
+            return
+
+        def call_cheap():
+            time.sleep(0.2)  # after the heavy request has started
+            start_time = time.monotonic()
+            urlopen(f'{base_url}/cheap').read()
+            latencies.append(time.monotonic() - start_time)
+            return
+
+        clients = [threading.Thread(target=call_heavy), threading.Thread(target=call_cheap)]
+        for each in clients:
+            each.start()
+        while any([k.is_alive() for k in clients]):
+            gevent.sleep(0.01)  # lets the hub of this thread serve the requests
+        http_server.stop()
+        return latencies[0]
+
+    def test_cheap_request_while_blocked(self):
+        latency = self.__measure_cheap_latency(lambda: time.sleep(self.HEAVY_SECONDS))
+        self.assertTrue(latency > self.HEAVY_SECONDS / 2, f'hub was not blocked. latency: {latency}')
+        return
+
+    def test_cheap_request_while_offloaded(self):
+        latency = self.__measure_cheap_latency(lambda: BlockingExecutor().run(time.sleep, self.HEAVY_SECONDS))
+        self.assertTrue(latency < self.HEAVY_SECONDS / 4, f'hub was blocked. latency: {latency}')
+        return
+
+    def test_outside_greenlet(self):
+        self.assertEqual(BlockingExecutor().run(threading.get_ident), threading.get_ident(), 'not executed directly')
+        return
+
+    def test_exception(self):
+        def raise_error():
+            raise ValueError('mock error')
+        greenlet = gevent.spawn(BlockingExecutor().run, raise_error)
+        greenlet.join()
+        self.assertTrue(isinstance(greenlet.exception, ValueError), f'exception is not raised in the greenlet: {greenlet.exception}')
+        return
@@ -0,0 +1,60 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import unittest
+
+from parquet_flask.utils.interval_index import IntervalIndex
+from parquet_flask.utils.packed_r_tree import PackedRTree
+
+
+class TestPackedRTree(unittest.TestCase):
+    def test_query_same_as_scan(self):
+        random.seed(7)
+        boxes = []
+        for i in range(2000):
+            min_x, min_y = random.uniform(-90, 80), random.uniform(-180, 170)
+            boxes.append((min_x, min_y, min_x + random.uniform(0, 10), min_y + random.uniform(0, 10), i))
+        r_tree = PackedRTree(boxes)
+        self.assertEqual(len(r_tree), 2000, 'wrong size')
+        for _ in range(100):
+            min_x, min_y = random.uniform(-90, 90), random.uniform(-180, 180)
+            query_box = (min_x, min_y, min_x + random.uniform(0, 30), min_y + random.uniform(0, 30))
+            expected_result = sorted([k[4] for k in boxes if k[0] <= query_box[2] and k[2] >= query_box[0] and k[1] <= query_box[3] and k[3] >= query_box[1]])
+            self.assertEqual(sorted(r_tree.query(*query_box)), expected_result, f'wrong result for {query_box}')
+        return
+
+    def test_empty_and_touching(self):
+        self.assertEqual(PackedRTree([]).query(0, 0, 1, 1), [], 'empty tree')
+        r_tree = PackedRTree([(0, 0, 1, 1, 'a'), (2, 2, 3, 3, 'b')])
+        self.assertEqual(sorted(r_tree.query(1, 1, 2, 2)), ['a', 'b'], 'boundaries are included')
+        self.assertEqual(r_tree.query(min_x=2.5), ['b'], 'half open query')
+        return
+
+
+class TestIntervalIndex(unittest.TestCase):
+    def test_query_same_as_scan(self):
+        random.seed(7)
+        intervals = []
+        for i in range(2000):
+            start = random.uniform(0, 1000)
+            intervals.append((start, start + random.uniform(0, 50), i))
+        interval_index = IntervalIndex(intervals)
+        for _ in range(200):
+            query_start = random.choice([None, random.uniform(-10, 1050)])
+            query_end = random.choice([None, random.uniform(-10, 1050)])
+            expected_result = sorted([k[2] for k in intervals if (query_end is None or k[0] <= query_end) and (query_start is None or k[1] >= query_start)])
+            self.assertEqual(sorted(interval_index.query(query_start, query_end)), expected_result, f'wrong result for {query_start} - {query_end}')
+        return
@@ -0,0 +1,51 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+
+from flask import Flask
+
+from parquet_flask.v1.request_client import RequestClient
+
+
+class TestRequestClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        return
+
+    def tearDown(self) -> None:
+        os.environ.pop('trusted_proxy_count', None)
+        return
+
+    def __get_client_id(self, forwarded_for: str = None):
+        headers = {} if forwarded_for is None else {RequestClient.FORWARDED_FOR_HEADER: forwarded_for}
+        with self.app.test_request_context('/', headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+            return RequestClient.get_client_id()
+
+    def test_without_proxy(self):
+        self.assertEqual(self.__get_client_id(), '10.0.0.1', 'peer address is not used')
+        self.assertEqual(self.__get_client_id('1.2.3.4'), '10.0.0.1', 'forged header changed the client')
+        return
+
+    def test_trusted_proxy(self):
+        os.environ['trusted_proxy_count'] = '1'
+        self.assertEqual(self.__get_client_id('203.0.113.7'), '203.0.113.7', 'address appended by the proxy is not used')
+        self.assertEqual(self.__get_client_id('1.2.3.4, 203.0.113.7'), '203.0.113.7', 'forged entry changed the client')
+        self.assertEqual(self.__get_client_id('5.6.7.8, 203.0.113.7'), '203.0.113.7', 'forged entry changed the client')
+        self.assertEqual(self.__get_client_id(), '10.0.0.1', 'peer address is not used without the header')
+        os.environ['trusted_proxy_count'] = '2'
+        self.assertEqual(self.__get_client_id('1.2.3.4, 203.0.113.7, 10.0.0.2'), '203.0.113.7', 'wrong entry for 2 proxies')
+        return
@@ -0,0 +1,72 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import unittest
+
+from flask import Flask
+from flask_restx import Api
+
+os.environ['master_spark_url'] = ''
+os.environ['spark_app_name'] = ''
+os.environ['parquet_file_name'] = ''
+os.environ['in_situ_schema'] = ''
+os.environ['authentication_type'] = ''
+os.environ['authentication_key'] = ''
+os.environ['parquet_metadata_tbl'] = ''
+os.environ['es_url'] = ''
+
+from parquet_flask.v1.query_data_doms import api as query_data_doms
+from parquet_flask.v1.query_data_doms_custom_pagination import api as query_data_doms_custom_pagination
+from parquet_flask.v1.request_query_props import RequestQueryProps
+
+
+class TestRequestQueryProps(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        app = Flask(__name__)
+        api = Api(app)
+        api.add_namespace(query_data_doms)
+        api.add_namespace(query_data_doms_custom_pagination)
+        cls.client = app.test_client()
+        return
+
+    def test_custom_pagination(self):
+        args = {
+            'startIndex': '2', 'platform': '3B, 30', 'startTime': '2018-01-01T00:00:00Z',
+            'markerTime': '2018-02-01T00:00:00Z', 'markerPlatform': '30', 'markerDepth': '1', 'markerLat': '2', 'markerLon': '3',
+        }
+        self.assertTrue(RequestQueryProps.is_custom_pagination(args), 'marker is not detected')
+        query_json = RequestQueryProps.get_query_json(args, True)
+        self.assertEqual(query_json['start_from'], 0, 'startIndex should be ignored')
+        self.assertEqual(query_json['min_time'], '2018-02-01T00:00:00Z', 'marker time should be the start')
+        self.assertEqual(query_json['platform_code'], ['30', '3B'])
+        self.assertEqual(RequestQueryProps.get_query_json(args)['start_from'], 2)
+        args.pop('markerLon')
+        self.assertRaises(ValueError, RequestQueryProps.get_query_json, args, True)
+        return
+
+    def test_malformed_args(self):
+        for endpoint, query_args in [
+            ('query_data_doms', 'itemsPerPage=abc'),
+            ('query_data_doms', 'startIndex=-x'),
+            ('query_data_doms', 'bbox=1,2,3'),
+            ('query_data_doms_custom_pagination', 'itemsPerPage=abc'),
+            ('query_data_doms_custom_pagination', 'markerPlatform=30'),
+        ]:
+            response = self.client.get(f'/{endpoint}?{query_args}')
+            self.assertEqual(response.status_code, 400, f'wrong status for {endpoint}?{query_args}')
+            self.assertEqual(sorted(response.get_json().keys()), ['details', 'message'], f'wrong body for {endpoint}?{query_args}')
+        return